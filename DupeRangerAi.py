@@ -1,20 +1,68 @@
 import hashlib
+import itertools
 try:
     import xxhash  # fast non-cryptographic hash (xxh64)
 except Exception:  # pragma: no cover - optional dependency
     xxhash = None
+try:
+    import blake3  # optional fast verification digest, multi-threaded for big files
+except Exception:  # pragma: no cover - optional dependency
+    blake3 = None
+try:
+    import zstandard  # optional zstd compression for NDJSON exports
+except Exception:  # pragma: no cover - optional dependency
+    zstandard = None
+try:
+    import fcntl  # POSIX only; used for FICLONE reflinks
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+try:
+    from watchdog.events import FileSystemEventHandler  # inotify/FSEvents/ReadDirectoryChangesW for watch mode
+    from watchdog.observers import Observer
+except Exception:  # pragma: no cover - optional dependency
+    FileSystemEventHandler = object
+    Observer = None
+try:
+    from PIL import Image, ImageOps  # perceptual hashes for near-duplicate images
+except Exception:  # pragma: no cover - optional dependency
+    Image = None
+    ImageOps = None
+try:
+    import numpy as np  # vectorized DCT for pHash; dHash is used without it
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+import argparse
+import asyncio
+import errno
+import fnmatch
+import functools
+import gzip
+import heapq
+import io
 import json
 import mimetypes
+import multiprocessing
+from array import array
+from bisect import bisect_left, insort
 import os
+import platform
+import re
 import shutil
+import sqlite3
+import struct
+import tempfile
 import threading
+import time
 from collections import defaultdict
-from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait, as_completed
-from dataclasses import dataclass, field
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import (
+    FIRST_COMPLETED, CancelledError, Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor, wait, as_completed,
+)
+from dataclasses import asdict, dataclass, field, fields
 from pathlib import Path
 import sys
-from queue import Empty, Queue
-from tkinter import filedialog, messagebox
+from queue import Empty, Full, Queue
+from tkinter import filedialog, messagebox, simpledialog
 import tkinter as tk
 from tkinter import ttk
 
@@ -70,7 +118,7 @@ class Tooltip:
             self._tw = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FileRecord:
     path: Path
     size: int
@@ -79,15 +127,545 @@ class FileRecord:
     hash_value: str | None = None
     fast_hash: int | None = None
     category: str | None = None
+    device: int | None = None
+    inode: int | None = None
+    root: Path | None = None
+    mtime_ns: int | None = None
+
+
+class _InternTable:
+    """Maps repeated strings (extensions, MIME types, directories) to small integer ids."""
+    __slots__ = ("values", "_ids")
+
+    def __init__(self) -> None:
+        # id 0 is reserved for None
+        self.values: list[str | None] = [None]
+        self._ids: dict[str, int] = {}
+
+    def intern(self, value: str | None) -> int:
+        if value is None:
+            return 0
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.values.append(value)
+            self._ids[value] = idx
+        return idx
+
+
+class StoredFileRecord(FileRecord):
+    """
+    FileRecord read from a RecordStore. Setting a field writes the whole
+    record back to its row, so ``store[i].category = ...`` sticks; a view
+    whose row has moved (after remove_many) fails with ValueError instead of
+    updating another file.
+    """
+
+    __slots__ = ("_store", "_index")
+
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        # _store stays None while the store fills the fields in
+        if self._store is not None and name in _RECORD_FIELDS:
+            self._store[self._index] = self
+
+    def __eq__(self, other):
+        if not isinstance(other, FileRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in _RECORD_FIELDS)
+
+    __hash__ = None
+
+
+_RECORD_FIELDS = frozenset(item.name for item in fields(FileRecord))
+
+
+class RecordStore:
+    """
+    Compact columnar backing store for ScanResults.files.
+
+    Each record is split into typed arrays: sizes and xxhash fingerprints are
+    packed machine ints, extensions / MIME types / categories / parent
+    directories are interned once and referenced by id, and file names live in
+    one shared byte buffer. FileRecord objects are only materialized on access,
+    so a scan costs tens of bytes per file instead of several hundred.
+
+    Behaves like a list of FileRecord for append / len / iteration / indexing.
+    Materialized records are StoredFileRecord views: assigning a field writes
+    through to the columns (``store[i] = rec`` does the same in one step).
+    """
+
+    _HAS_FAST_HASH = 1
+    _HAS_FILE_ID = 2
+    _HAS_MTIME = 4
+    # One entry per record in each of these; names are handled separately
+    _ROW_COLUMNS = (
+        "_dir_ids", "_sizes", "_ext_ids", "_mime_ids", "_category_ids",
+        "_root_ids", "_fast_hashes", "_devices", "_inodes", "_mtimes", "_flags",
+    )
+
+    def __init__(self, records=()) -> None:
+        self._dirs = _InternTable()
+        self._extensions = _InternTable()
+        self._mimes = _InternTable()
+        self._categories = _InternTable()
+        self._roots = _InternTable()
+        self._dir_ids = array("I")
+        self._name_offsets = array("Q", [0])
+        self._names = bytearray()
+        self._sizes = array("q")
+        self._ext_ids = array("I")
+        self._mime_ids = array("I")
+        self._category_ids = array("I")
+        self._root_ids = array("H")
+        self._fast_hashes = array("Q")
+        self._devices = array("Q")
+        self._inodes = array("Q")
+        self._mtimes = array("q")
+        self._flags = bytearray()
+        # Verification hashes only exist for candidate duplicates, so keep them sparse
+        self._hash_values: dict[int, str] = {}
+        self._root_cache: dict[int, Path] = {}
+        self.extend(records)
+
+    def append(self, record: FileRecord) -> None:
+        path = str(record.path)
+        parent, name = os.path.split(path)
+        self._dir_ids.append(self._dirs.intern(parent))
+        self._names += os.fsencode(name)
+        self._name_offsets.append(len(self._names))
+        self._sizes.append(record.size)
+        self._ext_ids.append(self._extensions.intern(record.extension))
+        self._mime_ids.append(self._mimes.intern(record.mime))
+        self._category_ids.append(self._categories.intern(record.category))
+        self._root_ids.append(self._roots.intern(str(record.root) if record.root is not None else None))
+        self._fast_hashes.append(record.fast_hash or 0)
+        self._devices.append(record.device or 0)
+        self._inodes.append(record.inode or 0)
+        self._mtimes.append(record.mtime_ns or 0)
+        self._flags.append(self._flags_for(record))
+        if record.hash_value is not None:
+            self._hash_values[len(self._sizes) - 1] = record.hash_value
+
+    def extend(self, records) -> None:
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __iter__(self):
+        for idx in range(len(self._sizes)):
+            yield self._materialize(idx)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._materialize(i) for i in range(*index.indices(len(self)))]
+        return self._materialize(self._normalize_index(index))
+
+    def __setitem__(self, index: int, record: FileRecord) -> None:
+        idx = self._normalize_index(index)
+        if str(record.path) != self.path_str(idx):
+            raise ValueError("RecordStore entries cannot change path")
+        self._sizes[idx] = record.size
+        self._ext_ids[idx] = self._extensions.intern(record.extension)
+        self._mime_ids[idx] = self._mimes.intern(record.mime)
+        self._category_ids[idx] = self._categories.intern(record.category)
+        self._root_ids[idx] = self._roots.intern(str(record.root) if record.root is not None else None)
+        self._fast_hashes[idx] = record.fast_hash or 0
+        self._devices[idx] = record.device or 0
+        self._inodes[idx] = record.inode or 0
+        self._mtimes[idx] = record.mtime_ns or 0
+        self._flags[idx] = self._flags_for(record)
+        if record.hash_value is None:
+            self._hash_values.pop(idx, None)
+        else:
+            self._hash_values[idx] = record.hash_value
+
+    def remove_many(self, indices) -> None:
+        """
+        Drop several records in one compaction pass. Later records shift down:
+        a surviving index i becomes i - (number of removed indices below i).
+        """
+        removed = sorted({self._normalize_index(index) for index in indices})
+        if not removed:
+            return
+        # Surviving rows as contiguous runs, so columns are rebuilt with slices
+        runs = []
+        start = 0
+        for idx in removed:
+            if start < idx:
+                runs.append((start, idx))
+            start = idx + 1
+        if start < len(self._sizes):
+            runs.append((start, len(self._sizes)))
+        for name in self._ROW_COLUMNS:
+            column = getattr(self, name)
+            compacted = column[:0]
+            for begin, end in runs:
+                compacted += column[begin:end]
+            setattr(self, name, compacted)
+        names = bytearray()
+        offsets = array("Q", [0])
+        for begin, end in runs:
+            first = self._name_offsets[begin]
+            shift = first - len(names)
+            names += self._names[first:self._name_offsets[end]]
+            offsets.extend(offset - shift for offset in self._name_offsets[begin + 1:end + 1])
+        self._names = names
+        self._name_offsets = offsets
+        dropped = set(removed)
+        self._hash_values = {
+            idx - bisect_left(removed, idx): value
+            for idx, value in self._hash_values.items()
+            if idx not in dropped
+        }
+
+    def path_str(self, index: int) -> str:
+        idx = self._normalize_index(index)
+        name = os.fsdecode(bytes(self._names[self._name_offsets[idx]:self._name_offsets[idx + 1]]))
+        return os.path.join(self._dirs.values[self._dir_ids[idx]], name)
+
+    def iter_dir_entries(self):
+        """Yield (parent directory, file name, size, hash_value) without materializing records."""
+        for idx in range(len(self._sizes)):
+            name = os.fsdecode(bytes(self._names[self._name_offsets[idx]:self._name_offsets[idx + 1]]))
+            yield self._dirs.values[self._dir_ids[idx]], name, self._sizes[idx], self._hash_values.get(idx)
+
+    def iter_group_keys(self):
+        """Yield (index, size, fast_hash) without materializing records."""
+        for idx in range(len(self._sizes)):
+            fast_hash = self._fast_hashes[idx] if self._flags[idx] & self._HAS_FAST_HASH else None
+            yield idx, self._sizes[idx], fast_hash
+
+    def nbytes(self) -> int:
+        """Approximate payload size of the columns (excludes the small intern tables)."""
+        columns = (
+            self._dir_ids, self._name_offsets, self._sizes, self._ext_ids,
+            self._mime_ids, self._category_ids, self._root_ids, self._fast_hashes, self._devices, self._inodes,
+            self._mtimes,
+        )
+        total = sum(col.itemsize * len(col) for col in columns)
+        return total + len(self._names) + len(self._flags)
+
+    def _flags_for(self, record: FileRecord) -> int:
+        flags = self._HAS_FAST_HASH if record.fast_hash is not None else 0
+        if record.device is not None and record.inode is not None:
+            flags |= self._HAS_FILE_ID
+        if record.mtime_ns is not None:
+            flags |= self._HAS_MTIME
+        return flags
+
+    def _normalize_index(self, index: int) -> int:
+        count = len(self._sizes)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("RecordStore index out of range")
+        return index
+
+    def _materialize(self, idx: int) -> StoredFileRecord:
+        record = StoredFileRecord.__new__(StoredFileRecord)
+        object.__setattr__(record, "_store", None)
+        FileRecord.__init__(
+            record,
+            path=Path(self.path_str(idx)),
+            size=self._sizes[idx],
+            extension=self._extensions.values[self._ext_ids[idx]] or "",
+            mime=self._mimes.values[self._mime_ids[idx]],
+            hash_value=self._hash_values.get(idx),
+            fast_hash=self._fast_hashes[idx] if self._flags[idx] & self._HAS_FAST_HASH else None,
+            category=self._categories.values[self._category_ids[idx]],
+            device=self._devices[idx] if self._flags[idx] & self._HAS_FILE_ID else None,
+            inode=self._inodes[idx] if self._flags[idx] & self._HAS_FILE_ID else None,
+            root=self._root_path(self._root_ids[idx]),
+            mtime_ns=self._mtimes[idx] if self._flags[idx] & self._HAS_MTIME else None,
+        )
+        object.__setattr__(record, "_index", idx)
+        object.__setattr__(record, "_store", self)
+        return record
+
+    def _root_path(self, root_id: int) -> Path | None:
+        # Materialize each root Path once; every record under it shares the object
+        value = self._roots.values[root_id]
+        if value is None:
+            return None
+        cache = self._root_cache
+        if root_id not in cache:
+            cache[root_id] = Path(value)
+        return cache[root_id]
+
+
+class ScanMetrics:
+    """
+    Thread-safe timers, byte counters and gauges for one FileScanner run.
+
+    - phase_seconds: wall-clock time per scan phase ("scan", "verify")
+    - stage_seconds: time summed across workers per stage ("walk", "hash", "verify", "classify")
+    - bytes_read: bytes read per stage
+    - counters: file counts per stage
+    - gauges: latest sampled values (queue depths)
+    - bytes_saved: bytes phase 2 did not re-read because the digest came from the phase-1 read
+    - skipped: files and directories left out by the walk-time ScanFilter
+    snapshot() adds derived rates (files/s, MB/s, worker utilization, classifier calls/s).
+    """
+
+    # stages that run on pool workers (walk runs on the scanner thread)
+    WORKER_STAGES = ("hash", "verify", "classify", "perceptual")
+
+    def __init__(self, workers: int = 1) -> None:
+        self._lock = threading.Lock()
+        self.workers = max(1, workers)
+        self.started_at = time.perf_counter()
+        self.finished_at: float | None = None
+        self.phase_seconds: dict[str, float] = defaultdict(float)
+        self.stage_seconds: dict[str, float] = defaultdict(float)
+        self.bytes_read: dict[str, int] = defaultdict(int)
+        self.counters: dict[str, int] = defaultdict(int)
+        self.gauges: dict[str, float] = {}
+        self.bytes_saved = 0
+        self.skipped: dict[str, int] = {}
+
+    def add_stage(self, stage: str, seconds: float, nbytes: int = 0, count: int = 1) -> None:
+        with self._lock:
+            self.stage_seconds[stage] += seconds
+            self.bytes_read[stage] += nbytes
+            self.counters[stage] += count
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def add_saved(self, nbytes: int) -> None:
+        with self._lock:
+            self.bytes_saved += nbytes
+
+    def set_skipped(self, files: int, dirs: int) -> None:
+        with self._lock:
+            self.skipped = {"files": files, "dirs": dirs}
+
+    def finish(self) -> None:
+        """Freeze elapsed time so later snapshots (exports) report the scan's own duration."""
+        with self._lock:
+            self.finished_at = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phase_seconds[name] += time.perf_counter() - start
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = max((self.finished_at or time.perf_counter()) - self.started_at, 1e-9)
+            total_bytes = sum(self.bytes_read.values())
+            busy = sum(self.stage_seconds.get(stage, 0.0) for stage in self.WORKER_STAGES)
+            return {
+                "elapsed_seconds": elapsed,
+                "workers": self.workers,
+                "phase_seconds": dict(self.phase_seconds),
+                "stage_seconds": dict(self.stage_seconds),
+                "bytes_read": dict(self.bytes_read),
+                "bytes_saved": self.bytes_saved,
+                "skipped": dict(self.skipped),
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "files_per_second": self.counters.get("walk", 0) / elapsed,
+                "mb_per_second": total_bytes / (1024 * 1024) / elapsed,
+                # per-stage throughput while a worker is busy on that stage
+                "stage_mb_per_second": {
+                    stage: self.bytes_read.get(stage, 0) / (1024 * 1024) / seconds
+                    for stage, seconds in self.stage_seconds.items()
+                    if seconds > 0 and self.bytes_read.get(stage, 0)
+                },
+                "worker_utilization": min(1.0, busy / (self.workers * elapsed)),
+                "classify_calls_per_second": self.counters.get("classify", 0) / elapsed,
+            }
+
+    def status_line(self) -> str:
+        """Compact one-line summary for the status bar / CLI progress."""
+        snap = self.snapshot()
+        return (
+            f"{snap['counters'].get('walk', 0):,} files | "
+            f"{snap['files_per_second']:.1f} files/s | "
+            f"{snap['mb_per_second']:.1f} MB/s | "
+            f"workers {snap['worker_utilization']:.0%} busy | "
+            f"pending {int(snap['gauges'].get('pending_futures', 0))}"
+        )
+
+    def to_prometheus(self, prefix: str = "duperanger") -> str:
+        """Render the snapshot in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+
+        def emit(name: str, kind: str, help_text: str, samples) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+
+        emit("elapsed_seconds", "gauge", "Seconds since the scan started.", [({}, snap["elapsed_seconds"])])
+        emit("phase_seconds", "counter", "Wall-clock seconds per scan phase.",
+             [({"phase": key}, val) for key, val in snap["phase_seconds"].items()])
+        emit("stage_seconds", "counter", "Worker seconds per stage.",
+             [({"stage": key}, val) for key, val in snap["stage_seconds"].items()])
+        emit("bytes_read_total", "counter", "Bytes read per stage.",
+             [({"stage": key}, val) for key, val in snap["bytes_read"].items()])
+        emit("bytes_saved_total", "counter", "Bytes not re-read for verification thanks to single-pass hashing.",
+             [({}, snap["bytes_saved"])])
+        emit("skipped_total", "counter", "Entries left out by the walk-time filter (directories are not entered).",
+             [({"kind": key}, val) for key, val in snap["skipped"].items()])
+        emit("files_total", "counter", "Files processed per stage.",
+             [({"stage": key}, val) for key, val in snap["counters"].items()])
+        emit("queue_depth", "gauge", "Sampled queue depths.",
+             [({"queue": key}, val) for key, val in snap["gauges"].items()])
+        emit("files_per_second", "gauge", "Walked files per second.", [({}, snap["files_per_second"])])
+        emit("mb_per_second", "gauge", "Total MB read per second.", [({}, snap["mb_per_second"])])
+        emit("worker_utilization", "gauge", "Fraction of worker time spent busy.", [({}, snap["worker_utilization"])])
+        emit("classify_calls_per_second", "gauge", "AI classifier calls per second.",
+             [({}, snap["classify_calls_per_second"])])
+        return "\n".join(lines) + "\n"
+
+    def write(self, out_path: Path) -> None:
+        """Write Prometheus text for ``*.prom``/``*.txt`` targets, JSON otherwise."""
+        if out_path.suffix.lower() in (".prom", ".txt"):
+            out_path.write_text(self.to_prometheus(), encoding="utf-8")
+        else:
+            out_path.write_text(json.dumps(self.snapshot(), indent=2), encoding="utf-8")
+
+
+class DirectoryIndex:
+    """
+    Files, bytes and duplicate bytes per directory, both for the files
+    directly inside it ("own") and rolled up over its subtree. Each file is
+    credited to its directory and every ancestor up to its scan root as it
+    is recorded, so a subtree total is one lookup and a drill-down only
+    lists the stored children; nothing walks ScanResults.files again.
+    Duplicate bytes count every copy in a group, the first one included.
+    """
+
+    FIELDS = ("files", "bytes", "duplicate_files", "duplicate_bytes")
+
+    def __init__(self, roots=()) -> None:
+        self._stop_at = {str(root) for root in roots}
+        self._own: dict[str, list[int]] = {}
+        self._subtree: dict[str, list[int]] = {}
+        self._children: dict[str, set[str]] = defaultdict(set)
+
+    def add(self, path, size: int) -> None:
+        self._credit(path, (1, size, 0, 0))
+
+    def add_duplicate(self, path, size: int) -> None:
+        """Count an already added file as part of a duplicate group."""
+        self._credit(path, (0, 0, 1, size))
+
+    def remove(self, path, size: int) -> None:
+        self._credit(path, (-1, -size, 0, 0))
+
+    def remove_duplicate(self, path, size: int) -> None:
+        """Undo add_duplicate, e.g. when watch mode sees a group shrink."""
+        self._credit(path, (0, 0, -1, -size))
+
+    def _credit(self, path, deltas) -> None:
+        directory = os.path.dirname(str(path))
+        own = self._own.setdefault(directory, [0, 0, 0, 0])
+        for i, delta in enumerate(deltas):
+            own[i] += delta
+        if not any(own):
+            del self._own[directory]
+        while True:
+            totals = self._subtree.setdefault(directory, [0, 0, 0, 0])
+            for i, delta in enumerate(deltas):
+                totals[i] += delta
+            parent = os.path.dirname(directory)
+            done = directory in self._stop_at or parent == directory
+            # a directory whose last file went away is dropped, so it is not listed with zeros
+            if not any(totals):
+                del self._subtree[directory]
+                self._children.pop(directory, None)
+                if not done:
+                    self._children[parent].discard(directory)
+            elif not done:
+                self._children[parent].add(directory)
+            if done:
+                break
+            directory = parent
+
+    def __len__(self) -> int:
+        return len(self._subtree)
+
+    def totals(self, directory, subtree: bool = True) -> dict[str, int] | None:
+        """Totals for one directory (None if no scanned file is under it)."""
+        values = (self._subtree if subtree else self._own).get(str(directory))
+        return dict(zip(self.FIELDS, values)) if values is not None else None
+
+    def roots(self) -> list[str]:
+        """Top-level directories: the scan roots that hold files."""
+        return sorted(directory for directory in self._subtree if os.path.dirname(directory) not in self._subtree)
+
+    def has_children(self, directory) -> bool:
+        return bool(self._children.get(str(directory)))
+
+    def children(self, directory, key: str = "duplicate_bytes") -> list[tuple[str, dict[str, int]]]:
+        """Immediate subdirectories of directory with their subtree totals, largest key first."""
+        column = self.FIELDS.index(key)
+        found = sorted(self._children.get(str(directory), ()), key=lambda child: self._subtree[child][column], reverse=True)
+        return [(child, dict(zip(self.FIELDS, self._subtree[child]))) for child in found]
+
+    def top(self, n: int = 10, key: str = "duplicate_bytes", subtree: bool = False) -> list[tuple[str, dict[str, int]]]:
+        """
+        The n directories with the largest key. By default only files directly
+        inside each directory count, so the answer names where the waste sits
+        instead of every ancestor above it; subtree=True ranks rolled-up totals.
+        """
+        column = self.FIELDS.index(key)
+        table = self._subtree if subtree else self._own
+        ranked = heapq.nlargest(n, (item for item in table.items() if item[1][column] > 0), key=lambda item: item[1][column])
+        return [(directory, dict(zip(self.FIELDS, values))) for directory, values in ranked]
+
+
+@dataclass(slots=True)
+class DuplicateDirectory:
+    """Directories whose whole subtrees match: same file names, same layout, same content."""
+    digest: str
+    directories: list[Path]
+    # one copy's totals
+    size: int
+    file_count: int
+    # ScanResults.duplicates keys of the files inside, so UIs can fold them under this finding
+    groups: list[str] = field(default_factory=list)
 
 
 @dataclass
 class ScanResults:
     root: Path
-    files: list[FileRecord] = field(default_factory=list)
+    # every scanned root (root is the first); records are tagged with theirs via FileRecord.root
+    roots: list[Path] = field(default_factory=list)
+    files: RecordStore = field(default_factory=RecordStore)
     by_extension: dict[str, dict[str, float]] = field(default_factory=dict)
     duplicates: dict[str, list[FileRecord]] = field(default_factory=dict)
     by_category: dict[str, dict[str, float]] = field(default_factory=dict)
+    metrics: ScanMetrics | None = None
+    # resized/re-encoded images: perceptual hash (hex) of the first member -> similar records
+    near_duplicates: dict[str, list[FileRecord]] = field(default_factory=dict)
+    # "st_dev:st_ino" -> every hardlink to it under the roots; hashed once, kept out of duplicates
+    hardlinks: dict[str, list[FileRecord]] = field(default_factory=dict)
+    # Merkle digest of a directory subtree -> the directories sharing it (outermost matches only)
+    duplicate_dirs: dict[str, DuplicateDirectory] = field(default_factory=dict)
+    # per-directory file/byte/duplicate totals, rolled up to the roots as records are added
+    directories: DirectoryIndex | None = None
+    # verification digest behind every hash_value ("sha256", "blake3" or "xxh3_128")
+    digest: str = "sha256"
+    # files at least this big were tree-hashed ("tree-<digest>:"); None if none were
+    tree_threshold: int | None = None
+    # walk-time rules the scan ran with (watch mode applies the same ones)
+    scan_filter: "ScanFilter | None" = None
+    # findings watch mode cannot re-derive ("near_duplicates", "hardlinks"); a rescan refreshes them
+    stale: set[str] = field(default_factory=set)
 
 
 class FileClassifier:
@@ -212,10 +790,1321 @@ class FileClassifier:
         return "Miscellaneous"
 
 
+def storage_key(root: Path) -> str:
+    """Mount point containing root; auto-tune profiles are stored per mount."""
+    path = Path(os.path.abspath(root))
+    while not os.path.ismount(path) and path.parent != path:
+        path = path.parent
+    return str(path)
+
+
+def default_profile_path() -> Path:
+    return Path.home() / ".duperanger" / "autotune.json"
+
+
+class AutoTuner:
+    """
+    Picks and keeps adjusting worker concurrency and read chunk size from measured throughput.
+
+    - a fresh mount is probed first: stat latency over a sample of entries picks the
+      starting concurrency, timed reads of the largest sampled files pick the chunk size
+    - while scanning, observe() hill-climbs one dimension per window: a move is kept
+      when it beats the best score by >3%, otherwise it is reverted and the direction flips
+    - the score is MB/s when the window is dominated by large files, files/s otherwise
+    - save() stores the best settings per mount point so the next scan starts tuned
+    """
+
+    MIN_WORKERS = 1
+    MAX_WORKERS = 64
+    CHUNK_SIZES = tuple(1 << shift for shift in range(18, 26))  # 256 KB .. 32 MB
+    WINDOW_SECONDS = 2.0
+    PROBE_ENTRIES = 64
+    PROBE_READ_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, root: Path, workers: int, fast_chunk: int, profile_path: Path | None = None):
+        self.key = storage_key(root)
+        self.profile_path = profile_path or default_profile_path()
+        self.latency_ms: float | None = None
+        saved = self._load_profiles().get(self.key)
+        self.from_profile = saved is not None
+        if saved:
+            workers = saved.get("workers", workers)
+            fast_chunk = saved.get("fast_chunk", fast_chunk)
+        else:
+            workers, fast_chunk = self._probe(root, workers, fast_chunk)
+        self.workers = self._clamp_workers(workers)
+        self._chunk_idx = self._nearest_chunk(fast_chunk)
+        self._best = (self.workers, self._chunk_idx)
+        self._best_score: float | None = None
+        self._direction = {"workers": 1, "chunk": 1}
+        self._next_dim = "workers"
+        self._last_dim: str | None = None
+        self._window_start = time.perf_counter()
+        self._window_bytes = 0
+        self._window_files = 0
+
+    @property
+    def fast_chunk(self) -> int:
+        return self.CHUNK_SIZES[self._chunk_idx]
+
+    @property
+    def sha_chunk(self) -> int:
+        # keep the fast:sha ratio of the defaults (8 MB : 1 MB), within 256 KB .. 2 MB
+        return max(256 * 1024, min(2 * 1024 * 1024, self.fast_chunk // 8))
+
+    def _clamp_workers(self, workers: int) -> int:
+        return max(self.MIN_WORKERS, min(self.MAX_WORKERS, int(workers)))
+
+    def _nearest_chunk(self, chunk: int) -> int:
+        return min(range(len(self.CHUNK_SIZES)), key=lambda i: abs(self.CHUNK_SIZES[i] - chunk))
+
+    def _probe(self, root: Path, workers: int, fast_chunk: int) -> tuple[int, int]:
+        """Sample stat latency and read throughput under root."""
+        # (path, size) of sampled files; sizes come from the timed stat so nothing is stat'ed unguarded later
+        entries: list[tuple[str, int]] = []
+        stat_times: list[float] = []
+        pending = [str(root)]
+        while pending and len(entries) < self.PROBE_ENTRIES:
+            try:
+                with os.scandir(pending.pop()) as it:
+                    for entry in it:
+                        start = time.perf_counter()
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            size = None if is_dir else entry.stat().st_size
+                            is_file = not is_dir and entry.is_file(follow_symlinks=False)
+                        except OSError:
+                            # vanished or unreadable since the listing; the walk skips these too
+                            continue
+                        stat_times.append(time.perf_counter() - start)
+                        if is_dir:
+                            pending.append(entry.path)
+                        elif is_file:
+                            entries.append((entry.path, size))
+                        if len(entries) >= self.PROBE_ENTRIES:
+                            break
+            except OSError:
+                continue
+        if stat_times:
+            self.latency_ms = sorted(stat_times)[len(stat_times) // 2] * 1000
+            # Local flash answers stat() in microseconds; network mounts take milliseconds
+            # and need more requests in flight to hide that latency.
+            if self.latency_ms >= 1.0:
+                workers = max(workers, 16)
+            else:
+                workers = (os.cpu_count() or 4) * 2
+
+        largest = sorted(entries, key=lambda item: item[1], reverse=True)[:4]
+        budget = self.PROBE_READ_BYTES
+        best_rate = 0.0
+        for chunk in (1 << 20, 4 << 20, 8 << 20, 16 << 20):
+            for path, size in largest:
+                if size < chunk * 2 or budget <= 0:
+                    continue
+                start = time.perf_counter()
+                read = 0
+                try:
+                    with open(path, "rb") as stream:
+                        while read < chunk * 4 and (data := stream.read(chunk)):
+                            read += len(data)
+                except OSError:
+                    continue
+                budget -= read
+                rate = read / max(time.perf_counter() - start, 1e-9)
+                if rate > best_rate:
+                    best_rate, fast_chunk = rate, chunk
+                break
+        return workers, fast_chunk
+
+    def observe(self, metrics: ScanMetrics) -> bool:
+        """Feed the latest metrics; returns True when workers/chunk size changed."""
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        if elapsed < self.WINDOW_SECONDS:
+            return False
+        snap = metrics.snapshot()
+        total_bytes = snap["bytes_read"].get("hash", 0) + snap["bytes_read"].get("verify", 0)
+        total_files = snap["counters"].get("hash", 0) + snap["counters"].get("verify", 0)
+        window_bytes = total_bytes - self._window_bytes
+        window_files = total_files - self._window_files
+        self._window_start, self._window_bytes, self._window_files = now, total_bytes, total_files
+        if window_files == 0:
+            return False
+        avg_size = window_bytes / window_files
+        score = (window_bytes if avg_size >= 256 * 1024 else window_files) / elapsed
+
+        current = (self.workers, self._chunk_idx)
+        if current == self._best or self._best_score is None:
+            self._best, self._best_score = current, score
+        elif score > self._best_score * 1.03:
+            self._best, self._best_score = current, score
+        else:
+            # the last move did not help: go back and try the other way next time
+            if self._last_dim:
+                self._direction[self._last_dim] *= -1
+            self.workers, self._chunk_idx = self._best
+
+        # chunk size only matters when files are larger than a chunk
+        dim = self._next_dim if avg_size >= self.fast_chunk else "workers"
+        self._next_dim = "chunk" if dim == "workers" else "workers"
+        best_workers, best_chunk = self._best
+        if dim == "workers":
+            step = max(1, best_workers // 4) * self._direction["workers"]
+            self.workers = self._clamp_workers(best_workers + step)
+        else:
+            self._chunk_idx = max(0, min(len(self.CHUNK_SIZES) - 1, best_chunk + self._direction["chunk"]))
+        self._last_dim = dim
+        return (self.workers, self._chunk_idx) != current
+
+    def save(self) -> None:
+        workers, chunk_idx = self._best
+        profiles = self._load_profiles()
+        profiles[self.key] = {
+            "workers": workers,
+            "fast_chunk": self.CHUNK_SIZES[chunk_idx],
+            "score": self._best_score,
+            "latency_ms": self.latency_ms,
+            "updated_at": time.time(),
+        }
+        try:
+            self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+            self.profile_path.write_text(json.dumps(profiles, indent=2), encoding="utf-8")
+        except OSError:
+            pass
+
+    def _load_profiles(self) -> dict:
+        try:
+            return json.loads(self.profile_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+
+# FS_IOC_FIEMAP = _IOWR('f', 11, struct fiemap); maps logical file ranges to disk offsets.
+FS_IOC_FIEMAP = 0xC020660B
+_FIEMAP_HEADER = struct.Struct("=QQIIII")
+_FIEMAP_EXTENT_SIZE = 56
+
+
+def physical_offset(file_path: Path) -> int | None:
+    """Physical byte offset of the file's first extent (Linux FIEMAP), or None when unavailable."""
+    if fcntl is None:
+        return None
+    buf = bytearray(_FIEMAP_HEADER.pack(0, (1 << 64) - 1, 0, 0, 1, 0) + bytes(_FIEMAP_EXTENT_SIZE))
+    try:
+        with open(file_path, "rb") as stream:
+            fcntl.ioctl(stream.fileno(), FS_IOC_FIEMAP, buf)
+    except (OSError, ValueError):
+        return None
+    mapped = struct.unpack_from("=I", buf, 20)[0]
+    if not mapped:
+        return None
+    return struct.unpack_from("=Q", buf, _FIEMAP_HEADER.size + 8)[0]
+
+
+def _rotational(dev: int) -> bool | None:
+    """True for spinning disks, False for SSD/NVMe, None when unknown (non-Linux, network, virtual)."""
+    try:
+        base = Path(f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}")
+    except (AttributeError, ValueError):
+        return None
+    # partitions keep the queue attributes on their parent disk
+    for candidate in (base / "queue" / "rotational", base / ".." / "queue" / "rotational"):
+        try:
+            return candidate.read_text().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def device_concurrency(dev: int, default: int) -> int:
+    """Concurrent reads to allow on one st_dev: few for HDDs, moderate for network/virtual, default otherwise."""
+    rotational = _rotational(dev)
+    if rotational:
+        return DeviceScheduler.HDD_CONCURRENCY
+    major = getattr(os, "major", None)
+    if rotational is None and major is not None and major(dev) == 0:
+        # anonymous devices: NFS/SMB/FUSE mounts
+        return min(default, DeviceScheduler.NETWORK_CONCURRENCY)
+    return default
+
+
+class DeviceScheduler:
+    """
+    Dispatches I/O-bound tasks onto a shared executor, grouped by st_dev.
+
+    - each device has its own concurrency cap (device_concurrency), so an HDD
+      array gets one or two sequential readers while SSDs and other devices
+      keep the rest of the pool busy in parallel
+    - queued work per device is kept sorted by an order key (inode or physical
+      offset) and served elevator-style: the next task is the first key at or
+      after the last one dispatched, wrapping around at the end
+    - global_limit caps the total running tasks (auto-tune adjusts it)
+    submit() returns a Future that completes with the task's result.
+    """
+
+    HDD_CONCURRENCY = 2
+    NETWORK_CONCURRENCY = 8
+
+    def __init__(self, executor: ThreadPoolExecutor, global_limit: int, per_device_default: int | None = None):
+        self._executor = executor
+        self.global_limit = global_limit
+        self._per_device_default = per_device_default or global_limit
+        self._lock = threading.Lock()
+        self._queues: dict[int, list] = {}
+        self._cursor: dict[int, int] = {}
+        self._active: dict[int, int] = defaultdict(int)
+        self._active_total = 0
+        self._limits: dict[int, int] = {}
+        self._seq = itertools.count()
+
+    def submit(self, dev: int, order_key: int, fn, *args) -> Future:
+        outer: Future = Future()
+        with self._lock:
+            insort(self._queues.setdefault(dev, []), (order_key, next(self._seq), fn, args, outer))
+        self._dispatch()
+        return outer
+
+    def device_limit(self, dev: int) -> int:
+        limit = self._limits.get(dev)
+        if limit is None:
+            limit = self._limits[dev] = device_concurrency(dev, self._per_device_default)
+        return limit
+
+    def set_device_limit(self, dev: int, limit: int) -> None:
+        """Cap one device at limit (e.g. the workers tuned for its mount); HDD/network caps still apply."""
+        with self._lock:
+            self._limits[dev] = device_concurrency(dev, limit)
+        self._dispatch()
+
+    def prefers_physical_order(self, dev: int) -> bool:
+        """Physical offsets are worth an extra FIEMAP call only where seeks are expensive."""
+        return self.device_limit(dev) <= self.HDD_CONCURRENCY
+
+    def queued(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def cancel_pending(self) -> int:
+        """Drop every queued (not yet running) task; their futures end up cancelled."""
+        with self._lock:
+            dropped = [entry for queue in self._queues.values() for entry in queue]
+            for queue in self._queues.values():
+                queue.clear()
+        for _key, _seq, _fn, _args, outer in dropped:
+            outer.cancel()
+        return len(dropped)
+
+    def _dispatch(self) -> None:
+        launch = []
+        with self._lock:
+            progress = True
+            while progress and self._active_total < self.global_limit:
+                progress = False
+                for dev, queue in self._queues.items():
+                    if not queue or self._active[dev] >= self.device_limit(dev):
+                        continue
+                    if self._active_total >= self.global_limit:
+                        break
+                    pos = bisect_left(queue, (self._cursor.get(dev, 0),))
+                    if pos >= len(queue):
+                        pos = 0
+                    order_key, _seq, fn, args, outer = queue.pop(pos)
+                    self._cursor[dev] = order_key
+                    self._active[dev] += 1
+                    self._active_total += 1
+                    launch.append((dev, fn, args, outer))
+                    progress = True
+        skipped = False
+        for dev, fn, args, outer in launch:
+            # a caller that cancelled the future while it was queued gets nothing run
+            if not outer.set_running_or_notify_cancel():
+                self._release(dev)
+                skipped = True
+                continue
+            inner = self._executor.submit(fn, *args)
+            inner.add_done_callback(lambda done, dev=dev, outer=outer: self._finished(dev, done, outer))
+        if skipped:
+            self._dispatch()
+
+    def _release(self, dev: int) -> None:
+        with self._lock:
+            self._active[dev] -= 1
+            self._active_total -= 1
+
+    def _finished(self, dev: int, inner: Future, outer: Future) -> None:
+        self._release(dev)
+        try:
+            if inner.cancelled():
+                outer.set_exception(CancelledError())
+            elif inner.exception() is not None:
+                outer.set_exception(inner.exception())
+            else:
+                outer.set_result(inner.result())
+        except InvalidStateError:
+            pass
+        finally:
+            # the device's next queued task must start even if the outer future could not be completed
+            self._dispatch()
+
+
+def iter_file_entries(root: Path, scan_filter: "ScanFilter | None" = None):
+    """
+    Yield (path, st_dev, inode) for every file under root.
+    Like rglob, symlinked directories are not descended into. The inode comes
+    free with readdir and st_dev costs one stat per directory, which is what
+    lets the device scheduler group and order work before any file is opened.
+    With scan_filter, excluded directories are pruned without being listed.
+    """
+    try:
+        root_dev = os.stat(root).st_dev
+    except OSError:
+        return
+    stack = [(str(root), root_dev)]
+    while stack:
+        directory, dev = stack.pop()
+        files, subdirs = list_directory(directory, scan_filter)
+        for path, inode in files:
+            yield Path(path), dev, inode
+        stack.extend(reversed(subdirs))
+
+
+def list_directory(directory: str, scan_filter: "ScanFilter | None" = None) -> tuple[list[tuple[str, int]], list[tuple[str, int]]]:
+    """One scandir: (path, inode) of its files and (path, st_dev) of its real subdirectories, both filtered."""
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except OSError:
+        return [], []
+    files, subdirs = [], []
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if scan_filter is None or scan_filter.allow_dir(entry.path, entry.name):
+                    subdirs.append((entry.path, entry.stat(follow_symlinks=False).st_dev))
+            elif entry.is_file():
+                if scan_filter is None or scan_filter.allow_file(entry):
+                    files.append((entry.path, entry.inode()))
+        except OSError:
+            continue
+    return files, subdirs
+
+
+# Built-in rule sets; a saved set with the same name replaces the built-in one.
+BUILTIN_FILTER_SETS = {
+    "skip-junk": {
+        "exclude_dirs": [
+            ".git", ".hg", ".svn", "node_modules", "__pycache__", ".cache", ".venv", "venv", ".tox",
+            ".mypy_cache", ".pytest_cache", "$RECYCLE.BIN", "System Volume Information",
+        ],
+        "exclude": ["*.tmp", "*.swp", "~$*", "Thumbs.db", ".DS_Store", "desktop.ini"],
+        "min_size": 1,
+    },
+}
+
+
+def _compile_globs(patterns) -> tuple[re.Pattern | None, re.Pattern | None]:
+    """
+    Two alternations: globs without "/" against the entry name, globs with
+    "/" against the end of the path (anchored at a separator).
+    """
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    names = [fnmatch.translate(pattern) for pattern in patterns if "/" not in pattern]
+    paths = [
+        fnmatch.translate(pattern if pattern.startswith(("/", "*")) else f"*/{pattern}")
+        for pattern in patterns
+        if "/" in pattern
+    ]
+    return (
+        re.compile("|".join(names), flags) if names else None,
+        re.compile("|".join(paths), flags) if paths else None,
+    )
+
+
+def _compile_regexes(patterns) -> re.Pattern | None:
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns)) if patterns else None
+
+
+def _normalize_extension(extension: str) -> str:
+    extension = extension.strip().lower()
+    return extension if not extension or extension.startswith(".") else f".{extension}"
+
+
+@dataclass
+class ScanFilter:
+    """
+    Include/exclude rules applied while walking, so excluded entries are
+    never stat'ed, fingerprinted or hashed and excluded directories are never
+    entered. Globs without "/" match the entry name, globs with "/" the end of
+    its path ("/" separators on every platform); regexes are searched in the
+    whole path. A file is kept when it passes every rule that is set. Skipped
+    entries are counted in skipped_files/skipped_dirs.
+    """
+
+    include: list[str] = field(default_factory=list)
+    exclude: list[str] = field(default_factory=list)
+    exclude_dirs: list[str] = field(default_factory=list)
+    include_regex: list[str] = field(default_factory=list)
+    exclude_regex: list[str] = field(default_factory=list)
+    extensions: list[str] = field(default_factory=list)
+    exclude_extensions: list[str] = field(default_factory=list)
+    min_size: int = 0
+    max_size: int | None = None
+
+    def __post_init__(self) -> None:
+        # raises re.error for a bad regex, before any scanning starts
+        self._include = _compile_globs(self.include)
+        self._exclude = _compile_globs(self.exclude)
+        self._exclude_dirs = _compile_globs(self.exclude_dirs)
+        self._include_regex = _compile_regexes(self.include_regex)
+        self._exclude_regex = _compile_regexes(self.exclude_regex)
+        self._extensions = frozenset(_normalize_extension(ext) for ext in self.extensions)
+        self._exclude_extensions = frozenset(_normalize_extension(ext) for ext in self.exclude_extensions)
+        self._lock = threading.Lock()
+        self.skipped_files = 0
+        self.skipped_dirs = 0
+
+    @classmethod
+    def from_dict(cls, rules: dict) -> "ScanFilter":
+        return cls(**{key: value for key, value in rules.items() if key in cls.__dataclass_fields__})
+
+    def to_dict(self) -> dict:
+        return {key: value for key, value in asdict(self).items() if value not in ([], None, 0)}
+
+    def is_empty(self) -> bool:
+        return not self.to_dict()
+
+    def allow_dir(self, path: str, name: str) -> bool:
+        if self._dir_ok(path, name):
+            return True
+        with self._lock:
+            self.skipped_dirs += 1
+        return False
+
+    def allow_file(self, entry: os.DirEntry) -> bool:
+        if self._file_ok(entry.path, entry.name, lambda: entry.stat().st_size):
+            return True
+        with self._lock:
+            self.skipped_files += 1
+        return False
+
+    def allows_path(self, path: str, root: Path) -> bool:
+        """Whether the walk from root would have yielded path (not counted); used for watch events."""
+        try:
+            relative = Path(path).relative_to(root)
+        except ValueError:
+            return False
+        directory = root
+        for part in relative.parts[:-1]:
+            directory = directory / part
+            if not self._dir_ok(str(directory), part):
+                return False
+        return self._file_ok(path, relative.name, lambda: os.stat(path).st_size)
+
+    @staticmethod
+    def _glob_match(globs, path: str, name: str) -> bool:
+        by_name, by_path = globs
+        return bool(
+            (by_name is not None and by_name.match(name))
+            or (by_path is not None and by_path.match(path.replace(os.sep, "/")))
+        )
+
+    def _dir_ok(self, path: str, name: str) -> bool:
+        return not self._glob_match(self._exclude_dirs, path, name)
+
+    def _file_ok(self, path: str, name: str, size_of) -> bool:
+        extension = os.path.splitext(name)[1].lower()
+        if self._extensions and extension not in self._extensions:
+            return False
+        if extension in self._exclude_extensions:
+            return False
+        if (self.include and not self._glob_match(self._include, path, name)) or self._glob_match(self._exclude, path, name):
+            return False
+        if self._include_regex is not None and not self._include_regex.search(path):
+            return False
+        if self._exclude_regex is not None and self._exclude_regex.search(path):
+            return False
+        if self.min_size or self.max_size is not None:
+            # the only rule that needs a stat, so it goes last
+            size = size_of()
+            if size < self.min_size or (self.max_size is not None and size > self.max_size):
+                return False
+        return True
+
+
+def default_filter_sets_path() -> Path:
+    return Path.home() / ".duperanger" / "filters.json"
+
+
+def load_filter_sets(path: Path | None = None) -> dict[str, dict]:
+    """Built-in and saved rule sets by name (saved ones win)."""
+    sets = {name: dict(rules) for name, rules in BUILTIN_FILTER_SETS.items()}
+    try:
+        sets.update(json.loads((path or default_filter_sets_path()).read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        pass
+    return sets
+
+
+def save_filter_set(name: str, scan_filter: ScanFilter, path: Path | None = None) -> None:
+    path = path or default_filter_sets_path()
+    try:
+        saved = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        saved = {}
+    saved[name] = scan_filter.to_dict()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(saved, indent=2, sort_keys=True), encoding="utf-8")
+
+
+# Hamming distance (of 64 bits) at which two perceptual hashes count as the same picture.
+PERCEPTUAL_THRESHOLD = 10
+IMAGE_EXTENSIONS = frozenset({
+    ".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp", ".heic", ".heif",
+})
+_DCT_SIZE = 32
+_DCT_MATRIX = None
+
+
+def is_image_record(record: FileRecord) -> bool:
+    if record.mime:
+        return record.mime.startswith("image/")
+    return record.extension in IMAGE_EXTENSIONS
+
+
+def _load_gray(file_path: Path, size: tuple[int, int]):
+    with Image.open(file_path) as img:
+        # JPEG decodes straight to a reduced scale, skipping most of the IDCT work
+        img.draft("L", (size[0] * 4, size[1] * 4))
+        img = ImageOps.exif_transpose(img)
+        resample = getattr(Image, "Resampling", Image).LANCZOS
+        return img.convert("L").resize(size, resample)
+
+
+def dhash(file_path: Path) -> int:
+    """64-bit difference hash: does each pixel of a 9x8 thumbnail get brighter to the right?"""
+    pixels = list(_load_gray(file_path, (9, 8)).getdata())
+    value = 0
+    for row in range(8):
+        offset = row * 9
+        for col in range(8):
+            value = (value << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return value
+
+
+def phash(file_path: Path) -> int:
+    """64-bit DCT hash: low-frequency 8x8 coefficients of a 32x32 thumbnail against their median."""
+    global _DCT_MATRIX
+    if _DCT_MATRIX is None:
+        k = np.arange(_DCT_SIZE)[:, None]
+        i = np.arange(_DCT_SIZE)[None, :]
+        matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * _DCT_SIZE)) * np.sqrt(2 / _DCT_SIZE)
+        matrix[0] /= np.sqrt(2)
+        _DCT_MATRIX = matrix
+    pixels = np.asarray(_load_gray(file_path, (_DCT_SIZE, _DCT_SIZE)), dtype=np.float64)
+    low = (_DCT_MATRIX @ pixels @ _DCT_MATRIX.T)[:8, :8].ravel()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def perceptual_hash(file_path: Path) -> int:
+    """pHash when NumPy is available, dHash otherwise. Requires Pillow."""
+    if Image is None:
+        raise RuntimeError("Pillow not available")
+    return phash(file_path) if np is not None else dhash(file_path)
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes with Hamming distance. A radius
+    query only descends into children whose edge distance is within radius
+    of the query's distance to the node, so lookups touch a small part of
+    the tree instead of every stored hash.
+    """
+
+    def __init__(self) -> None:
+        # node: (hash, items, {distance: child})
+        self._root: tuple[int, list, dict] | None = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item) -> None:
+        self._size += 1
+        if self._root is None:
+            self._root = (value, [item], {})
+            return
+        node = self._root
+        while True:
+            distance = (value ^ node[0]).bit_count()
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> list[tuple[int, object]]:
+        """Return (distance, item) for every stored hash within radius of value."""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_value, items, children = stack.pop()
+            distance = (value ^ node_value).bit_count()
+            if distance <= radius:
+                found.extend((distance, item) for item in items)
+            for edge, child in children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+def group_near_duplicates(hashes, threshold: int = PERCEPTUAL_THRESHOLD) -> list[list]:
+    """
+    Cluster (item, hash) pairs whose hashes are within threshold bits of each
+    other (transitively). Each hash is queried against the tree before being
+    added, so every close pair is found exactly once.
+    """
+    tree = BKTree()
+    parent: dict = {}
+
+    def find(item):
+        while parent[item] is not item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for item, value in hashes:
+        parent[item] = item
+        for _distance, other in tree.search(value, threshold):
+            a, b = find(item), find(other)
+            if a is not b:
+                parent[a] = b
+        tree.add(value, item)
+    clusters: dict = defaultdict(list)
+    for item in parent:
+        clusters[find(item)].append(item)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+# Verification digests. hash_value is stored as "<algorithm>:<hex>".
+DIGEST_ALGORITHMS = ("sha256", "blake3", "xxh3_128")
+DEFAULT_DIGEST = "sha256"
+# Digests "auto" may pick: verification drives delete/link/organize, so never a non-cryptographic one
+CRYPTOGRAPHIC_DIGESTS = ("sha256", "blake3")
+# BLAKE3 spreads a single file over several threads from this size up
+BLAKE3_THREADED_SIZE = 16 * 1024 * 1024
+_fastest_digest: str | None = None
+
+
+def available_digests() -> list[str]:
+    available = ["sha256"]
+    if blake3 is not None:
+        available.append("blake3")
+    if xxhash is not None and hasattr(xxhash, "xxh3_128"):
+        available.append("xxh3_128")
+    return available
+
+
+def new_digest(algorithm: str, size: int = 0):
+    """Fresh hasher for algorithm; size (when known) enables multi-threaded BLAKE3 for big files."""
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "blake3" and blake3 is not None:
+        return blake3.blake3(max_threads=blake3.blake3.AUTO if size >= BLAKE3_THREADED_SIZE else 1)
+    if algorithm == "xxh3_128" and xxhash is not None:
+        return xxhash.xxh3_128()
+    raise ValueError(f"Digest not available: {algorithm}")
+
+
+def format_digest(algorithm: str, hasher) -> str:
+    return f"{algorithm}:{hasher.hexdigest()}"
+
+
+def digest_algorithm(hash_value: str) -> str:
+    """Algorithm of a stored hash_value; values without a prefix predate it and are SHA-256."""
+    algorithm, separator, _hex = hash_value.partition(":")
+    return algorithm if separator else "sha256"
+
+
+def normalize_digest(hash_value: str) -> str:
+    return hash_value if ":" in hash_value else f"sha256:{hash_value}"
+
+
+def benchmark_digests(sample_size: int = 8 * 1024 * 1024, rounds: int = 2, algorithms=None) -> dict[str, float]:
+    """MB/s of each available digest (or of algorithms) over an in-memory buffer fed in 1 MB reads."""
+    data = memoryview(os.urandom(sample_size))
+    speeds = {}
+    for algorithm in algorithms or available_digests():
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            hasher = new_digest(algorithm, sample_size)
+            for offset in range(0, sample_size, 1024 * 1024):
+                hasher.update(data[offset:offset + 1024 * 1024])
+            hasher.hexdigest()
+            best = min(best, time.perf_counter() - start)
+        speeds[algorithm] = sample_size / (1024 * 1024) / max(best, 1e-9)
+    return speeds
+
+
+def fastest_digest() -> str:
+    """Fastest available cryptographic digest, measured once per process."""
+    global _fastest_digest
+    if _fastest_digest is None:
+        speeds = benchmark_digests(algorithms=[name for name in available_digests() if name in CRYPTOGRAPHIC_DIGESTS])
+        _fastest_digest = max(speeds, key=speeds.get)
+    return _fastest_digest
+
+
+def resolve_digest(name: str, verify: bool = True) -> str:
+    """
+    Map "auto" to the fastest cryptographic digest and check that a named
+    digest is installed. Without verification nothing is hashed, so "auto"
+    becomes DEFAULT_DIGEST without running the benchmark.
+    """
+    if name == "auto":
+        return fastest_digest() if verify else DEFAULT_DIGEST
+    if name not in available_digests():
+        raise ValueError(f"Digest not available: {name} (installed: {', '.join(available_digests())})")
+    return name
+
+
+# Files at least this big are hashed as a tree of fixed segments read in parallel.
+# The segment size is part of the digest; changing it changes every tree hash.
+TREE_HASH_THRESHOLD = 1024 * 1024 * 1024
+TREE_SEGMENT_SIZE = 64 * 1024 * 1024
+_TREE_HEADER = struct.Struct("<QQ")  # segment size, file size
+
+
+def tree_digest_name(algorithm: str) -> str:
+    """Algorithm label of a tree hash whose segments use algorithm, e.g. "tree-sha256"."""
+    return f"tree-{algorithm}"
+
+
+def _new_segment_hasher(algorithm: str):
+    # segments already run in parallel, so BLAKE3 stays single-threaded here
+    return xxhash.xxh64() if algorithm == "xxh64" else new_digest(algorithm)
+
+
+# Sparse files (fewer allocated blocks than their size) of at least this size are read
+# extent by extent: holes are fed to the digests as zeros instead of being read.
+SPARSE_MIN_SIZE = 1024 * 1024
+_ZEROS = memoryview(bytes(4 * 1024 * 1024))
+
+
+def data_extents(fd: int, start: int, end: int) -> list[tuple[int, int]]:
+    """
+    Allocated (start, end) ranges of fd within [start, end) via SEEK_DATA/SEEK_HOLE;
+    [] means only holes. Without SEEK_DATA support the whole range counts as data.
+    """
+    if not hasattr(os, "SEEK_DATA"):
+        return [(start, end)]
+    extents = []
+    offset = start
+    while offset < end:
+        try:
+            data = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as exc:
+            if exc.errno == errno.ENXIO:
+                # no data after offset: the rest is a hole
+                break
+            return [(start, end)]
+        if data >= end:
+            break
+        hole = min(os.lseek(fd, data, os.SEEK_HOLE), end)
+        extents.append((data, hole))
+        offset = hole
+    return extents
+
+
+def sparse_extents(fd: int) -> tuple[int, list[tuple[int, int]]] | None:
+    """(size, data extents) when fd is a sparse regular file worth reading extent-wise, else None."""
+    if not hasattr(os, "SEEK_DATA") or not hasattr(os, "pread"):
+        return None
+    stat = os.fstat(fd)
+    if stat.st_size < SPARSE_MIN_SIZE or getattr(stat, "st_blocks", None) is None or stat.st_blocks * 512 >= stat.st_size:
+        return None
+    return stat.st_size, data_extents(fd, 0, stat.st_size)
+
+
+@functools.lru_cache(maxsize=64)
+def zero_digest(algorithm: str, length: int) -> bytes:
+    """Raw digest of length zero bytes ("xxh64" or a verification digest); computed once per length."""
+    hasher = _new_segment_hasher(algorithm)
+    _feed_zeros((hasher,), length)
+    return hasher.digest()
+
+
+def _feed_zeros(hashers, length: int, stop_event=None, file_path: Path | None = None) -> None:
+    while length > 0:
+        if stop_event is not None and stop_event.is_set():
+            raise ScanCancelled(file_path)
+        chunk = _ZEROS[:min(length, len(_ZEROS))]
+        for hasher in hashers:
+            hasher.update(chunk)
+        length -= len(chunk)
+
+
+def _feed_range(fd: int, start: int, end: int, extents, hashers, chunk_size: int, stop_event, file_path: Path) -> None:
+    """Feed [start, end) of fd to hashers: extents are read with os.pread, the gaps between them are zeros."""
+    position = start
+    for data_start, data_end in extents:
+        _feed_zeros(hashers, data_start - position, stop_event, file_path)
+        offset = data_start
+        while offset < data_end:
+            if stop_event is not None and stop_event.is_set():
+                raise ScanCancelled(file_path)
+            chunk = os.pread(fd, min(chunk_size, data_end - offset), offset)
+            if not chunk:
+                raise OSError(f"File shrank while hashing: {file_path}")
+            for hasher in hashers:
+                hasher.update(chunk)
+            offset += len(chunk)
+        position = data_end
+    _feed_zeros(hashers, end - position, stop_event, file_path)
+
+
+def hash_sparse(fd: int, sparse, algorithms, chunk_size: int, stop_event, file_path: Path) -> list[bytes]:
+    """
+    Raw digests of a sparse file, identical to reading it in full: only data
+    extents are read and holes hash as zeros. A file that is all hole takes
+    the cached zero digest without reading or hashing anything.
+    """
+    size, extents = sparse
+    if not extents:
+        return [zero_digest(algorithm, size) for algorithm in algorithms]
+    hashers = [_new_segment_hasher(algorithm) for algorithm in algorithms]
+    _feed_range(fd, 0, size, extents, hashers, chunk_size, stop_event, file_path)
+    return [hasher.digest() for hasher in hashers]
+
+
+def _hash_segment(
+    fd: int, offset: int, length: int, algorithms, chunk_size: int, stop_event, file_path: Path, sparse: bool = False
+) -> list[bytes]:
+    end = offset + length
+    extents = data_extents(fd, offset, end) if sparse else [(offset, end)]
+    if not extents:
+        # a segment inside a hole: cached digest, no read and no hashing
+        return [zero_digest(algorithm, length) for algorithm in algorithms]
+    hashers = [_new_segment_hasher(algorithm) for algorithm in algorithms]
+    _feed_range(fd, offset, end, extents, hashers, chunk_size, stop_event, file_path)
+    return [hasher.digest() for hasher in hashers]
+
+
+def tree_hash_file(
+    file_path: Path,
+    size: int,
+    executor,
+    algorithms,
+    chunk_size: int = 1_048_576,
+    stop_event: threading.Event | None = None,
+    segment_size: int = TREE_SEGMENT_SIZE,
+) -> list:
+    """
+    Hash file_path as a one-level tree: every segment_size segment is hashed
+    on executor (os.pread, so segments read concurrently from one
+    descriptor), then the segment digests are hashed in file order behind a
+    header holding the segment and file size. Returns one root per entry in
+    algorithms: an int for "xxh64", "tree-<algorithm>:<hex>" otherwise.
+    The roots depend only on the content and segment_size. In sparse files,
+    segments that are all hole are neither read nor hashed.
+    """
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        sparse = sparse_extents(fd) is not None
+        futures = [
+            executor.submit(
+                _hash_segment, fd, offset, min(segment_size, size - offset), algorithms, chunk_size, stop_event, file_path, sparse
+            )
+            for offset in range(0, size, segment_size)
+        ]
+        # every segment must be done with fd before it is closed, even if one failed
+        wait(futures)
+        segments = [future.result() for future in futures]
+    finally:
+        os.close(fd)
+    header = _TREE_HEADER.pack(segment_size, size)
+    roots = []
+    for position, algorithm in enumerate(algorithms):
+        top = _new_segment_hasher(algorithm)
+        top.update(header)
+        for digests in segments:
+            top.update(digests[position])
+        roots.append(top.intdigest() if algorithm == "xxh64" else format_digest(tree_digest_name(algorithm), top))
+    return roots
+
+
+# Candidate grouping switches to sorted on-disk runs above this many files.
+EXTERNAL_SORT_THRESHOLD = 5_000_000
+EXTERNAL_SORT_RUN_ENTRIES = 500_000
+# Big-endian so the packed bytes sort in (size, fast_hash, index) order
+_GROUP_KEY = struct.Struct(">QQQ")
+
+
+def iter_candidate_groups(keys):
+    """Yield index lists sharing (size, fast_hash), for groups of two or more, grouped in a dict."""
+    groups: dict[tuple[int, int | None], list[int]] = {}
+    for idx, size, fast_hash in keys:
+        groups.setdefault((size, fast_hash), []).append(idx)
+    for members in groups.values():
+        if len(members) > 1:
+            yield members
+
+
+def _iter_run(stream, block_entries: int = 8192, entry_size: int = _GROUP_KEY.size):
+    while block := stream.read(entry_size * block_entries):
+        for offset in range(0, len(block), entry_size):
+            yield block[offset:offset + entry_size]
+
+
+def iter_candidate_groups_external(keys, run_entries: int = EXTERNAL_SORT_RUN_ENTRIES, tmp_dir: str | None = None):
+    """
+    Same groups as iter_candidate_groups with bounded memory: packed
+    (size, fast_hash, index) keys are sorted in runs of run_entries, spilled
+    to temporary files and k-way merged. Only one run plus a read block per
+    run is held in memory, however many files there are.
+    """
+    with tempfile.TemporaryDirectory(prefix="duperanger-groups-", dir=tmp_dir) as tmp:
+        runs: list[str] = []
+        buffer: list[bytes] = []
+        for idx, size, fast_hash in keys:
+            # a missing fingerprint sorts as 0; SHA-256 verification decides anyway
+            buffer.append(_GROUP_KEY.pack(size, fast_hash or 0, idx))
+            if len(buffer) >= run_entries:
+                buffer.sort()
+                runs.append(os.path.join(tmp, f"run{len(runs):05d}"))
+                with open(runs[-1], "wb") as stream:
+                    stream.write(b"".join(buffer))
+                buffer.clear()
+        buffer.sort()
+        streams = [open(path, "rb") for path in runs]
+        try:
+            current = None
+            members: list[int] = []
+            for entry in heapq.merge(iter(buffer), *(_iter_run(stream) for stream in streams)):
+                key = entry[:16]
+                if key != current:
+                    if len(members) > 1:
+                        yield members
+                    current = key
+                    members = []
+                members.append(_GROUP_KEY.unpack(entry)[2])
+            if len(members) > 1:
+                yield members
+        finally:
+            for stream in streams:
+                stream.close()
+
+
+def _merkle_digests(files: RecordStore, roots) -> tuple[dict, dict, dict]:
+    """
+    Bottom-up Merkle digest of every directory holding scanned files, from
+    the names and verification digests of its files and the names and
+    digests of its subdirectories. A directory with an unhashed file (unique
+    content) gets None, and so does every directory above it. Returns
+    (digests, totals as [size, files], children) keyed by directory string;
+    children maps a directory to its subdirectories and, under "", its files.
+    """
+    stop_at = {str(root) for root in roots}
+    children: dict[str, dict[str, list]] = defaultdict(lambda: {"": [], "dirs": []})
+    totals: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    digests: dict[str, str | None] = {}
+    for parent, name, size, hash_value in files.iter_dir_entries():
+        children[parent][""].append((name, hash_value))
+        totals[parent][0] += size
+        totals[parent][1] += 1
+    # link each directory to its parent, up to the scan root; every directory is linked once
+    seen = set(children)
+    by_depth: dict[int, list[str]] = defaultdict(list)
+    for directory in list(children):
+        current = directory
+        while current not in stop_at:
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            children[parent]["dirs"].append(current)
+            if parent in seen:
+                break
+            seen.add(parent)
+            current = parent
+    for directory in seen:
+        by_depth[directory.count(os.sep)].append(directory)
+    # deepest first, so subdirectory digests exist before their parent's
+    for depth in sorted(by_depth, reverse=True):
+        for directory in by_depth[depth]:
+            entries = children[directory]
+            hasher = hashlib.sha256()
+            complete = True
+            for name, hash_value in sorted(entries[""]):
+                if hash_value is None:
+                    complete = False
+                    break
+                hasher.update(f"f\0{name}\0{hash_value}\n".encode("utf-8", "surrogateescape"))
+            for subdirectory in sorted(entries["dirs"]) if complete else ():
+                sub_digest = digests[subdirectory]
+                if sub_digest is None:
+                    complete = False
+                    break
+                hasher.update(f"d\0{os.path.basename(subdirectory)}\0{sub_digest}\n".encode("utf-8", "surrogateescape"))
+                totals[directory][0] += totals[subdirectory][0]
+                totals[directory][1] += totals[subdirectory][1]
+            digests[directory] = f"sha256:{hasher.hexdigest()}" if complete else None
+    return digests, totals, children
+
+
+def find_duplicate_directories(results: ScanResults) -> dict[str, DuplicateDirectory]:
+    """
+    Group directories whose subtrees are identical, in one pass over the
+    scan's existing verification digests (no file is read). Only the
+    outermost matches are reported: a match is dropped when all of its
+    directories sit inside directories that match too. Empty trees are
+    ignored.
+    """
+    digests, totals, children = _merkle_digests(results.files, results.roots or [results.root])
+    by_digest: dict[str, list[str]] = defaultdict(list)
+    for directory, digest in digests.items():
+        if digest is not None and totals[directory][0] > 0:
+            by_digest[digest].append(directory)
+    shared = {digest for digest, directories in by_digest.items() if len(directories) > 1}
+    found: dict[str, DuplicateDirectory] = {}
+    for digest in shared:
+        directories = sorted(by_digest[digest])
+        if all(digests.get(os.path.dirname(directory)) in shared for directory in directories):
+            continue
+        covered: set[str] = set()
+        pending = [directories[0]]
+        while pending:
+            directory = pending.pop()
+            covered.update(hash_value for _name, hash_value in children[directory][""])
+            pending.extend(children[directory]["dirs"])
+        size, file_count = totals[directories[0]]
+        found[digest] = DuplicateDirectory(
+            digest=digest,
+            directories=[Path(directory) for directory in directories],
+            size=size,
+            file_count=file_count,
+            groups=sorted(covered.intersection(results.duplicates)),
+        )
+    return found
+
+
+class ScanCancelled(Exception):
+    """Raised inside a hashing loop once the scan's stop event is set."""
+
+
+def default_checkpoint_path() -> Path:
+    return Path.home() / ".duperanger" / "checkpoint.ndjson.gz"
+
+
+class ScanCheckpoint:
+    """
+    Saved state of a paused scan: the roots plus every finished record (fast
+    fingerprint, category, SHA-256 when verified) with the size and mtime it
+    was read at. Workers finish files out of order, so there is no single
+    walk position to store. Resuming replays the directory walk instead,
+    which only lists directories, and take() hands back each saved record
+    whose file is unchanged, so no unchanged file is read twice.
+    """
+
+    VERSION = 1
+
+    def __init__(self, roots: list[str], entries: dict[str, tuple]):
+        self.roots = roots
+        self._entries = entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def save(cls, path: Path, roots: list[Path], files: RecordStore) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as stream:
+            stream.write(json.dumps({"version": cls.VERSION, "roots": [str(root) for root in roots], "saved_at": time.time()}) + "\n")
+            for record in files:
+                if record.mtime_ns is None:
+                    continue
+                stream.write(json.dumps([
+                    str(record.path), record.size, record.mtime_ns, record.extension,
+                    record.mime, record.fast_hash, record.hash_value, record.category,
+                ]) + "\n")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ScanCheckpoint | None":
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as stream:
+                header = json.loads(stream.readline())
+                if header.get("version") != cls.VERSION:
+                    return None
+                entries = {}
+                for line in stream:
+                    row = json.loads(line)
+                    entries[row[0]] = tuple(row[1:])
+        except (OSError, EOFError, ValueError):
+            return None
+        return cls(header["roots"], entries)
+
+    def matches(self, roots: list[Path]) -> bool:
+        return self.roots == [str(root) for root in roots]
+
+    def take(self, file_path: Path, stat: os.stat_result) -> FileRecord | None:
+        """Return (once) the saved record for file_path if size and mtime are unchanged."""
+        entry = self._entries.pop(str(file_path), None)
+        if entry is None:
+            return None
+        size, mtime_ns, extension, mime, fast_hash, hash_value, category = entry
+        if size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+            return None
+        return FileRecord(
+            path=file_path,
+            size=size,
+            extension=extension,
+            mime=mime,
+            hash_value=hash_value,
+            fast_hash=fast_hash,
+            category=category,
+            device=stat.st_dev,
+            inode=stat.st_ino,
+            mtime_ns=mtime_ns,
+        )
+
+
+# Files smaller than this are read whole in one call; fingerprint and digest come from the
+# same bytes and empty files need no I/O. The threaded engine hands them to workers in batches.
+SMALL_FILE_THRESHOLD = 16 * 1024
+SMALL_FILE_BATCH = 32
+
+# Async engine: directory listings and file operations kept in flight at once
+ASYNC_METADATA_DEPTH = 256
+ASYNC_READ_DEPTH = 256
+SCAN_ENGINES = ("threads", "async")
+
+
+class AsyncScanEngine:
+    """
+    Phases 1 and 2 of a FileScanner on an asyncio loop, for high-latency
+    mounts (SMB/NFS) where each stat/open waits milliseconds and a few dozen
+    threads leave the link idle. Directories are listed concurrently instead
+    of depth-first, and every blocking call is offloaded to one large thread
+    pool behind two BoundedSemaphores: one for directory listings, one for
+    file stat/fingerprint/hash work. Records are folded into the results on
+    the loop thread through the scanner's own helpers, so the output is the
+    same as the threaded engine's.
+    """
+
+    def __init__(self, scanner: "FileScanner", metadata_depth: int = ASYNC_METADATA_DEPTH, read_depth: int = ASYNC_READ_DEPTH):
+        self.scanner = scanner
+        self.metadata_depth = metadata_depth
+        self.read_depth = read_depth
+        self._tasks: set[asyncio.Task] = set()
+        self._files: set[asyncio.Task] = set()
+
+    def scan(self, results: "ScanResults", by_extension, duplicates, by_category) -> None:
+        asyncio.run(self._run(self._scan(results, by_extension, duplicates, by_category)))
+
+    def verify(self, results: "ScanResults", duplicates, candidates) -> None:
+        asyncio.run(self._run(self._verify(results, duplicates, candidates)))
+
+    async def _run(self, body) -> None:
+        self._metadata = asyncio.BoundedSemaphore(self.metadata_depth)
+        self._reads = asyncio.BoundedSemaphore(self.read_depth)
+        self._tasks, self._files = set(), set()
+        with ThreadPoolExecutor(max_workers=self.metadata_depth + self.read_depth, thread_name_prefix="async-io") as pool:
+            self._pool = pool
+            try:
+                await body
+                await self._drain()
+            finally:
+                # only queued work is cancelled; running calls notice stop_event between chunks
+                for task in self._tasks:
+                    task.cancel()
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _offload(self, semaphore: asyncio.BoundedSemaphore, func, *args):
+        async with semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+
+    def _spawn(self, coro, per_file: bool = False) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if per_file:
+            self._files.add(task)
+            task.add_done_callback(self._files.discard)
+
+    async def _throttle(self) -> None:
+        # Bound queued per-file coroutines too, not just running calls, so huge trees stay
+        # within memory. Only file tasks are waited on: they never wait for anything else
+        while len(self._files) >= self.read_depth * 4 and not self.scanner.stop_event.is_set():
+            await asyncio.wait(self._files, return_when=asyncio.FIRST_COMPLETED)
+
+    async def _drain(self) -> None:
+        while self._tasks and not self.scanner.stop_event.is_set():
+            await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+
+    async def _scan(self, results, by_extension, duplicates, by_category) -> None:
+        aggregate = (results, by_extension, duplicates, by_category)
+        for root in self.scanner.roots:
+            try:
+                root_dev = (await self._offload(self._metadata, os.stat, root)).st_dev
+            except OSError:
+                continue
+            self._spawn(self._walk(str(root), root_dev, root, aggregate))
+
+    async def _walk(self, directory: str, dev: int, root: Path, aggregate) -> None:
+        if self.scanner.stop_event.is_set():
+            return
+        start = time.perf_counter()
+        files, subdirs = await self._offload(self._metadata, list_directory, directory, self.scanner.scan_filter)
+        self.scanner.metrics.add_stage("walk", time.perf_counter() - start, count=len(files))
+        for subdir, sub_dev in subdirs:
+            self._spawn(self._walk(subdir, sub_dev, root, aggregate))
+        for path, _inode in files:
+            await self._throttle()
+            if self.scanner.stop_event.is_set():
+                return
+            self._spawn(self._inspect(Path(path), root, aggregate), per_file=True)
+
+    async def _inspect(self, file_path: Path, root: Path, aggregate) -> None:
+        try:
+            record = await self._offload(self._reads, self.scanner._process_file, file_path, root)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.scanner.queue.put({"type": "error", "message": str(exc)})
+            return
+        if record is not None and not self.scanner.stop_event.is_set():
+            self.scanner._add_record(record, *aggregate)
+        self.scanner._emit_metrics(pending=len(self._tasks))
+
+    async def _verify(self, results, duplicates, candidates) -> None:
+        for group in candidates:
+            for idx in group:
+                if self.scanner.stop_event.is_set():
+                    return
+                rec = results.files[idx]
+                if rec.hash_value:
+                    self.scanner.metrics.add_saved(rec.size)
+                    continue
+                await self._throttle()
+                self._spawn(self._hash(idx, rec, results, duplicates), per_file=True)
+
+    async def _hash(self, idx: int, rec: "FileRecord", results, duplicates) -> None:
+        try:
+            digest = await self._offload(self._reads, self.scanner._timed_hash_file, rec.path, rec.size)
+        except Exception:  # pylint: disable=broad-except
+            return
+        self.scanner._set_hash(idx, rec, digest, results, duplicates)
+        self.scanner._emit_metrics(pending=len(self._tasks))
+
+
 class FileScanner(threading.Thread):
+    SIZE_BITMAP_BYTES = 1 << 21  # 16M bits, 2 MB whatever the file count
     def __init__(
         self,
-        root_path: Path,
+        root_path: Path | list[Path],
         compute_hashes: bool,
         queue: Queue,
         stop_event: threading.Event,
@@ -223,9 +2112,27 @@ class FileScanner(threading.Thread):
         fast_chunk: int,
         sha_chunk: int,
         classifier: FileClassifier | None,
+        scan_db: Path | None = None,
+        overwrite_db: bool = False,
+        auto_tune: bool = False,
+        io_scheduler: bool = False,
+        perceptual: bool = False,
+        perceptual_threshold: int = PERCEPTUAL_THRESHOLD,
+        checkpoint: Path | None = None,
+        pause_event: threading.Event | None = None,
+        resume: ScanCheckpoint | None = None,
+        external_sort: bool = False,
+        digest: str = DEFAULT_DIGEST,
+        tree_threshold: int | None = TREE_HASH_THRESHOLD,
+        engine: str = "threads",
+        io_depth: int = ASYNC_READ_DEPTH,
+        scan_filter: ScanFilter | None = None,
+        small_file_threshold: int = SMALL_FILE_THRESHOLD,
     ):
         super().__init__(daemon=True)
-        self.root_path = root_path
+        # one or several roots; they share one size/hash index so duplicates can span roots
+        self.roots = self._normalize_roots(root_path)
+        self.root_path = self.roots[0]
         self.compute_hashes = compute_hashes
         self.queue = queue
         self.stop_event = stop_event
@@ -234,74 +2141,105 @@ class FileScanner(threading.Thread):
         self.fast_chunk = fast_chunk
         self.sha_chunk = sha_chunk
         self.classifier = classifier
+        # optional SQLite/Parquet output, written in batches while scanning
+        self.scan_db = scan_db
+        self.overwrite_db = overwrite_db
+        self._sink = None
+        # when enabled, workers/chunk sizes follow AutoTuner instead of the fixed values above;
+        # roots on different mounts get one tuner each, and tuner is the first root's
+        self.auto_tune = auto_tune
+        self.tuner: AutoTuner | None = None
+        self.tuners: list[AutoTuner] = []
+        # (root prefix, st_dev, tuner) per root, to pick the chunk sizes and device cap of a file's mount
+        self._root_tuners: list[tuple[str, int | None, AutoTuner]] = []
+        # per-device I/O scheduling (DeviceScheduler) under both hashing phases
+        self.io_scheduler = io_scheduler
+        self._scheduler: DeviceScheduler | None = None
+        # near-duplicate image grouping by perceptual hash (needs Pillow)
+        self.perceptual = perceptual
+        self.perceptual_threshold = perceptual_threshold
+        # pause = stop_event with pause_event also set: finished records are saved to checkpoint
+        self.checkpoint = checkpoint
+        self.pause_event = pause_event
+        # records from a paused run; unchanged files are taken from here instead of being read
+        self._resume = resume
+        # spill candidate grouping to sorted temp runs (always on for very large scans)
+        self.external_sort = external_sort
+        # verification digest for hash_value ("auto" picks the fastest cryptographic one)
+        self.digest = resolve_digest(digest, compute_hashes)
+        # files at least this big are hashed as parallel segments (None disables; needs os.pread)
+        self.tree_threshold = tree_threshold if hasattr(os, "pread") else None
+        self._segment_pool: ThreadPoolExecutor | None = None
+        self._segment_lock = threading.Lock()
+        # "async" keeps io_depth listings and io_depth file operations in flight (network mounts)
+        if engine not in SCAN_ENGINES:
+            raise ValueError(f"Unknown scan engine: {engine}")
+        self.engine = engine
+        self.io_depth = io_depth
+        # walk-time include/exclude rules; excluded directories are never entered
+        self.scan_filter = scan_filter if scan_filter is not None and not scan_filter.is_empty() else None
+        # files below this size are read in one call and batched per worker task (0 disables)
+        self.small_file_threshold = small_file_threshold
+        self._executor: ThreadPoolExecutor | None = None
+        # Fixed-size bitmap of file sizes seen so far. A set bit means the size (probably)
+        # collides, so the SHA-256 is taken in the same read as the fingerprint; a false
+        # positive only costs CPU, never a second read
+        self._sizes_seen = bytearray(self.SIZE_BITMAP_BYTES)
+        self._sizes_lock = threading.Lock()
+        # Multiply-linked inodes: the first path claiming a (st_dev, st_ino) is read and hashed,
+        # later links reuse its results and are reported in ScanResults.hardlinks instead
+        self._link_primary: dict[tuple[int, int], str] = {}
+        self._link_members: dict[tuple[int, int], list[int]] = defaultdict(list)
+        self._links_lock = threading.Lock()
+        self.metrics = ScanMetrics(workers=max_workers)
+        self._last_metrics_emit = 0.0
 
     def run(self) -> None:
-        results = ScanResults(root=self.root_path)
+        results = ScanResults(
+            root=self.root_path,
+            roots=list(self.roots),
+            metrics=self.metrics,
+            digest=self.digest,
+            tree_threshold=self.tree_threshold,
+            scan_filter=self.scan_filter,
+            directories=DirectoryIndex(self.roots),
+        )
         by_extension: dict[str, dict[str, float]] = defaultdict(lambda: {"count": 0, "size": 0})
         duplicates: dict[str, list[FileRecord]] = defaultdict(list)
         by_category: dict[str, dict[str, float]] = defaultdict(lambda: {"count": 0, "size": 0})
 
         try:
+            if self.scan_db is not None:
+                self._sink = open_scan_sink(self.scan_db, self.root_path, self.overwrite_db)
+            if self.auto_tune:
+                self._start_tuning()
+                self._apply_tuning()
             # Phase 1: fast fingerprint (xxhash) + classification (optional)
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = set()
-                for file_path in self._iter_files():
-                    if self.stop_event.is_set():
-                        break
-                    futures.add(executor.submit(self._process_file, file_path))
-                    if len(futures) >= self.max_workers * 4:
-                        futures = self._drain_futures(
-                            futures,
-                            results,
-                            by_extension,
-                            duplicates,
-                            by_category,
-                        )
-                while futures:
-                    futures = self._drain_futures(
-                        futures,
-                        results,
-                        by_extension,
-                        duplicates,
-                        by_category,
-                    )
+            if self.engine == "async":
+                with self.metrics.phase("scan"):
+                    self._async_engine().scan(results, by_extension, duplicates, by_category)
+            else:
+                self._scan_threaded(results, by_extension, duplicates, by_category)
+
+            aliases = self._resolve_links(results)
 
             # Phase 2: when requested, verify candidate duplicate groups using SHA-256
-            if self.compute_hashes:
-                # group by (size, fast_hash)
-                groups: dict[tuple[int, int], list[FileRecord]] = {}
-                for rec in results.files:
-                    key = (rec.size, rec.fast_hash)
-                    groups.setdefault(key, []).append(rec)
-
-                # candidate groups with more than one member
-                candidates = [g for g in groups.values() if len(g) > 1]
-                if candidates:
-                    with ThreadPoolExecutor(max_workers=self.max_workers) as sha_executor:
-                        sha_futures = {}
-                        for grp in candidates:
-                            for rec in grp:
-                                # compute sha256 in parallel
-                                f = sha_executor.submit(self._hash_file, rec.path, self.sha_chunk)
-                                sha_futures[f] = rec
-
-                        for fut in wait(list(sha_futures.keys())).done:
-                            pass
-                        # collect results as they complete
-                        for fut in sha_futures:
-                            try:
-                                h = fut.result()
-                            except Exception:
-                                continue
-                            rec = sha_futures[fut]
-                            rec.hash_value = h
-                            # update duplicates map
-                            duplicates[h].append(rec)
-                            # send updated record to UI for incremental update
-                            try:
-                                self.queue.put({"type": "record", "record": rec})
-                            except Exception:
-                                pass
+            if self.compute_hashes and not self.stop_event.is_set():
+                self._verify_candidates(results, duplicates, aliases)
+            self._finish_links(results, aliases)
+
+            if self._paused():
+                ScanCheckpoint.save(self.checkpoint, self.roots, results.files)
+                if self._sink is not None:
+                    self._sink.close()
+                    self._sink = None
+                self.metrics.finish()
+                self.queue.put({"type": "paused", "checkpoint": str(self.checkpoint), "files": len(results.files)})
+                return
+
+            # Phase 3: when requested, group resized/re-encoded images by perceptual hash
+            if self.perceptual and Image is not None and not self.stop_event.is_set():
+                self._find_near_duplicates(results)
 
             results.by_extension = {
                 ext: {
@@ -322,14 +2260,440 @@ class FileScanner(threading.Thread):
                 }
                 for category, stats in by_category.items()
             }
+            if results.directories is not None:
+                for records in results.duplicates.values():
+                    for record in records:
+                        results.directories.add_duplicate(record.path, record.size)
+            # Phase 4: whole duplicate folders, from the digests phase 2 already computed
+            if self.compute_hashes and not self.stop_event.is_set():
+                with self.metrics.phase("dirs"):
+                    results.duplicate_dirs = find_duplicate_directories(results)
+            if self._sink is not None:
+                self._sink.finish(results)
+                self._sink = None
+            for tuner in self.tuners:
+                # with several mounts nothing was hill-climbed, so a stored profile is left as it was
+                if len(self.tuners) == 1 or not tuner.from_profile:
+                    tuner.save()
+            if self._resume is not None and self.checkpoint is not None and not self.stop_event.is_set():
+                self.checkpoint.unlink(missing_ok=True)
+            self.metrics.finish()
+            self._emit_metrics(force=True)
             self.queue.put({"type": "done", "results": results})
         except Exception as exc:  # pylint: disable=broad-except
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
             self.queue.put({"type": "error", "message": str(exc)})
+        finally:
+            self._close_segments()
+
+    def _scan_threaded(self, results: ScanResults, by_extension, duplicates, by_category) -> None:
+        with self.metrics.phase("scan"), ThreadPoolExecutor(max_workers=self._pool_size()) as executor:
+            self._executor = executor
+            self._scheduler = self._new_scheduler(executor)
+            futures = set()
+            batch: list[tuple[Path, Path]] = []
+            for file_path, dev, ino, root in self._timed_walk():
+                if self.stop_event.is_set():
+                    break
+                if self._scheduler is not None:
+                    futures.add(self._scheduler.submit(dev, ino, self._process_file, file_path, root))
+                elif self.small_file_threshold:
+                    # one task per batch; files that turn out not to be small come back for their own task
+                    batch.append((file_path, root))
+                    if len(batch) < SMALL_FILE_BATCH:
+                        continue
+                    futures.add(executor.submit(self._process_batch, batch))
+                    batch = []
+                else:
+                    futures.add(executor.submit(self._process_file, file_path, root))
+                if len(futures) >= self._inflight_limit():
+                    futures = self._drain_futures(
+                        futures,
+                        results,
+                        by_extension,
+                        duplicates,
+                        by_category,
+                    )
+            if batch and not self.stop_event.is_set():
+                futures.add(executor.submit(self._process_batch, batch))
+            if self.stop_event.is_set():
+                self._cancel_pending(futures)
+            while futures:
+                futures = self._drain_futures(
+                    futures,
+                    results,
+                    by_extension,
+                    duplicates,
+                    by_category,
+                )
+        self._executor = None
+
+    def _async_engine(self) -> AsyncScanEngine:
+        return AsyncScanEngine(self, metadata_depth=self.io_depth, read_depth=self.io_depth)
+
+    def _verify_candidates(self, results: ScanResults, duplicates, aliases=()) -> None:
+        """Phase 2: verify candidate duplicate groups using SHA-256. Extra hardlinks (aliases) take no part."""
+        with self.metrics.phase("verify"):
+            # group by (size, fast_hash); only record indices are held, not records
+            keys = results.files.iter_group_keys()
+            if aliases:
+                keys = (key for key in keys if key[0] not in aliases)
+            if self.external_sort or len(results.files) >= EXTERNAL_SORT_THRESHOLD:
+                candidates = iter_candidate_groups_external(keys)
+            else:
+                candidates = iter_candidate_groups(keys)
+            if len(results.files) > 1 and self.engine == "async":
+                self._async_engine().verify(results, duplicates, candidates)
+            elif len(results.files) > 1:
+                with ThreadPoolExecutor(max_workers=self._pool_size()) as sha_executor:
+                    self._scheduler = self._new_scheduler(sha_executor)
+                    sha_futures = {}
+                    for grp in candidates:
+                        if self.stop_event.is_set():
+                            break
+                        for idx in grp:
+                            if self.stop_event.is_set():
+                                break
+                            rec = results.files[idx]
+                            if rec.hash_value:
+                                # hashed in the phase-1 read (or before a pause); already counted there
+                                self.metrics.add_saved(rec.size)
+                                continue
+                            # compute sha256 in parallel, keeping a bounded number in flight
+                            if self._scheduler is not None:
+                                f = self._submit_scheduled_hash(rec)
+                            else:
+                                f = sha_executor.submit(self._timed_hash_file, rec.path, rec.size)
+                            sha_futures[f] = (idx, rec)
+                            if len(sha_futures) >= self._inflight_limit():
+                                self._collect_hashes(sha_futures, results, duplicates)
+                    if self.stop_event.is_set():
+                        self._cancel_pending(sha_futures)
+                    while sha_futures:
+                        self._collect_hashes(sha_futures, results, duplicates)
+            # removes the external sort's temp runs even if the loop stopped early
+            candidates.close()
+
+    def _resolve_links(self, results: ScanResults) -> dict[int, int]:
+        """Map every extra hardlink's index to the index of the link that was read, copying its fingerprint."""
+        aliases: dict[int, int] = {}
+        for key, members in self._link_members.items():
+            if len(members) < 2:
+                continue
+            primary_path = self._link_primary[key]
+            primary = next((idx for idx in members if results.files.path_str(idx) == primary_path), None)
+            if primary is None:
+                # the hashed link failed or the scan stopped first; the others stay unhashed
+                continue
+            fast_hash = results.files[primary].fast_hash
+            for idx in members:
+                if idx == primary:
+                    continue
+                record = results.files[idx]
+                record.fast_hash = fast_hash
+                results.files[idx] = record
+                aliases[idx] = primary
+        return aliases
+
+    def _finish_links(self, results: ScanResults, aliases: dict[int, int]) -> None:
+        """Give extra links the digest of the link that was verified and group them as already deduplicated."""
+        extra_links: dict[int, list[int]] = defaultdict(list)
+        for alias, primary in aliases.items():
+            extra_links[primary].append(alias)
+        for primary, extra in extra_links.items():
+            first = results.files[primary]
+            records = [first]
+            for idx in extra:
+                record = results.files[idx]
+                if first.hash_value and not record.hash_value:
+                    record.hash_value = first.hash_value
+                    results.files[idx] = record
+                    if self._sink is not None:
+                        self._sink.set_hash(idx, first.hash_value)
+                records.append(record)
+            results.hardlinks[f"{first.device}:{first.inode}"] = records
+
+    def _paused(self) -> bool:
+        return (
+            self.stop_event.is_set()
+            and self.pause_event is not None
+            and self.pause_event.is_set()
+            and self.checkpoint is not None
+        )
+
+    def _cancel_pending(self, futures) -> None:
+        """Cancel work that has not started; running hashes notice stop_event between chunks."""
+        if self._scheduler is not None:
+            self._scheduler.cancel_pending()
+        for future in futures:
+            future.cancel()
+
+    def _find_near_duplicates(self, results: ScanResults) -> None:
+        """Phase 3: perceptual-hash image records and cluster them in a BK-tree."""
+        with self.metrics.phase("perceptual"):
+            hashes: list[tuple[int, int]] = []
+            with ThreadPoolExecutor(max_workers=self._pool_size()) as executor:
+                futures = {}
+                for idx, record in enumerate(results.files):
+                    if self.stop_event.is_set():
+                        break
+                    if not is_image_record(record):
+                        continue
+                    futures[executor.submit(self._timed_perceptual_hash, record.path, record.size)] = idx
+                    if len(futures) >= self._inflight_limit():
+                        self._collect_perceptual(futures, hashes)
+                while futures:
+                    self._collect_perceptual(futures, hashes)
+
+            hash_of = dict(hashes)
+            for members in group_near_duplicates(hashes, self.perceptual_threshold):
+                members.sort()
+                records = [results.files[idx] for idx in members]
+                # byte-identical copies are already reported as exact duplicates
+                contents = {(record.size, record.hash_value or record.fast_hash) for record in records}
+                if len(contents) == 1 and None not in next(iter(contents)):
+                    continue
+                results.near_duplicates[f"{hash_of[members[0]]:016x}"] = records
+
+    def _collect_perceptual(self, futures, hashes: list[tuple[int, int]]) -> None:
+        done, _pending = wait(futures, return_when=FIRST_COMPLETED)
+        for fut in done:
+            idx = futures.pop(fut)
+            try:
+                hashes.append((idx, fut.result()))
+            except Exception:  # pylint: disable=broad-except
+                # unreadable or unsupported image formats are simply left out
+                continue
+        self._emit_metrics(pending=len(futures))
+
+    def _timed_perceptual_hash(self, file_path: Path, size: int) -> int:
+        start = time.perf_counter()
+        try:
+            return perceptual_hash(file_path)
+        finally:
+            self.metrics.add_stage("perceptual", time.perf_counter() - start, nbytes=size)
+
+    def _collect_hashes(self, sha_futures, results: ScanResults, duplicates) -> None:
+        """Wait for at least one SHA-256 future and fold completed ones into the results."""
+        done, _pending = wait(sha_futures, return_when=FIRST_COMPLETED)
+        for fut in done:
+            idx, rec = sha_futures.pop(fut)
+            try:
+                h = fut.result()
+            except Exception:
+                continue
+            self._set_hash(idx, rec, h, results, duplicates)
+        self._emit_metrics(pending=len(sha_futures))
+
+    def _set_hash(self, idx: int, rec: FileRecord, h: str, results: ScanResults, duplicates) -> None:
+        rec.hash_value = h
+        results.files[idx] = rec
+        if self._sink is not None:
+            self._sink.set_hash(idx, h)
+        # update duplicates map
+        duplicates[h].append(rec)
+        # send updated record to UI for incremental update
+        try:
+            self.queue.put({"type": "record", "record": rec})
+        except Exception:
+            pass
+
+    def _submit_scheduled_hash(self, rec: FileRecord) -> Future:
+        dev = rec.device or 0
+        order_key = None
+        if self._scheduler.prefers_physical_order(dev):
+            order_key = physical_offset(rec.path)
+        if order_key is None:
+            order_key = rec.inode or 0
+        return self._scheduler.submit(dev, order_key, self._timed_hash_file, rec.path, rec.size)
+
+    def _start_tuning(self) -> None:
+        """One AutoTuner per mount under the roots, each probed or loaded from that mount's own profile."""
+        by_mount: dict[str, AutoTuner] = {}
+        for root in self.roots:
+            key = storage_key(root)
+            if key not in by_mount:
+                by_mount[key] = AutoTuner(root, self.max_workers, self.fast_chunk)
+            try:
+                dev = os.stat(root).st_dev
+            except OSError:
+                dev = None
+            self._root_tuners.append((str(root).rstrip(os.sep) + os.sep, dev, by_mount[key]))
+        self.tuners = list(by_mount.values())
+        self.tuner = self._root_tuners[0][2]
+
+    def _chunks_for(self, file_path) -> tuple[int, int]:
+        """(fast_chunk, sha_chunk) for the mount file_path is on."""
+        if len(self.tuners) > 1:
+            text = str(file_path)
+            for prefix, _dev, tuner in self._root_tuners:
+                if text.startswith(prefix):
+                    return tuner.fast_chunk, tuner.sha_chunk
+        return self.fast_chunk, self.sha_chunk
+
+    def _new_scheduler(self, executor: ThreadPoolExecutor) -> DeviceScheduler | None:
+        if not self.io_scheduler:
+            return None
+        scheduler = DeviceScheduler(executor, self._concurrency())
+        if len(self.tuners) > 1:
+            for _prefix, dev, tuner in self._root_tuners:
+                if dev is not None:
+                    scheduler.set_device_limit(dev, tuner.workers)
+        return scheduler
+
+    def _concurrency(self) -> int:
+        if not self.tuners:
+            return self.max_workers
+        # every mount keeps the readers tuned for it
+        return min(AutoTuner.MAX_WORKERS, sum(tuner.workers for tuner in self.tuners))
+
+    def _pool_size(self) -> int:
+        return AutoTuner.MAX_WORKERS if self.tuner is not None else self.max_workers
+
+    def _inflight_limit(self) -> int:
+        # The scheduler needs a deeper queue to have something to reorder per device
+        if self._scheduler is not None:
+            return self._concurrency() * 16
+        # With auto-tune the pool is oversized and the in-flight count is the concurrency knob
+        if self.tuner is not None:
+            return self._concurrency()
+        return self.max_workers * 4
+
+    def _apply_tuning(self) -> None:
+        self.fast_chunk = self.tuner.fast_chunk
+        self.sha_chunk = self.tuner.sha_chunk
+        self.metrics.workers = self._concurrency()
+        if self._scheduler is not None:
+            self._scheduler.global_limit = self._concurrency()
+        self.metrics.set_gauge("tuned_workers", self._concurrency())
+        self.metrics.set_gauge("tuned_fast_chunk", self.fast_chunk)
+
+    def _emit_metrics(self, pending: int | None = None, force: bool = False) -> None:
+        """Sample queue depths and post a throttled "metrics" message for live display."""
+        if pending is not None:
+            self.metrics.set_gauge("pending_futures", pending)
+        if self._scheduler is not None:
+            self.metrics.set_gauge("device_queued", self._scheduler.queued())
+        if self.scan_filter is not None:
+            self.metrics.set_skipped(self.scan_filter.skipped_files, self.scan_filter.skipped_dirs)
+        # throughput is measured for the whole scan, so only a single mount's tuner can hill-climb on it
+        if len(self.tuners) == 1 and self.tuner.observe(self.metrics):
+            self._apply_tuning()
+        now = time.perf_counter()
+        if not force and now - self._last_metrics_emit < 0.5:
+            return
+        self._last_metrics_emit = now
+        self.metrics.set_gauge("ui_queue", self.queue.qsize())
+        self.queue.put({"type": "metrics", "metrics": self.metrics.snapshot(), "status": self.metrics.status_line()})
+
+    @staticmethod
+    def _normalize_roots(root_path) -> list[Path]:
+        """Accept one root or several; drop repeats and roots nested inside another root."""
+        candidates = [root_path] if isinstance(root_path, (str, os.PathLike)) else list(root_path)
+        if not candidates:
+            raise ValueError("At least one root directory is required")
+        roots: list[Path] = []
+        for candidate in candidates:
+            path = Path(os.path.abspath(candidate))
+            if any(path == kept or kept in path.parents for kept in roots):
+                continue
+            roots = [kept for kept in roots if path not in kept.parents]
+            roots.append(path)
+        return roots
+
+    def _walk_all_roots(self):
+        """Yield (path, dev, inode, root); several roots are walked concurrently into one stream."""
+        if len(self.roots) == 1:
+            root = self.roots[0]
+            for path, dev, ino in self._walk_entries(root):
+                yield path, dev, ino, root
+            return
+
+        merged: Queue = Queue(maxsize=4096)
+        finished = object()
+
+        def put(item) -> bool:
+            while not self.stop_event.is_set():
+                try:
+                    merged.put(item, timeout=0.2)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def walk(root: Path) -> None:
+            try:
+                for path, dev, ino in self._walk_entries(root):
+                    if not put((path, dev, ino, root)):
+                        return
+            finally:
+                put(finished)
+
+        for root in self.roots:
+            threading.Thread(target=walk, args=(root,), daemon=True).start()
+        remaining = len(self.roots)
+        while remaining:
+            try:
+                item = merged.get(timeout=0.2)
+            except Empty:
+                if self.stop_event.is_set():
+                    return
+                continue
+            if item is finished:
+                remaining -= 1
+                continue
+            yield item
+
+    def _timed_walk(self):
+        """Wrap _walk_all_roots, charging the time spent enumerating to the "walk" stage."""
+        entries = iter(self._walk_all_roots())
+        while True:
+            start = time.perf_counter()
+            try:
+                entry = next(entries)
+            except StopIteration:
+                self.metrics.add_stage("walk", time.perf_counter() - start, count=0)
+                return
+            self.metrics.add_stage("walk", time.perf_counter() - start)
+            yield entry
+
+    def _timed_hash_file(self, file_path: Path, size: int) -> str:
+        start = time.perf_counter()
+        _fast_chunk, sha_chunk = self._chunks_for(file_path)
+        if self._use_tree(size):
+            (digest,) = tree_hash_file(file_path, size, self._segments(), (self.digest,), sha_chunk, self.stop_event)
+        else:
+            digest = self._hash_file(file_path, sha_chunk, self.stop_event, self.digest, size)
+        self.metrics.add_stage("verify", time.perf_counter() - start, nbytes=size)
+        return digest
+
+    def _use_tree(self, size: int) -> bool:
+        return self.tree_threshold is not None and size >= self.tree_threshold
+
+    def _expected_digest(self, size: int) -> str:
+        return tree_digest_name(self.digest) if self._use_tree(size) else self.digest
+
+    def _segments(self) -> ThreadPoolExecutor:
+        """Shared pool for tree-hash segments, separate from the per-file workers so they cannot deadlock."""
+        with self._segment_lock:
+            if self._segment_pool is None:
+                self._segment_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="segment")
+            return self._segment_pool
+
+    def _close_segments(self) -> None:
+        with self._segment_lock:
+            pool, self._segment_pool = self._segment_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
 
     def _iter_files(self):
-        for path in self.root_path.rglob("*"):
-            if path.is_file():
-                yield path
+        for path, _dev, _ino, _root in self._walk_all_roots():
+            yield path
+
+    def _walk_entries(self, root: Path):
+        return iter_file_entries(root, self.scan_filter)
 
     def _drain_futures(
         self,
@@ -340,6 +2704,7 @@ class FileScanner(threading.Thread):
         by_category,
     ):
         done, pending = wait(futures, return_when=FIRST_COMPLETED)
+        self._emit_metrics(pending=len(pending))
         for future in done:
             if self.stop_event.is_set():
                 continue
@@ -350,78 +2715,1720 @@ class FileScanner(threading.Thread):
                 continue
             if record is None:
                 continue
-            results.files.append(record)
+            if isinstance(record, tuple):
+                records, deferred = record
+                for file_path, root in deferred:
+                    pending.add(self._executor.submit(self._process_file, file_path, root))
+                for batch_record in records:
+                    self._add_record(batch_record, results, by_extension, duplicates, by_category)
+                continue
+            self._add_record(record, results, by_extension, duplicates, by_category)
+        return pending
 
-            ext_key = record.extension or "<no extension>"
-            ext_stats = by_extension[ext_key]
-            ext_stats["count"] += 1
-            ext_stats["size"] += record.size
+    def _add_record(self, record: FileRecord, results: ScanResults, by_extension, duplicates, by_category) -> None:
+        results.files.append(record)
+        if self._sink is not None:
+            self._sink.add_record(len(results.files) - 1, record)
+        if self._link_primary and record.inode is not None and (record.device, record.inode) in self._link_primary:
+            self._link_members[(record.device, record.inode)].append(len(results.files) - 1)
 
-            if record.hash_value:
-                duplicates[record.hash_value].append(record)
+        if results.directories is not None:
+            results.directories.add(record.path, record.size)
 
-            if record.category:
-                cat_stats = by_category[record.category]
-                cat_stats["count"] += 1
-                cat_stats["size"] += record.size
+        ext_key = record.extension or "<no extension>"
+        ext_stats = by_extension[ext_key]
+        ext_stats["count"] += 1
+        ext_stats["size"] += record.size
 
-            # Send the complete record to the UI for incremental updates
-            self.queue.put({"type": "record", "record": record})
-        return pending
+        if record.hash_value:
+            duplicates[record.hash_value].append(record)
+
+        if record.category:
+            cat_stats = by_category[record.category]
+            cat_stats["count"] += 1
+            cat_stats["size"] += record.size
 
-    def _inspect_file(self, file_path: Path) -> FileRecord | None:
+        # Send the complete record to the UI for incremental updates
+        self.queue.put({"type": "record", "record": record})
+
+    def _inspect_file(self, file_path: Path, stat: os.stat_result | None = None) -> FileRecord | None:
         try:
-            stat = file_path.stat()
+            if stat is None:
+                stat = file_path.stat()
+            extra_link = stat.st_nlink > 1 and self._is_extra_link(stat, file_path)
+            if self._resume is not None and not extra_link:
+                record = self._resume.take(file_path, stat)
+                if record is not None and record.hash_value and digest_algorithm(record.hash_value) != self._expected_digest(record.size):
+                    record.hash_value = None
+                if record is not None:
+                    self.metrics.add_stage("resumed", 0.0)
+                    return record
             mime, _ = mimetypes.guess_type(file_path.as_uri())
             record = FileRecord(
                 path=file_path,
                 size=stat.st_size,
                 extension=file_path.suffix.lower(),
                 mime=mime,
+                device=stat.st_dev,
+                inode=stat.st_ino,
+                mtime_ns=stat.st_mtime_ns,
             )
+            if extra_link:
+                # same inode as a link that is (being) read; its hashes are copied after phase 1
+                self.metrics.add_stage("linked", 0.0)
+                return record
+            if xxhash is not None and stat.st_size < self.small_file_threshold:
+                start = time.perf_counter()
+                try:
+                    record.fast_hash, record.hash_value = self._small_file_hashes(file_path, stat.st_size)
+                except OSError:
+                    return record
+                self.metrics.add_stage("hash", time.perf_counter() - start, nbytes=stat.st_size)
+                return record
             # Always compute a fast non-cryptographic fingerprint (xxh64) for grouping
             if xxhash is not None:
+                start = time.perf_counter()
+                fast_chunk, _sha_chunk = self._chunks_for(file_path)
                 try:
-                    record.fast_hash = self._fast_hash_file(file_path, chunk_size=self.fast_chunk)
+                    with_full = self.compute_hashes and self._size_collides(stat.st_size)
+                    if self._use_tree(stat.st_size):
+                        # long-tail files: segments are fingerprinted (and hashed) in parallel
+                        algorithms = ("xxh64", self.digest) if with_full else ("xxh64",)
+                        roots = tree_hash_file(
+                            file_path, stat.st_size, self._segments(), algorithms, fast_chunk, self.stop_event
+                        )
+                        record.fast_hash = roots[0]
+                        if with_full:
+                            record.hash_value = roots[1]
+                    elif with_full:
+                        record.fast_hash, record.hash_value = self._fast_and_full_hash_file(
+                            file_path, fast_chunk, self.stop_event, self.digest, stat.st_size
+                        )
+                    else:
+                        record.fast_hash = self._fast_hash_file(file_path, fast_chunk, self.stop_event)
+                except ScanCancelled:
+                    return None
                 except Exception:
                     record.fast_hash = None
+                self.metrics.add_stage("hash", time.perf_counter() - start, nbytes=stat.st_size)
             return record
         except (PermissionError, FileNotFoundError):
             return None
 
-    def _process_file(self, file_path: Path) -> FileRecord | None:
+    def _small_file_hashes(self, file_path: Path, size: int) -> tuple[int, str | None]:
+        """
+        Fingerprint and (with verification on) digest of a small file from one
+        whole-file read; an empty file is not opened at all. The digest is
+        always kept, so phase 2 never re-reads a small file. Beyond the files
+        that share a size (which would be hashed anyway), that is at most one
+        extra digest per distinct size below the threshold.
+        """
+        data = file_path.read_bytes() if size else b""
+        digest = None
+        if self.compute_hashes:
+            hasher = new_digest(self.digest)
+            hasher.update(data)
+            digest = format_digest(self.digest, hasher)
+        return xxhash.xxh64_intdigest(data), digest
+
+    def _process_batch(self, items) -> tuple[list[FileRecord], list[tuple[Path, Path]]]:
+        """Process walked files in one task; those at or above the small-file threshold are handed back."""
+        records, deferred = [], []
+        for file_path, root in items:
+            if self.stop_event.is_set():
+                break
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            if stat.st_size >= self.small_file_threshold:
+                deferred.append((file_path, root))
+                continue
+            record = self._process_file(file_path, root, stat)
+            if record is not None:
+                records.append(record)
+        return records, deferred
+
+    def _is_extra_link(self, stat: os.stat_result, file_path: Path) -> bool:
+        """Claim the inode for file_path; False for the first link seen, True for every later one."""
+        with self._links_lock:
+            first = self._link_primary.setdefault((stat.st_dev, stat.st_ino), str(file_path))
+        return first != str(file_path)
+
+    def _size_collides(self, size: int) -> bool:
+        """Mark size as seen; True if it (probably) was seen before. The first file of a size is read twice."""
+        bit = hash(size) & (self.SIZE_BITMAP_BYTES * 8 - 1)
+        mask = 1 << (bit & 7)
+        with self._sizes_lock:
+            seen = self._sizes_seen[bit >> 3] & mask
+            self._sizes_seen[bit >> 3] |= mask
+        return bool(seen)
+
+    def _process_file(self, file_path: Path, root: Path | None = None, stat: os.stat_result | None = None) -> FileRecord | None:
         if self.stop_event.is_set():
             return None
-        record = self._inspect_file(file_path)
+        record = self._inspect_file(file_path, stat)
         if record is None:
             return None
-        if self.classifier:
+        record.root = root
+        if self.classifier and record.category is None:
+            start = time.perf_counter()
             try:
                 record.category = self.classifier.classify(record)
             except Exception:  # pylint: disable=broad-except
                 record.category = None
+            self.metrics.add_stage("classify", time.perf_counter() - start)
         return record
 
     @staticmethod
-    def _hash_file(file_path: Path, chunk_size: int = 1_048_576) -> str:
-        sha256 = hashlib.sha256()
+    def _hash_file(
+        file_path: Path,
+        chunk_size: int = 1_048_576,
+        stop_event: threading.Event | None = None,
+        algorithm: str = DEFAULT_DIGEST,
+        size: int = 0,
+    ) -> str:
+        """Full-content verification digest as "<algorithm>:<hex>"."""
+        hasher = new_digest(algorithm, size)
+        if algorithm == "blake3" and size >= BLAKE3_THREADED_SIZE:
+            # multi-threaded BLAKE3 only pays off with large updates
+            chunk_size = max(chunk_size, BLAKE3_THREADED_SIZE)
         with file_path.open("rb") as stream:
+            sparse = sparse_extents(stream.fileno())
+            if sparse is not None:
+                (digest,) = hash_sparse(stream.fileno(), sparse, (algorithm,), chunk_size, stop_event, file_path)
+                return f"{algorithm}:{digest.hex()}"
             while chunk := stream.read(chunk_size):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+                if stop_event is not None and stop_event.is_set():
+                    raise ScanCancelled(file_path)
+                hasher.update(chunk)
+        return format_digest(algorithm, hasher)
 
     @staticmethod
-    def _fast_hash_file(file_path: Path, chunk_size: int = 8_388_608) -> int:
+    def _multi_hash_stream(stream, hashers, chunk_size: int, stop_event: threading.Event | None, file_path: Path) -> None:
+        """Feed every hasher from one pass over the stream, reusing a single read buffer."""
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while count := stream.readinto(buffer):
+            if stop_event is not None and stop_event.is_set():
+                raise ScanCancelled(file_path)
+            chunk = view[:count]
+            for hasher in hashers:
+                hasher.update(chunk)
+
+    @classmethod
+    def _fast_and_full_hash_file(
+        cls,
+        file_path: Path,
+        chunk_size: int = 8_388_608,
+        stop_event: threading.Event | None = None,
+        algorithm: str = DEFAULT_DIGEST,
+        size: int = 0,
+    ) -> tuple[int, str]:
+        """xxh64 fingerprint and the verification digest from the same read."""
+        if xxhash is None:
+            raise RuntimeError("xxhash not available")
+        with file_path.open("rb", buffering=0) as stream:
+            sparse = sparse_extents(stream.fileno())
+            if sparse is not None:
+                fast, full = hash_sparse(stream.fileno(), sparse, ("xxh64", algorithm), chunk_size, stop_event, file_path)
+                return int.from_bytes(fast, "big"), f"{algorithm}:{full.hex()}"
+            fast, full = xxhash.xxh64(), new_digest(algorithm, size)
+            cls._multi_hash_stream(stream, (fast, full), chunk_size, stop_event, file_path)
+        return fast.intdigest(), format_digest(algorithm, full)
+
+    @staticmethod
+    def _fast_hash_file(file_path: Path, chunk_size: int = 8_388_608, stop_event: threading.Event | None = None) -> int:
         """Compute a fast 64-bit xxhash fingerprint (returns int) or raise if xxhash missing."""
         if xxhash is None:
             raise RuntimeError("xxhash not available")
         h = xxhash.xxh64()
         with file_path.open("rb") as stream:
+            sparse = sparse_extents(stream.fileno())
+            if sparse is not None:
+                (digest,) = hash_sparse(stream.fileno(), sparse, ("xxh64",), chunk_size, stop_event, file_path)
+                return int.from_bytes(digest, "big")
             while chunk := stream.read(chunk_size):
+                if stop_event is not None and stop_event.is_set():
+                    raise ScanCancelled(file_path)
                 h.update(chunk)
         return h.intdigest()
 
 
+# ioctl request number for FICLONE (_IOW(0x94, 9, int)); shares extents on btrfs/XFS.
+FICLONE = 0x40049409
+
+# Duplicate actions offered in the UI. "rename" is the original ._dr_ prefix behaviour.
+DUPLICATE_ACTIONS = ("rename", "hardlink", "reflink")
+
+# Separates several scan roots in the target directory field.
+ROOT_SEPARATOR = ";"
+NO_PREFERRED_ROOT = "(none)"
+NO_FILTER_SET = "(none)"
+
+
+def _files_identical(first: Path, second: Path, chunk_size: int = 1_048_576) -> bool:
+    """Byte-compare two files; used to re-verify a duplicate right before it is replaced."""
+    if first.stat().st_size != second.stat().st_size:
+        return False
+    with first.open("rb") as stream_a, second.open("rb") as stream_b:
+        while True:
+            chunk_a = stream_a.read(chunk_size)
+            chunk_b = stream_b.read(chunk_size)
+            if chunk_a != chunk_b:
+                return False
+            if not chunk_a:
+                return True
+
+
+def _unlink_missing_ok(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _reflink_file(src: Path, dst: Path) -> None:
+    """Create dst as a copy-on-write clone of src. Raises OSError when unsupported."""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+    try:
+        with src.open("rb") as source, dst.open("xb") as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+    except OSError:
+        _unlink_missing_ok(dst)
+        raise
+
+
+def link_duplicate(primary: Path, duplicate: Path, mode: str = "hardlink") -> tuple[str, int]:
+    """
+    Replace ``duplicate`` with a link to ``primary`` and return (method, bytes_reclaimed).
+
+    mode: 'hardlink'|'reflink'
+    - 'reflink' clones extents via FICLONE and falls back to a hardlink if the
+      filesystem refuses
+    - the contents are byte-compared first; a mismatch returns ('mismatch', 0)
+    - the link is built under a temporary name and swapped in with os.replace,
+      so the duplicate path never disappears; if the duplicate's size or mtime
+      changed since the compare it is left alone and ('mismatch', 0) returned
+    Raises OSError when neither link type is possible (e.g. cross-device, FAT/SMB).
+    """
+    if mode not in ("hardlink", "reflink"):
+        raise ValueError(f"Unsupported link mode: {mode}")
+    dup_stat = duplicate.stat()
+    primary_stat = primary.stat()
+    if (dup_stat.st_dev, dup_stat.st_ino) == (primary_stat.st_dev, primary_stat.st_ino):
+        return "linked", 0
+    if not _files_identical(primary, duplicate):
+        return "mismatch", 0
+
+    tmp_path = duplicate.with_name(f".{duplicate.name}.drtmp")
+    # a temp file left by an interrupted run would make the link below fail
+    _unlink_missing_ok(tmp_path)
+    method = "hardlink"
+    if mode == "reflink":
+        try:
+            _reflink_file(primary, tmp_path)
+            shutil.copystat(duplicate, tmp_path)
+            method = "reflink"
+        except OSError:
+            _unlink_missing_ok(tmp_path)
+            method = "hardlink"
+    if method == "hardlink":
+        os.link(primary, tmp_path)
+    try:
+        current = duplicate.stat()
+        if (current.st_size, current.st_mtime_ns) != (dup_stat.st_size, dup_stat.st_mtime_ns):
+            # written to after the byte compare; keep the new contents
+            _unlink_missing_ok(tmp_path)
+            return "mismatch", 0
+        os.replace(tmp_path, duplicate)
+    except OSError:
+        _unlink_missing_ok(tmp_path)
+        raise
+    # Space only comes back when no other hardlink still pins the old inode
+    reclaimed = dup_stat.st_size if dup_stat.st_nlink == 1 else 0
+    return method, reclaimed
+
+
+def record_to_dict(record: FileRecord) -> dict:
+    """JSON-ready view of a FileRecord (shared by the summary encoder and NDJSON export)."""
+    return {
+        "path": str(record.path),
+        "size": record.size,
+        "extension": record.extension,
+        "mime": record.mime,
+        "hash": record.hash_value,
+        "category": record.category,
+        "root": str(record.root) if record.root is not None else None,
+    }
+
+
+def _to_signed64(value: int | None) -> int | None:
+    """SQLite integers are signed; fold unsigned xxh64 fingerprints into that range."""
+    if value is None:
+        return None
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+class ScanDatabase:
+    """
+    SQLite output for a full scan (files, hashes, categories, duplicate groups).
+
+    Rows are buffered and written with executemany every BATCH_SIZE records
+    while the scan runs; the file id is the record's index in ScanResults.files
+    so phase-2 hash updates hit the rowid directly. Secondary indexes are built
+    once at the end, which is much faster than maintaining them during the load.
+    """
+
+    BATCH_SIZE = 5000
+    SCHEMA = """
+        CREATE TABLE scan (
+            root TEXT NOT NULL,
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            file_count INTEGER,
+            total_bytes INTEGER,
+            digest TEXT
+        );
+        CREATE TABLE files (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            directory TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            extension TEXT,
+            mime TEXT,
+            fast_hash INTEGER,
+            hash TEXT,
+            category TEXT,
+            root TEXT
+        );
+        CREATE TABLE duplicate_groups (
+            hash TEXT PRIMARY KEY,
+            count INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            reclaimable_bytes INTEGER NOT NULL
+        );
+    """
+    INDEXES = """
+        CREATE UNIQUE INDEX idx_files_path ON files(path);
+        CREATE INDEX idx_files_directory ON files(directory);
+        CREATE INDEX idx_files_hash ON files(hash);
+        CREATE INDEX idx_files_size_fast ON files(size, fast_hash);
+        CREATE INDEX idx_files_category ON files(category);
+    """
+
+    def __init__(self, db_path: Path, root: Path, overwrite: bool = False):
+        self.db_path = db_path
+        if not overwrite and scan_db_needs_overwrite(db_path):
+            raise FileExistsError(
+                f"{db_path} already exists (a finished scan or another file); choose another path or overwrite it"
+            )
+        for stale in (db_path, db_path.with_name(f"{db_path.name}-wal"), db_path.with_name(f"{db_path.name}-shm")):
+            _unlink_missing_ok(stale)
+        self._conn = sqlite3.connect(str(db_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.execute("INSERT INTO scan (root, started_at) VALUES (?, ?)", (str(root), time.time()))
+        self._pending_files: list[tuple] = []
+        self._pending_hashes: list[tuple[str, int]] = []
+
+    def add_record(self, file_id: int, record: FileRecord) -> None:
+        path = str(record.path)
+        self._pending_files.append((
+            file_id,
+            path,
+            os.path.dirname(path),
+            record.size,
+            record.extension,
+            record.mime,
+            _to_signed64(record.fast_hash),
+            record.hash_value,
+            record.category,
+            str(record.root) if record.root is not None else None,
+        ))
+        if len(self._pending_files) >= self.BATCH_SIZE:
+            self.flush()
+
+    def set_hash(self, file_id: int, hash_value: str) -> None:
+        self._pending_hashes.append((hash_value, file_id))
+        if len(self._pending_hashes) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending_files:
+            self._conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._pending_files)
+            self._pending_files.clear()
+        if self._pending_hashes:
+            self._conn.executemany("UPDATE files SET hash = ? WHERE id = ?", self._pending_hashes)
+            self._pending_hashes.clear()
+        self._conn.commit()
+
+    def finish(self, results: ScanResults) -> None:
+        self.flush()
+        self._conn.executemany(
+            "INSERT INTO duplicate_groups VALUES (?, ?, ?, ?)",
+            (
+                (hash_value, len(records), records[0].size, records[0].size * (len(records) - 1))
+                for hash_value, records in results.duplicates.items()
+                if records
+            ),
+        )
+        self._conn.executescript(self.INDEXES)
+        self._conn.execute(
+            "UPDATE scan SET finished_at = ?, file_count = (SELECT COUNT(*) FROM files), "
+            "total_bytes = (SELECT COALESCE(SUM(size), 0) FROM files), digest = ?",
+            (time.time(), results.digest),
+        )
+        self._conn.commit()
+        self.close()
+
+    def close(self) -> None:
+        try:
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+
+
+class ParquetScanSink:
+    """
+    Parquet output (requires pyarrow). ``db_path`` is a directory receiving
+    files.parquet (one row group per batch, written during the scan),
+    hashes.parquet (phase-2 verification hashes by file id) and groups.parquet.
+    """
+
+    BATCH_SIZE = 50_000
+
+    def __init__(self, db_path: Path, root: Path, overwrite: bool = False):
+        try:
+            import pyarrow as pa  # type: ignore
+            import pyarrow.parquet as pq  # type: ignore
+        except ImportError as exc:
+            raise RuntimeError("Parquet output requires the 'pyarrow' package.") from exc
+        self._pa = pa
+        self._pq = pq
+        self.db_path = db_path
+        if not overwrite and scan_db_needs_overwrite(db_path):
+            raise FileExistsError(
+                f"{db_path} already exists (a finished scan or another file); choose another path or overwrite it"
+            )
+        db_path.mkdir(parents=True, exist_ok=True)
+        # groups.parquet marks a finished scan; drop the old one until this scan writes its own
+        for name in ("hashes.parquet", "groups.parquet"):
+            _unlink_missing_ok(db_path / name)
+        self.root = root
+        self._file_schema = pa.schema([
+            ("id", pa.int64()),
+            ("path", pa.string()),
+            ("directory", pa.string()),
+            ("size", pa.int64()),
+            ("extension", pa.string()),
+            ("mime", pa.string()),
+            ("fast_hash", pa.uint64()),
+            ("category", pa.string()),
+            ("root", pa.string()),
+        ])
+        self._files_writer = pq.ParquetWriter(str(db_path / "files.parquet"), self._file_schema)
+        self._pending_files: list[tuple] = []
+        self._hashes: list[tuple[int, str]] = []
+
+    def add_record(self, file_id: int, record: FileRecord) -> None:
+        path = str(record.path)
+        self._pending_files.append((
+            file_id, path, os.path.dirname(path), record.size, record.extension,
+            record.mime, record.fast_hash, record.category,
+            str(record.root) if record.root is not None else None,
+        ))
+        if len(self._pending_files) >= self.BATCH_SIZE:
+            self.flush()
+
+    def set_hash(self, file_id: int, hash_value: str) -> None:
+        self._hashes.append((file_id, hash_value))
+
+    def flush(self) -> None:
+        if not self._pending_files:
+            return
+        columns = list(zip(*self._pending_files))
+        table = self._pa.Table.from_arrays(
+            [self._pa.array(col, type=fld.type) for col, fld in zip(columns, self._file_schema)],
+            schema=self._file_schema,
+        )
+        self._files_writer.write_table(table)
+        self._pending_files.clear()
+
+    def finish(self, results: ScanResults) -> None:
+        pa = self._pa
+        self.flush()
+        self._files_writer.close()
+        ids, hashes = (list(col) for col in zip(*self._hashes)) if self._hashes else ([], [])
+        self._pq.write_table(
+            pa.table({"id": pa.array(ids, pa.int64()), "hash": pa.array(hashes, pa.string())}),
+            str(self.db_path / "hashes.parquet"),
+        )
+        groups = [
+            (hash_value, len(records), records[0].size, records[0].size * (len(records) - 1))
+            for hash_value, records in results.duplicates.items()
+            if records
+        ]
+        names = ("hash", "count", "size", "reclaimable_bytes")
+        types = (pa.string(), pa.int64(), pa.int64(), pa.int64())
+        columns = list(zip(*groups)) if groups else [[] for _ in names]
+        self._pq.write_table(
+            pa.table({name: pa.array(list(col), typ) for name, col, typ in zip(names, columns, types)}),
+            str(self.db_path / "groups.parquet"),
+        )
+
+    def close(self) -> None:
+        try:
+            self._files_writer.close()
+        except Exception:
+            pass
+
+
+def scan_db_needs_overwrite(db_path: Path) -> bool:
+    """
+    True if writing a scan to db_path would destroy something worth keeping:
+    a finished scan (the baseline for diff_scan_databases) or a file that is
+    not a scan database at all. A scan left unfinished by a pause or crash
+    may be replaced, so re-running the paused command still works.
+    """
+    if db_path.suffix.lower() == ".parquet":
+        return (db_path / "groups.parquet").exists() or (db_path.exists() and not db_path.is_dir())
+    if not db_path.exists():
+        return False
+    try:
+        conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT finished_at FROM scan").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return True
+    return row is None or row[0] is not None
+
+
+def open_scan_sink(db_path: Path, root: Path, overwrite: bool = False):
+    """Return a Parquet sink for ``*.parquet`` targets, otherwise a SQLite ScanDatabase."""
+    if db_path.suffix.lower() == ".parquet":
+        return ParquetScanSink(db_path, root, overwrite)
+    return ScanDatabase(db_path, root, overwrite)
+
+
+def diff_scan_databases(old_db: Path, new_db: Path, limit: int = 100) -> dict:
+    """
+    Compare two SQLite scan databases by path using the path indexes.
+    Returns counts and up to ``limit`` sample paths for added, removed and
+    changed (size or hash differs) files, plus the net byte delta.
+    """
+    conn = sqlite3.connect(f"file:{new_db}?mode=ro", uri=True)
+    # hashes are only comparable when both scans used the same digest
+    conn.create_function("digest_algorithm", 1, digest_algorithm, deterministic=True)
+    conn.create_function("normalize_digest", 1, normalize_digest, deterministic=True)
+    try:
+        conn.execute("ATTACH DATABASE ? AS old", (f"file:{old_db}?mode=ro",))
+        queries = {
+            "added": (
+                "FROM main.files n LEFT JOIN old.files o ON o.path = n.path WHERE o.id IS NULL",
+                "n.path", "n.size",
+            ),
+            "removed": (
+                "FROM old.files o LEFT JOIN main.files n ON n.path = o.path WHERE n.id IS NULL",
+                "o.path", "-o.size",
+            ),
+            "changed": (
+                "FROM main.files n JOIN old.files o ON o.path = n.path "
+                "WHERE n.size != o.size OR n.fast_hash IS NOT o.fast_hash "
+                "OR (n.hash IS NOT NULL AND o.hash IS NOT NULL "
+                "AND digest_algorithm(n.hash) = digest_algorithm(o.hash) "
+                "AND normalize_digest(n.hash) != normalize_digest(o.hash))",
+                "n.path", "n.size - o.size",
+            ),
+        }
+        diff: dict = {"size_delta": 0}
+        for name, (body, path_col, delta_col) in queries.items():
+            count, delta = conn.execute(f"SELECT COUNT(*), COALESCE(SUM({delta_col}), 0) {body}").fetchone()
+            sample = [row[0] for row in conn.execute(f"SELECT {path_col} {body} ORDER BY {path_col} LIMIT ?", (limit,))]
+            diff[name] = {"count": count, "paths": sample}
+            diff["size_delta"] += delta
+        return diff
+    finally:
+        conn.close()
+
+
+def open_export_stream(export_path: Path):
+    """Open a text stream for export, compressing by suffix (.gz, or .zst when zstandard is installed)."""
+    suffix = export_path.suffix.lower()
+    if suffix == ".gz":
+        return gzip.open(export_path, "wt", encoding="utf-8")
+    if suffix in (".zst", ".zstd"):
+        if zstandard is None:
+            raise RuntimeError("zstd export requires the 'zstandard' package.")
+        raw = export_path.open("wb")
+        writer = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(writer, encoding="utf-8")
+    return export_path.open("w", encoding="utf-8")
+
+
+def iter_ndjson_lines(results: ScanResults):
+    """
+    Yield the scan as NDJSON lines, one JSON object per line:
+    - {"type": "scan", ...} header with root and counts
+    - {"type": "file", ...} for every record
+    - {"type": "group", ...} per duplicate group, with reclaimable_bytes
+    - {"type": "near_group", ...} per group of visually similar images
+    - {"type": "link_group", ...} per inode with several hardlinks (already deduplicated)
+    - {"type": "dir_group", ...} per set of identical directories, with the groups they cover
+    - {"type": "metrics", ...} ScanMetrics snapshot, when present
+    - {"type": "summary", ...} extension and category totals
+    Records are materialized one at a time so memory stays flat.
+    """
+    yield json.dumps({
+        "type": "scan",
+        "root": str(results.root),
+        "roots": [str(root) for root in results.roots],
+        "file_count": len(results.files),
+        "duplicate_groups": len(results.duplicates),
+        "digest": results.digest,
+    })
+    for record in results.files:
+        yield json.dumps({"type": "file", **record_to_dict(record)})
+    for hash_value, records in results.duplicates.items():
+        size = records[0].size if records else 0
+        yield json.dumps({
+            "type": "group",
+            "hash": hash_value,
+            "count": len(records),
+            "size": size,
+            "reclaimable_bytes": size * (len(records) - 1),
+            "roots": sorted({str(record.root) for record in records if record.root is not None}),
+            "paths": [str(record.path) for record in records],
+        })
+    for phash_value, records in results.near_duplicates.items():
+        yield json.dumps({
+            "type": "near_group",
+            "phash": phash_value,
+            "count": len(records),
+            "paths": [str(record.path) for record in records],
+        })
+    for inode_key, records in results.hardlinks.items():
+        yield json.dumps({
+            "type": "link_group",
+            "inode": inode_key,
+            "count": len(records),
+            "size": records[0].size if records else 0,
+            "paths": [str(record.path) for record in records],
+        })
+    for digest, found in results.duplicate_dirs.items():
+        yield json.dumps({
+            "type": "dir_group",
+            "digest": digest,
+            "count": len(found.directories),
+            "size": found.size,
+            "file_count": found.file_count,
+            "reclaimable_bytes": found.size * (len(found.directories) - 1),
+            "paths": [str(directory) for directory in found.directories],
+            "groups": found.groups,
+        })
+    if results.metrics is not None:
+        yield json.dumps({"type": "metrics", **results.metrics.snapshot()})
+    yield json.dumps({
+        "type": "summary",
+        "extension_summary": results.by_extension,
+        "category_summary": results.by_category,
+    })
+
+
+class NdjsonExporter(threading.Thread):
+    """Writes iter_ndjson_lines() to disk in the background and reports back via the UI queue."""
+
+    def __init__(self, results: ScanResults, export_path: Path, queue: Queue):
+        super().__init__(daemon=True)
+        self.results = results
+        self.export_path = export_path
+        self.queue = queue
+
+    def run(self) -> None:
+        lines = 0
+        try:
+            with open_export_stream(self.export_path) as stream:
+                for line in iter_ndjson_lines(self.results):
+                    stream.write(line)
+                    stream.write("\n")
+                    lines += 1
+            self.queue.put({"type": "export_done", "path": str(self.export_path), "lines": lines})
+        except Exception as exc:  # pylint: disable=broad-except
+            self.queue.put({"type": "export_error", "message": str(exc)})
+
+
+# Quiet period before a changed path is re-hashed, and the most paths handled per batch.
+WATCH_DEBOUNCE_SECONDS = 1.0
+WATCH_BATCH_LIMIT = 2048
+
+
+class PollingChangeSource:
+    """
+    Fallback change feed when watchdog is not installed: re-walk the roots
+    every interval and report paths that appeared, vanished or changed
+    size/mtime.
+    """
+
+    def __init__(self, roots: list[Path], callback, interval: float = 5.0):
+        self.roots = roots
+        self.callback = callback
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def _snapshot(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for file_path, _dev, _ino in iter_file_entries(root):
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                snapshot[str(file_path)] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _run(self) -> None:
+        previous = self._snapshot()
+        while not self._stop.wait(self.interval):
+            current = self._snapshot()
+            for path, signature in current.items():
+                if previous.get(path) != signature:
+                    self.callback(path)
+            for path in previous.keys() - current.keys():
+                self.callback(path)
+            previous = current
+
+
+class _WatchdogHandler(FileSystemEventHandler):
+    def __init__(self, callback):
+        super().__init__()
+        self._callback = callback
+
+    def on_any_event(self, event) -> None:
+        # Reads and directory mtime bumps say nothing about file contents
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        if event.is_directory and event.event_type == "modified":
+            return
+        self._callback(os.fsdecode(event.src_path))
+        dest_path = getattr(event, "dest_path", "")
+        if dest_path:
+            self._callback(os.fsdecode(dest_path))
+
+
+class WatchdogChangeSource:
+    """Native change feed (inotify on Linux) through the optional watchdog package."""
+
+    def __init__(self, roots: list[Path], callback):
+        self._observer = Observer()
+        handler = _WatchdogHandler(callback)
+        for root in roots:
+            self._observer.schedule(handler, str(root), recursive=True)
+
+    def start(self) -> None:
+        self._observer.start()
+
+    def stop(self) -> None:
+        self._observer.stop()
+        self._observer.join(timeout=2)
+
+
+class DuplicateWatcher(threading.Thread):
+    """
+    Keep finished ScanResults live. Create/modify/delete/move events under the
+    scanned roots are debounced, then handled in batches: changed files are
+    re-fingerprinted, new size/fingerprint collisions are SHA-256 verified,
+    and the file list, duplicate groups, summaries, directory totals and
+    identical folders are updated in place. Similar images and hardlinks
+    need a perceptual pass or a full inode walk, so changed files are only
+    dropped from them and the finding is listed in ScanResults.stale.
+    A "watch_update" message is posted after each batch. Hold ``lock`` while
+    reading the results from another thread.
+    """
+
+    def __init__(
+        self,
+        results: ScanResults,
+        queue: Queue,
+        stop_event: threading.Event,
+        max_workers: int,
+        fast_chunk: int,
+        sha_chunk: int,
+        classifier: FileClassifier | None = None,
+        compute_hashes: bool = True,
+        debounce: float = WATCH_DEBOUNCE_SECONDS,
+        poll_interval: float = 5.0,
+        use_polling: bool = False,
+    ) -> None:
+        super().__init__(daemon=True)
+        self.results = results
+        self.roots = list(results.roots) or [results.root]
+        self.queue = queue
+        self.stop_event = stop_event
+        self.max_workers = max_workers
+        self.compute_hashes = compute_hashes
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling or Observer is None
+        self.lock = threading.Lock()
+        # Reuse the scanner's per-file pipeline (stat, fingerprint, classification) without running a scan
+        self._scanner = FileScanner(
+            self.roots, compute_hashes, queue, stop_event, max_workers, fast_chunk, sha_chunk, classifier,
+            digest=results.digest, tree_threshold=results.tree_threshold, scan_filter=results.scan_filter,
+        )
+        self._pending: dict[str, float] = {}
+        self._pending_lock = threading.Lock()
+        self._index: dict[str, int] = {}
+        self._groups: dict[tuple[int, int | None], set[str]] = defaultdict(set)
+        self._sha_of: dict[str, str] = {}
+        self._by_sha: dict[str, set[str]] = defaultdict(set)
+        # extra hardlinks carry their first link's digest but were never part of a duplicate group
+        self._extra_links = {str(record.path) for records in results.hardlinks.values() for record in records[1:]}
+        for idx, record in enumerate(results.files):
+            path = str(record.path)
+            self._index[path] = idx
+            self._groups[(record.size, record.fast_hash)].add(path)
+            if record.hash_value and path not in self._extra_links:
+                self._sha_of[path] = record.hash_value
+                self._by_sha[record.hash_value].add(path)
+
+    @property
+    def backend(self) -> str:
+        return "polling" if self.use_polling else "watchdog"
+
+    def notify(self, path: str) -> None:
+        """Record an event for path; it is processed once it has been quiet for the debounce period."""
+        with self._pending_lock:
+            self._pending[path] = time.monotonic()
+
+    def run(self) -> None:
+        if self.use_polling:
+            source = PollingChangeSource(self.roots, self.notify, self.poll_interval)
+        else:
+            source = WatchdogChangeSource(self.roots, self.notify)
+        source.start()
+        try:
+            while not self.stop_event.wait(min(0.25, self.debounce)):
+                batch = self._take_settled()
+                if not batch:
+                    continue
+                try:
+                    self._process_batch(batch)
+                except Exception as exc:  # pylint: disable=broad-except
+                    self.queue.put({"type": "error", "message": f"Watch update failed: {exc}"})
+        finally:
+            source.stop()
+            self._scanner._close_segments()
+
+    def _take_settled(self) -> list[str]:
+        cutoff = time.monotonic() - self.debounce
+        with self._pending_lock:
+            settled = [path for path, seen in self._pending.items() if seen <= cutoff][:WATCH_BATCH_LIMIT]
+            for path in settled:
+                del self._pending[path]
+        return settled
+
+    def _wanted(self, path: str) -> bool:
+        root = self._root_for(path)
+        scan_filter = self._scanner.scan_filter
+        return root is not None and (scan_filter is None or scan_filter.allows_path(path, root))
+
+    def _root_for(self, path: str) -> Path | None:
+        for root in self.roots:
+            text = str(root)
+            if path == text or path.startswith(text.rstrip(os.sep) + os.sep):
+                return root
+        return None
+
+    def _expand(self, paths: list[str]) -> set[str]:
+        """Directory events stand for every file below them (moved in, moved away or deleted)."""
+        expanded = set()
+        for path in paths:
+            if os.path.isdir(path):
+                expanded.update(str(file_path) for file_path, _dev, _ino in iter_file_entries(Path(path), self._scanner.scan_filter))
+            elif not os.path.lexists(path) and path not in self._index:
+                prefix = path.rstrip(os.sep) + os.sep
+                expanded.update(known for known in self._index if known.startswith(prefix))
+            else:
+                expanded.add(path)
+        return expanded
+
+    def _process_batch(self, paths: list[str]) -> None:
+        gone: set[str] = set()
+        fresh: list[str] = []
+        for path in self._expand(paths):
+            if os.path.isfile(path) and not os.path.islink(path) and self._wanted(path):
+                fresh.append(path)
+            elif path in self._index:
+                gone.add(path)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            updated: list[FileRecord] = []
+            for path, record in zip(fresh, executor.map(lambda p: self._scanner._process_file(Path(p), self._root_for(p)), fresh)):
+                if record is not None:
+                    updated.append(record)
+                elif path in self._index:
+                    gone.add(path)
+            shas = self._verify(executor, updated, gone) if self.compute_hashes else {}
+
+        added = sum(1 for record in updated if str(record.path) not in self._index)
+        with self.lock:
+            self._apply(updated, gone, shas)
+        self.queue.put({
+            "type": "watch_update",
+            "results": self.results,
+            "added": added,
+            "modified": len(updated) - added,
+            "removed": len(gone),
+        })
+
+    def _verify(self, executor: ThreadPoolExecutor, updated: list[FileRecord], gone: set[str]) -> dict[str, str]:
+        """
+        Digest (with the scan's algorithm) every updated file that now collides
+        with another file, plus unhashed partners. Small files already carry
+        the digest from their single read and are not read again.
+        """
+        changing = gone | {str(record.path) for record in updated}
+        incoming: dict[tuple[int, int | None], list[str]] = defaultdict(list)
+        for record in updated:
+            incoming[(record.size, record.fast_hash)].append(str(record.path))
+        to_hash: dict[str, int] = {}
+        sizes = {str(record.path): record.size for record in updated}
+        digested = {str(record.path) for record in updated if record.hash_value}
+        for key, new_paths in incoming.items():
+            staying = [path for path in self._groups.get(key, ()) if path not in changing]
+            if len(staying) + len(new_paths) < 2:
+                continue
+            for path in new_paths:
+                if path not in digested:
+                    to_hash[path] = sizes[path]
+            for path in staying:
+                if path not in self._sha_of and path not in self._extra_links:
+                    to_hash[path] = key[0]
+        futures = {
+            executor.submit(self._scanner._timed_hash_file, Path(path), size): path
+            for path, size in to_hash.items()
+        }
+        shas = {}
+        for future in as_completed(futures):
+            try:
+                shas[futures[future]] = future.result()
+            except OSError:
+                continue
+        return shas
+
+    def _apply(self, updated: list[FileRecord], gone: set[str], shas: dict[str, str]) -> None:
+        files = self.results.files
+        touched: set[str] = set()
+        changed = gone | {str(record.path) for record in updated}
+        self._extra_links -= changed
+        for path in changed:
+            if path in self._index:
+                self._forget(files[self._index[path]], touched)
+        for record in updated:
+            path = str(record.path)
+            record.hash_value = shas.get(path, record.hash_value)
+            if path in self._index:
+                files[self._index[path]] = record
+            else:
+                self._index[path] = len(files)
+                files.append(record)
+            self._remember(record, touched)
+        # Partners that were never hashed because they had no collision until now
+        for path, sha in shas.items():
+            if path in self._sha_of or path not in self._index:
+                continue
+            record = files[self._index[path]]
+            record.hash_value = sha
+            files[self._index[path]] = record
+            self._sha_of[path] = sha
+            self._by_sha[sha].add(path)
+            touched.add(sha)
+        if gone:
+            removed = sorted(self._index.pop(path) for path in gone)
+            files.remove_many(removed)
+            self._index = {path: idx - bisect_left(removed, idx) for path, idx in self._index.items()}
+        directories = self.results.directories
+        for sha in touched:
+            if directories is not None:
+                for record in self.results.duplicates.get(sha, ()):
+                    directories.remove_duplicate(record.path, record.size)
+            members = self._by_sha.get(sha, ())
+            if len(members) > 1:
+                self.results.duplicates[sha] = [files[self._index[path]] for path in sorted(members)]
+                if directories is not None:
+                    for record in self.results.duplicates[sha]:
+                        directories.add_duplicate(record.path, record.size)
+            else:
+                self.results.duplicates.pop(sha, None)
+        if touched and self.compute_hashes:
+            self.results.duplicate_dirs = find_duplicate_directories(self.results)
+        self._drop_changed(changed, updated)
+        if gone:
+            for groups in (self.results.duplicates, self.results.near_duplicates, self.results.hardlinks):
+                self._reseat(groups)
+
+    def _reseat(self, groups: dict[str, list[FileRecord]]) -> None:
+        """Re-read groups whose records sit at rows that remove_many shifted, so the views write back to their own row."""
+        files = self.results.files
+        for key, records in groups.items():
+            rows = [self._index[str(record.path)] for record in records]
+            if any(getattr(record, "_index", row) != row for record, row in zip(records, rows)):
+                groups[key] = [files[row] for row in rows]
+
+    def _drop_changed(self, changed: set[str], updated: list[FileRecord]) -> None:
+        """Take changed files out of the similar-image and hardlink groups and mark what needs a rescan."""
+        results = self.results
+        for name, groups in (("near_duplicates", results.near_duplicates), ("hardlinks", results.hardlinks)):
+            for key, records in list(groups.items()):
+                kept = [record for record in records if str(record.path) not in changed]
+                if len(kept) == len(records):
+                    continue
+                if len(kept) > 1:
+                    groups[key] = kept
+                else:
+                    del groups[key]
+                results.stale.add(name)
+        # a new or edited image may now resemble another one
+        if any(is_image_record(record) for record in updated):
+            results.stale.add("near_duplicates")
+
+    def _forget(self, record: FileRecord, touched: set[str]) -> None:
+        path = str(record.path)
+        group = self._groups.get((record.size, record.fast_hash))
+        if group is not None:
+            group.discard(path)
+            if not group:
+                del self._groups[(record.size, record.fast_hash)]
+        sha = self._sha_of.pop(path, None)
+        if sha is not None:
+            self._by_sha[sha].discard(path)
+            if not self._by_sha[sha]:
+                del self._by_sha[sha]
+            touched.add(sha)
+        self._adjust(self.results.by_extension, record.extension or "<no extension>", record.size, -1)
+        if record.category:
+            self._adjust(self.results.by_category, record.category, record.size, -1)
+        if self.results.directories is not None:
+            self.results.directories.remove(record.path, record.size)
+
+    def _remember(self, record: FileRecord, touched: set[str]) -> None:
+        path = str(record.path)
+        self._groups[(record.size, record.fast_hash)].add(path)
+        if record.hash_value:
+            self._sha_of[path] = record.hash_value
+            self._by_sha[record.hash_value].add(path)
+            touched.add(record.hash_value)
+        self._adjust(self.results.by_extension, record.extension or "<no extension>", record.size, 1)
+        if record.category:
+            self._adjust(self.results.by_category, record.category, record.size, 1)
+        if self.results.directories is not None:
+            self.results.directories.add(record.path, record.size)
+
+    @staticmethod
+    def _adjust(summary: dict[str, dict[str, float]], key: str, size: int, sign: int) -> None:
+        stats = summary.setdefault(key, {"count": 0, "size": 0})
+        stats["count"] += sign
+        stats["size"] += sign * size
+        if stats["count"] <= 0:
+            del summary[key]
+
+
+# Bytes hashed from the start, middle and end of a file for the distributed sample hash.
+SAMPLE_BYTES = 64 * 1024
+
+
+def sample_hash_file(file_path: Path, size: int) -> tuple[str, str | None]:
+    """
+    Return (sample_hash, sha256_or_None) for the distributed partial index.
+
+    The sample is BLAKE2b over the size plus the first, middle and last
+    SAMPLE_BYTES, so every node produces comparable values without optional
+    packages. Files no larger than three samples are read whole, so their
+    full SHA-256 comes for free and needs no confirmation round.
+    """
+    sample = hashlib.blake2b(size.to_bytes(8, "little"), digest_size=16)
+    with file_path.open("rb") as stream:
+        if size <= 3 * SAMPLE_BYTES:
+            data = stream.read()
+            sample.update(data)
+            return sample.hexdigest(), format_digest("sha256", hashlib.sha256(data))
+        for offset in (0, (size - SAMPLE_BYTES) // 2, size - SAMPLE_BYTES):
+            stream.seek(offset)
+            sample.update(stream.read(SAMPLE_BYTES))
+    return sample.hexdigest(), None
+
+
+@dataclass
+class PartialIndex:
+    """One node's compact view of its files: (path, size, sample hash, full hash when cheap)."""
+    node: str
+    roots: list[str]
+    entries: list[tuple[str, int, str, str | None]] = field(default_factory=list)
+
+    def write(self, out_path: Path) -> None:
+        """gzip NDJSON: a header object, then one [path, size, sample, sha] array per file."""
+        tmp_path = out_path.with_name(out_path.name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as stream:
+            stream.write(json.dumps({"node": self.node, "roots": self.roots}) + "\n")
+            for entry in self.entries:
+                stream.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, out_path)
+
+    @classmethod
+    def read(cls, in_path: Path) -> "PartialIndex":
+        with gzip.open(in_path, "rt", encoding="utf-8") as stream:
+            header = json.loads(stream.readline())
+            entries = [tuple(json.loads(line)) for line in stream if line.strip()]
+        return cls(node=header["node"], roots=header["roots"], entries=entries)
+
+
+def build_partial_index(node: str, roots: list[Path], max_workers: int, stop_event: threading.Event | None = None) -> PartialIndex:
+    """Walk the local roots and sample-hash every file in parallel."""
+    roots = FileScanner._normalize_roots(roots)
+    index = PartialIndex(node=node, roots=[str(root) for root in roots])
+
+    def inspect(file_path: Path):
+        try:
+            size = file_path.stat().st_size
+            sample, sha = sample_hash_file(file_path, size)
+        except OSError:
+            return None
+        return str(file_path), size, sample, sha
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = set()
+        for file_path, _dev, _ino in itertools.chain.from_iterable(iter_file_entries(root) for root in roots):
+            if stop_event is not None and stop_event.is_set():
+                # stop walking every root and drop the queued samples instead of waiting for them
+                for future in futures:
+                    future.cancel()
+                return index
+            futures.add(executor.submit(inspect, file_path))
+            if len(futures) >= max_workers * 4:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                index.entries.extend(entry for entry in (f.result() for f in done) if entry)
+        for future in as_completed(futures):
+            entry = future.result()
+            if entry:
+                index.entries.append(entry)
+    return index
+
+
+def plan_confirmations(indexes: list[PartialIndex]) -> dict[str, list[str]]:
+    """
+    Find (size, sample) keys shared by two or more files anywhere and return,
+    per node, the paths that still need a full hash to confirm the match.
+    """
+    candidates: dict[tuple[int, str], list[tuple[str, str, str | None]]] = defaultdict(list)
+    for index in indexes:
+        for path, size, sample, sha in index.entries:
+            candidates[(size, sample)].append((index.node, path, sha))
+    requests: dict[str, list[str]] = {index.node: [] for index in indexes}
+    for members in candidates.values():
+        if len(members) < 2:
+            continue
+        for node, path, sha in members:
+            if sha is None:
+                requests[node].append(path)
+    return requests
+
+
+def merge_partial_indexes(indexes: list[PartialIndex], confirmations: dict[str, dict[str, str]]) -> dict[str, list[tuple[str, str, int]]]:
+    """
+    Combine node indexes and confirmed hashes into global duplicate groups:
+    sha256 -> [(node, path, size), ...] for every hash seen at least twice.
+    """
+    candidates: dict[tuple[int, str], list[tuple[str, str, str | None]]] = defaultdict(list)
+    for index in indexes:
+        for path, size, sample, sha in index.entries:
+            candidates[(size, sample)].append((index.node, path, sha))
+    groups: dict[str, list[tuple[str, str, int]]] = defaultdict(list)
+    for (size, _sample), members in candidates.items():
+        if len(members) < 2:
+            continue
+        for node, path, sha in members:
+            sha = sha or confirmations.get(node, {}).get(path)
+            if sha is not None:
+                groups[sha].append((node, path, size))
+    return {sha: members for sha, members in groups.items() if len(members) > 1}
+
+
+class RunSuperseded(RuntimeError):
+    """The coordinator started a new run while a node was waiting in the old one."""
+
+
+class FileExchange:
+    """
+    File-based transport between a merge coordinator and scan nodes: a shared
+    directory (local, NFS or SMB) holding a RUN marker and, per run,
+    <run>.<node>.index.ndjson.gz, <run>.<node>.request.json,
+    <run>.<node>.response.json and a final <run>.DONE marker.
+    The coordinator clears earlier runs' files and announces a fresh run id
+    in RUN; nodes join the newest run that is not DONE and never read files
+    of another run, so a reused directory cannot leak stale results.
+    Every file is written under a temporary name and renamed into place, so
+    readers never see partial content.
+    """
+
+    POLL_SECONDS = 0.2
+    RUN_MARKER = "RUN"
+    _RUN_FILE_SUFFIXES = (".index.ndjson.gz", ".request.json", ".response.json", ".DONE", ".tmp")
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.run_id: str | None = None
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, name: str) -> Path:
+        if self.run_id is None:
+            raise RuntimeError("No exchange run: call start_run() or join_run() first")
+        return self.directory / f"{self.run_id}.{name}"
+
+    def _write_json(self, path: Path, payload) -> None:
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _current_run(self) -> str | None:
+        try:
+            return json.loads((self.directory / self.RUN_MARKER).read_text(encoding="utf-8"))["run"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _wait_for(self, paths: list[Path], timeout: float | None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not all(path.exists() for path in paths):
+            if self._current_run() != self.run_id or self._path("DONE").exists():
+                raise RunSuperseded(f"Exchange run {self.run_id} was replaced or finished without us")
+            if deadline is not None and time.monotonic() > deadline:
+                missing = ", ".join(path.name for path in paths if not path.exists())
+                raise TimeoutError(f"Timed out waiting for {missing}")
+            time.sleep(self.POLL_SECONDS)
+
+    def start_run(self) -> str:
+        """Coordinator: remove earlier runs' files, then announce a fresh run id."""
+        for path in self.directory.iterdir():
+            if path.name in (self.RUN_MARKER, "DONE") or path.name.endswith(self._RUN_FILE_SUFFIXES):
+                _unlink_missing_ok(path)
+        self.run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{os.urandom(4).hex()}"
+        self._write_json(self.directory / self.RUN_MARKER, {"run": self.run_id, "started_at": time.time()})
+        return self.run_id
+
+    def join_run(self, timeout: float | None) -> str:
+        """Node: wait for a run the coordinator has announced and not yet finished."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            run_id = self._current_run()
+            if run_id is not None and not (self.directory / f"{run_id}.DONE").exists():
+                self.run_id = run_id
+                return run_id
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("Timed out waiting for the coordinator to start a run")
+            time.sleep(self.POLL_SECONDS)
+
+    def publish_index(self, index: PartialIndex) -> None:
+        index.write(self._path(f"{index.node}.index.ndjson.gz"))
+
+    def wait_for_indexes(self, nodes: list[str] | None, expect: int | None, timeout: float | None) -> list[PartialIndex]:
+        if nodes:
+            paths = [self._path(f"{node}.index.ndjson.gz") for node in nodes]
+            self._wait_for(paths, timeout)
+        else:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while len(paths := sorted(self.directory.glob(f"{self.run_id}.*.index.ndjson.gz"))) < (expect or 1):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for {expect} node indexes ({len(paths)} present)")
+                time.sleep(self.POLL_SECONDS)
+        return [PartialIndex.read(path) for path in paths]
+
+    def send_request(self, node: str, paths: list[str]) -> None:
+        self._write_json(self._path(f"{node}.request.json"), {"paths": paths})
+
+    def wait_for_request(self, node: str, timeout: float | None) -> list[str]:
+        request_path = self._path(f"{node}.request.json")
+        self._wait_for([request_path], timeout)
+        return json.loads(request_path.read_text(encoding="utf-8"))["paths"]
+
+    def send_response(self, node: str, hashes: dict[str, str]) -> None:
+        self._write_json(self._path(f"{node}.response.json"), {"hashes": hashes})
+
+    def wait_for_responses(self, nodes: list[str], timeout: float | None) -> dict[str, dict[str, str]]:
+        paths = [self._path(f"{node}.response.json") for node in nodes]
+        self._wait_for(paths, timeout)
+        return {
+            node: json.loads(path.read_text(encoding="utf-8"))["hashes"]
+            for node, path in zip(nodes, paths)
+        }
+
+    def mark_done(self) -> None:
+        self._write_json(self._path("DONE"), {"finished_at": time.time()})
+
+
+def run_scan_node(node: str, roots: list[Path], exchange: FileExchange, max_workers: int, sha_chunk: int = 1_048_576, timeout: float | None = None) -> int:
+    """Node side: publish the partial index, then hash only the paths the coordinator asks for."""
+    index = build_partial_index(node, roots, max_workers)
+    while True:
+        # (re)join whichever run is current; a coordinator restart mid-wait starts a new one
+        exchange.join_run(timeout)
+        exchange.publish_index(index)
+        try:
+            requested = exchange.wait_for_request(node, timeout)
+            break
+        except RunSuperseded:
+            continue
+    # Only hash files this node reported; a request cannot point us at arbitrary paths
+    known = {path for path, _size, _sample, _sha in index.entries}
+    hashes: dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(FileScanner._hash_file, Path(path), sha_chunk): path
+            for path in requested
+            if path in known
+        }
+        for future in as_completed(futures):
+            try:
+                hashes[futures[future]] = future.result()
+            except OSError:
+                continue
+    exchange.send_response(node, hashes)
+    return len(index.entries)
+
+
+def run_merge_coordinator(exchange: FileExchange, nodes: list[str] | None, expect: int | None, timeout: float | None = None) -> dict[str, list[tuple[str, str, int]]]:
+    """Coordinator side: start a fresh run, merge node indexes, request confirming hashes, return global groups."""
+    exchange.start_run()
+    indexes = exchange.wait_for_indexes(nodes, expect, timeout)
+    requests = plan_confirmations(indexes)
+    for node, paths in requests.items():
+        exchange.send_request(node, paths)
+    confirmations = exchange.wait_for_responses(list(requests), timeout)
+    groups = merge_partial_indexes(indexes, confirmations)
+    exchange.mark_done()
+    return groups
+
+
+# Content-defined chunking (FastCDC-style gear hash) for block-level dedup analysis.
+CDC_AVG_SIZE = 64 * 1024
+CDC_READ_SIZE = 4 * 1024 * 1024
+# Files worth chunking: big archive/backup/disk-image style files
+CHUNK_ANALYSIS_MIN_SIZE = 1024 * 1024
+CHUNK_ANALYSIS_CATEGORIES = ("Archives", "Backups")
+CHUNK_ANALYSIS_EXTENSIONS = frozenset({
+    ".img", ".iso", ".raw", ".vmdk", ".vdi", ".vhd", ".vhdx", ".qcow2", ".dmg",
+    ".tar", ".zip", ".7z", ".gz", ".tgz", ".bak", ".bkf", ".dump", ".sql",
+})
+# Chunks present in more files than this are counted but not expanded into file pairs
+CDC_PAIR_FANOUT_LIMIT = 32
+# Chunk index entries held in memory before a sorted run is spilled to disk
+CDC_INDEX_RUN_ENTRIES = 1_000_000
+# digest, file id, chunk length; big-endian with the digest first so packed entries sort by digest
+_CHUNK_ENTRY = struct.Struct(">16sII")
+# Fixed pseudo-random table; derived from BLAKE2b so every process and run cuts identically
+_GEAR = tuple(int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=8).digest(), "little") for i in range(256))
+_GEAR_TABLE = np.array(_GEAR, dtype=np.uint64) if np is not None else None
+_MASK64 = (1 << 64) - 1
+# The gear hash covers the last 64 bytes; cut tests start after a full window inside the chunk
+_GEAR_WINDOW = 64
+# Positions hashed per NumPy pass; small enough that the uint64 work arrays stay in cache
+_GEAR_BLOCK = 64 * 1024
+
+
+def _cdc_masks(avg_size: int) -> tuple[int, int]:
+    """High-bit masks for normalized chunking: stricter before the average size, looser after."""
+    bits = max(4, avg_size.bit_length() - 1)
+    strict = ((1 << (bits + 1)) - 1) << (64 - bits - 1)
+    loose = ((1 << (bits - 1)) - 1) << (64 - bits + 1)
+    return strict, loose
+
+
+def _find_cut(buffer, start: int, end: int, min_size: int, avg_size: int, strict: int, loose: int) -> int:
+    if end - start <= min_size:
+        return end
+    gear = _GEAR
+    mask64 = _MASK64
+    value = 0
+    # The gear hash only remembers the last 64 bytes, so the first min_size bytes are skipped;
+    # the window before the first candidate is still fed so the hash matches _gear_hashes
+    position = start + min_size
+    normal = min(start + avg_size, end)
+    for byte in buffer[max(start, position - _GEAR_WINDOW):position]:
+        value = ((value << 1) + gear[byte]) & mask64
+    for cut, byte in enumerate(buffer[position:normal], position + 1):
+        value = ((value << 1) + gear[byte]) & mask64
+        if not value & strict:
+            return cut
+    for cut, byte in enumerate(buffer[normal:end], normal + 1):
+        value = ((value << 1) + gear[byte]) & mask64
+        if not value & loose:
+            return cut
+    return end
+
+
+def _gear_cut_offsets(view, masks, block: int = _GEAR_BLOCK) -> list:
+    """
+    For each mask, the sorted offsets (position + 1) where the gear hash of
+    the 64-byte window ending at position has none of the mask's bits set.
+    The window is built by doubling six times (h[i] += h[i - w] << w); work
+    runs in cache-sized blocks that overlap by 63 bytes so every window is
+    complete. Positions in the first 63 bytes see a partial window.
+    """
+    data = np.frombuffer(view, dtype=np.uint8)
+    values = np.empty(block + _GEAR_WINDOW - 1, dtype=np.uint64)
+    shifted = np.empty_like(values)
+    found: list[list] = [[] for _ in masks]
+    for begin in range(0, len(data), block):
+        low = max(0, begin - _GEAR_WINDOW + 1)
+        segment = data[low:begin + block]
+        count = len(segment)
+        hashes = values[:count]
+        np.take(_GEAR_TABLE, segment, out=hashes)
+        width = 1
+        while width < _GEAR_WINDOW:
+            np.left_shift(hashes[:-width], np.uint64(width), out=shifted[:count - width])
+            hashes[width:] += shifted[:count - width]
+            width *= 2
+        for offsets, mask in zip(found, masks):
+            offsets.append(np.flatnonzero((hashes[begin - low:] & np.uint64(mask)) == 0) + (begin + 1))
+    return [np.concatenate(offsets) if offsets else np.empty(0, dtype=np.intp) for offsets in found]
+
+
+class _CutFinder:
+    """
+    Vectorized _find_cut over one buffer: the gear hash of every position is
+    computed once with NumPy and the positions passing each mask are kept as
+    sorted cut offsets, so each chunk boundary is two binary searches.
+    """
+
+    def __init__(self, view, strict: int, loose: int):
+        self.strict_cuts, self.loose_cuts = _gear_cut_offsets(view, (strict, loose))
+
+    def find(self, start: int, end: int, min_size: int, avg_size: int) -> int:
+        if end - start <= min_size:
+            return end
+        position = start + min_size
+        normal = min(start + avg_size, end)
+        for cuts, low, high in ((self.strict_cuts, position, normal), (self.loose_cuts, normal, end)):
+            i = int(np.searchsorted(cuts, low + 1))
+            if i < len(cuts) and cuts[i] <= high:
+                return int(cuts[i])
+        return end
+
+
+def iter_cdc_chunks(stream, avg_size: int = CDC_AVG_SIZE, read_size: int = CDC_READ_SIZE):
+    """
+    Yield (digest, length) for the content-defined chunks of a binary stream.
+    Cut points depend only on nearby content, so an insertion early in a file
+    shifts one chunk instead of all of them. Chunks are between avg_size/4
+    and avg_size*4; memory stays around read_size + one maximum chunk. With
+    NumPy the cut search is vectorized (_CutFinder); the pure-Python
+    _find_cut gives the same cuts.
+    """
+    min_size, max_size = avg_size // 4, avg_size * 4
+    strict, loose = _cdc_masks(avg_size)
+    vectorized = np is not None and min_size >= _GEAR_WINDOW
+    buffer = bytearray()
+    start = 0
+    eof = False
+    while not eof:
+        data = stream.read(read_size)
+        eof = not data
+        # keep only the unconsumed tail, in place, then append the new read
+        del buffer[:start]
+        buffer += data
+        start = 0
+        view = memoryview(buffer)
+        finder = _CutFinder(view, strict, loose) if vectorized and len(buffer) > min_size else None
+        try:
+            # Without EOF only cut once a full maximum chunk is buffered, so cuts never depend on read boundaries
+            while len(buffer) - start >= (1 if eof else max_size):
+                end = min(len(buffer), start + max_size)
+                if finder is not None:
+                    cut = finder.find(start, end, min_size, avg_size)
+                else:
+                    cut = _find_cut(view, start, end, min_size, avg_size, strict, loose)
+                yield hashlib.blake2b(view[start:cut], digest_size=16).digest(), cut - start
+                start = cut
+        finally:
+            # the NumPy arrays and the view pin the buffer; drop them before it is resized
+            finder = None
+            view.release()
+
+
+def chunk_file(path: str, avg_size: int = CDC_AVG_SIZE) -> tuple[str, int, bytes, array]:
+    """Chunk one file: (path, size, concatenated 16-byte digests, chunk lengths). Runs in worker processes."""
+    digests = bytearray()
+    lengths = array("I")
+    with open(path, "rb") as stream:
+        for digest, length in iter_cdc_chunks(stream, avg_size):
+            digests += digest
+            lengths.append(length)
+    return path, sum(lengths), bytes(digests), lengths
+
+
+def is_chunk_analysis_candidate(record: FileRecord) -> bool:
+    if record.size < CHUNK_ANALYSIS_MIN_SIZE:
+        return False
+    if record.category is not None:
+        return record.category in CHUNK_ANALYSIS_CATEGORIES
+    return record.extension in CHUNK_ANALYSIS_EXTENSIONS
+
+
+@dataclass
+class ChunkReport:
+    """Block-level dedup estimate for a set of files."""
+    files: int = 0
+    total_bytes: int = 0
+    unique_bytes: int = 0
+    chunks: int = 0
+    unique_chunks: int = 0
+    # per file: path, size, shared_bytes (in chunks also found in another file), shared_ratio
+    per_file: list[dict] = field(default_factory=list)
+    # most similar file pairs: a, b, shared_bytes, ratio (of the smaller file)
+    pairs: list[dict] = field(default_factory=list)
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        return self.total_bytes - self.unique_bytes
+
+    def to_dict(self) -> dict:
+        return {
+            "files": self.files,
+            "total_bytes": self.total_bytes,
+            "unique_bytes": self.unique_bytes,
+            "reclaimable_bytes": self.reclaimable_bytes,
+            "chunks": self.chunks,
+            "unique_chunks": self.unique_chunks,
+            "per_file": self.per_file,
+            "pairs": self.pairs,
+        }
+
+
+def analyze_chunk_dedup(
+    paths,
+    max_workers: int,
+    avg_size: int = CDC_AVG_SIZE,
+    top_pairs: int = 20,
+    stop_event: threading.Event | None = None,
+    run_entries: int = CDC_INDEX_RUN_ENTRIES,
+    tmp_dir: str | None = None,
+) -> ChunkReport:
+    """
+    Chunk every file in worker processes (the rolling hash is CPU-bound) and
+    index chunk digests to estimate what block-level dedup would reclaim.
+    The index is never held whole: packed (digest, file id, length) entries
+    are sorted in runs of run_entries, spilled to temporary files and
+    k-way merged, as in iter_candidate_groups_external, so memory is one run
+    plus per-file totals however many chunks there are.
+    """
+    report = ChunkReport()
+    files: list[tuple[str, int]] = []
+    with tempfile.TemporaryDirectory(prefix="duperanger-chunks-", dir=tmp_dir) as tmp:
+        runs: list[str] = []
+        buffer: list[bytes] = []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = set()
+            path_iter = iter(paths)
+            while True:
+                for path in path_iter:
+                    futures.add(executor.submit(chunk_file, str(path), avg_size))
+                    if len(futures) >= max_workers * 2:
+                        break
+                if not futures or (stop_event is not None and stop_event.is_set()):
+                    break
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        path, size, digests, lengths = future.result()
+                    except OSError:
+                        continue
+                    file_id = len(files)
+                    files.append((path, size))
+                    report.chunks += len(lengths)
+                    for position, length in enumerate(lengths):
+                        buffer.append(_CHUNK_ENTRY.pack(digests[position * 16:(position + 1) * 16], file_id, length))
+                    if len(buffer) >= run_entries:
+                        buffer.sort()
+                        runs.append(os.path.join(tmp, f"run{len(runs):05d}"))
+                        with open(runs[-1], "wb") as stream:
+                            stream.write(b"".join(buffer))
+                        buffer.clear()
+            for future in futures:
+                future.cancel()
+
+        buffer.sort()
+        shared = [0] * len(files)
+        pair_bytes: dict[tuple[int, int], int] = defaultdict(int)
+        streams = [open(path, "rb") for path in runs]
+        try:
+            merged = heapq.merge(iter(buffer), *(_iter_run(stream, entry_size=_CHUNK_ENTRY.size) for stream in streams))
+            for _digest, entries in itertools.groupby(merged, key=lambda entry: entry[:16]):
+                # bytes of this chunk per file; a chunk repeated inside one file is not shared
+                per_file: dict[int, int] = defaultdict(int)
+                for entry in entries:
+                    _digest_bytes, file_id, length = _CHUNK_ENTRY.unpack(entry)
+                    per_file[file_id] += length
+                report.unique_chunks += 1
+                report.unique_bytes += length
+                if len(per_file) > 1:
+                    for file_id, total in per_file.items():
+                        shared[file_id] += total
+                    if len(per_file) <= CDC_PAIR_FANOUT_LIMIT:
+                        for a, b in itertools.combinations(sorted(per_file), 2):
+                            pair_bytes[(a, b)] += length
+        finally:
+            for stream in streams:
+                stream.close()
+
+    report.files = len(files)
+    report.total_bytes = sum(size for _path, size in files)
+    for (path, size), shared_bytes in zip(files, shared):
+        report.per_file.append({
+            "path": path,
+            "size": size,
+            "shared_bytes": shared_bytes,
+            "shared_ratio": shared_bytes / size if size else 0.0,
+        })
+    for (a, b), shared_bytes in sorted(pair_bytes.items(), key=lambda item: item[1], reverse=True)[:top_pairs]:
+        smaller = min(files[a][1], files[b][1]) or 1
+        report.pairs.append({
+            "a": files[a][0],
+            "b": files[b][0],
+            "shared_bytes": shared_bytes,
+            "ratio": shared_bytes / smaller,
+        })
+    return report
+
+
+class ChunkAnalyzer(threading.Thread):
+    """Runs analyze_chunk_dedup off the UI thread and posts chunk_done / chunk_error."""
+
+    def __init__(self, paths: list[Path], queue: Queue, max_workers: int, stop_event: threading.Event):
+        super().__init__(daemon=True)
+        self.paths = paths
+        self.queue = queue
+        self.max_workers = max_workers
+        self.stop_event = stop_event
+
+    def run(self) -> None:
+        try:
+            report = analyze_chunk_dedup(self.paths, self.max_workers, stop_event=self.stop_event)
+            self.queue.put({"type": "chunk_done", "report": report})
+        except Exception as exc:  # pylint: disable=broad-except
+            self.queue.put({"type": "chunk_error", "message": str(exc)})
+
+
 class FileOrganizerApp:
     def __init__(self, root: tk.Tk) -> None:
         self.root = root
@@ -431,6 +4438,11 @@ class FileOrganizerApp:
         self.queue: Queue = Queue()
         self.stop_event = threading.Event()
         self.scanner: FileScanner | None = None
+        self.exporter: NdjsonExporter | None = None
+        self.watcher: DuplicateWatcher | None = None
+        self.chunk_analyzer: ChunkAnalyzer | None = None
+        self.watch_stop_event = threading.Event()
+        self.pause_event = threading.Event()
         self.current_results: ScanResults | None = None
         self.classifier: FileClassifier | None = None
         # Live incremental UI state (maps for fast updates)
@@ -465,8 +4477,10 @@ class FileOrganizerApp:
         self.path_var = tk.StringVar()
         self.path_entry = ttk.Entry(path_frame, textvariable=self.path_var)
         self.path_entry.grid(column=1, row=0, sticky="ew", padx=6)
+        Tooltip(self.path_entry, f"Separate several directories with '{ROOT_SEPARATOR}' to find duplicates across them.")
 
         ttk.Button(path_frame, text="Browse", command=self._browse_directory).grid(column=2, row=0, padx=6)
+        ttk.Button(path_frame, text="Add", command=self._add_directory).grid(column=3, row=0)
 
         options_frame = ttk.Frame(self.root, padding=(10, 0))
         options_frame.grid(column=0, row=1, sticky="ew")
@@ -475,7 +4489,7 @@ class FileOrganizerApp:
         self.hash_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(
             options_frame,
-            text="Compute SHA-256 hashes (slow; enables duplicate detection)",
+            text="Compute full-content hashes (slow; enables duplicate detection)",
             variable=self.hash_var,
         ).grid(column=0, row=0, sticky="w")
 
@@ -528,7 +4542,7 @@ class FileOrganizerApp:
         self.dup_handle_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(
             actions_frame,
-            text="Handle duplicates (retain oldest/newest, rename others with ._dr_)",
+            text="Handle duplicates (retain oldest/newest, rename or link the others)",
             variable=self.dup_handle_var,
         ).grid(column=0, row=1, sticky="w", pady=(4, 0))
 
@@ -539,6 +4553,27 @@ class FileOrganizerApp:
         ttk.Radiobutton(retain_frame, text="Oldest", variable=self.retain_choice_var, value="oldest").grid(column=1, row=0, sticky="w", padx=(6, 0))
         ttk.Radiobutton(retain_frame, text="Newest", variable=self.retain_choice_var, value="newest").grid(column=2, row=0, sticky="w", padx=(6, 0))
 
+        # Multi-root scans: keep the copy under this root when a group spans roots
+        self.prefer_root_var = tk.StringVar(value=NO_PREFERRED_ROOT)
+        prefer_frame = ttk.Frame(actions_frame)
+        prefer_frame.grid(column=0, row=4, sticky="w", pady=(4, 0))
+        ttk.Label(prefer_frame, text="Prefer root:").grid(column=0, row=0, sticky="w")
+        self.prefer_root_combo = ttk.Combobox(prefer_frame, textvariable=self.prefer_root_var, state="readonly", width=48, values=(NO_PREFERRED_ROOT,))
+        self.prefer_root_combo.grid(column=1, row=0, sticky="w", padx=(6, 0))
+
+        # Duplicate action: rename with ._dr_ (reclaims nothing) or replace with a link to the retained file
+        self.dup_action_var = tk.StringVar(value="rename")
+        ttk.Label(retain_frame, text="Action:").grid(column=3, row=0, sticky="w", padx=(12, 0))
+        dup_action_menu = ttk.OptionMenu(retain_frame, self.dup_action_var, "rename", *DUPLICATE_ACTIONS)
+        dup_action_menu.grid(column=4, row=0, sticky="w", padx=(6, 0))
+        Tooltip(
+            dup_action_menu,
+            "rename: prefix extras with ._dr_ (no space reclaimed)\n"
+            "hardlink: replace extras with hardlinks to the retained file\n"
+            "reflink: copy-on-write clone (btrfs/XFS), falls back to hardlink\n"
+            "Files that cannot be linked fall back to rename.",
+        )
+
         self.dry_run_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(
             actions_frame,
@@ -555,6 +4590,10 @@ class FileOrganizerApp:
         self.stop_button = ttk.Button(buttons_frame, text="Stop", command=self._on_stop_clicked, state="disabled")
         self.stop_button.grid(column=1, row=0)
 
+        self.pause_button = ttk.Button(buttons_frame, text="Pause", command=self._on_pause_clicked, state="disabled")
+        self.pause_button.grid(column=2, row=0, padx=(6, 0))
+        Tooltip(self.pause_button, "Stop now and save progress; scanning the same folders again offers to resume.")
+
         self.progress_var = tk.StringVar(value="Idle")
         ttk.Label(options_frame, textvariable=self.progress_var).grid(column=0, row=3, columnspan=2, sticky="w", pady=(6, 0))
 
@@ -567,6 +4606,26 @@ class FileOrganizerApp:
         ttk.Label(worker_frame, text="Workers:").grid(column=0, row=0, sticky="e")
         self.worker_spin = ttk.Spinbox(worker_frame, from_=1, to=128, width=5, textvariable=self.worker_count_var)
         self.worker_spin.grid(column=1, row=0, sticky="w", padx=(6,0))
+        self.auto_tune_var = tk.BooleanVar(value=False)
+        auto_tune_check = ttk.Checkbutton(worker_frame, text="Auto-tune", variable=self.auto_tune_var)
+        auto_tune_check.grid(column=2, row=0, sticky="w", padx=(8,0))
+        self.io_scheduler_var = tk.BooleanVar(value=False)
+        io_scheduler_check = ttk.Checkbutton(worker_frame, text="Per-device I/O", variable=self.io_scheduler_var)
+        io_scheduler_check.grid(column=3, row=0, sticky="w", padx=(8,0))
+        Tooltip(io_scheduler_check, "Group reads by disk, limit concurrency on HDDs/NAS and read in inode/on-disk order.\nDifferent devices are still hashed in parallel.")
+        self.watch_var = tk.BooleanVar(value=False)
+        watch_check = ttk.Checkbutton(worker_frame, text="Watch", variable=self.watch_var)
+        watch_check.grid(column=4, row=0, sticky="w", padx=(8,0))
+        self.similar_var = tk.BooleanVar(value=False)
+        similar_check = ttk.Checkbutton(worker_frame, text="Similar images", variable=self.similar_var)
+        similar_check.grid(column=5, row=0, sticky="w", padx=(8,0))
+        self.async_io_var = tk.BooleanVar(value=False)
+        async_io_check = ttk.Checkbutton(worker_frame, text="Network I/O", variable=self.async_io_var)
+        async_io_check.grid(column=6, row=0, sticky="w", padx=(8,0))
+        Tooltip(async_io_check, f"For SMB/NFS mounts: an asyncio engine keeps {ASYNC_READ_DEPTH} listings and reads in flight\ninstead of one per worker, hiding per-file network latency.")
+        Tooltip(similar_check, "Also group resized or re-encoded copies of the same picture (perceptual hash).\nRequires Pillow; NumPy enables the more robust DCT hash.")
+        Tooltip(watch_check, "After the scan, keep watching the roots and update duplicates as files change.\nUses inotify through the watchdog package when installed, otherwise polls every few seconds.")
+        Tooltip(auto_tune_check, "Probe the storage and keep adjusting workers and chunk sizes from measured MB/s.\nTuned values are remembered per mount point for the next scan.")
 
         # Chunk sizes for fast hash and sha256 (in MB)
         # fast: integer MB (e.g. 4..32). sha: fractional MB allowed (e.g. 0.5, 1.0)
@@ -580,6 +4639,48 @@ class FileOrganizerApp:
         ttk.Label(chunk_frame, text="SHA chunk (MB):").grid(column=2, row=0, sticky="w")
         self.sha_chunk_entry = ttk.Entry(chunk_frame, textvariable=self.sha_chunk_var, width=6)
         self.sha_chunk_entry.grid(column=3, row=0, sticky="w", padx=(6,0))
+        ttk.Label(chunk_frame, text="Digest:").grid(column=4, row=0, sticky="w", padx=(12,0))
+        self.digest_var = tk.StringVar(value=DEFAULT_DIGEST)
+        digest_combo = ttk.Combobox(
+            chunk_frame, textvariable=self.digest_var, values=("auto", *available_digests()), state="readonly", width=9
+        )
+        digest_combo.grid(column=5, row=0, sticky="w", padx=(6,0))
+        Tooltip(digest_combo, "Verification digest. auto benchmarks SHA-256 and BLAKE3 and picks the faster; the choice can differ between runs.\nSHA-256 is always available; BLAKE3 needs the blake3 package. xxh3-128 (with xxhash) is fast but not cryptographic.")
+
+        # Optional scan database output (SQLite, or Parquet directory when pyarrow is installed)
+        self.scan_db_var = tk.StringVar(value="")
+        db_frame = ttk.Frame(options_frame)
+        db_frame.grid(column=0, row=8, columnspan=2, sticky="w", pady=(6,0))
+        ttk.Label(db_frame, text="Scan database (optional):").grid(column=0, row=0, sticky="w")
+        self.scan_db_entry = ttk.Entry(db_frame, textvariable=self.scan_db_var, width=48)
+        self.scan_db_entry.grid(column=1, row=0, sticky="w", padx=(6,0))
+        ttk.Button(db_frame, text="Browse", command=self._browse_scan_db).grid(column=2, row=0, sticky="w", padx=(6,0))
+        Tooltip(self.scan_db_entry, "Write files, hashes, categories and duplicate groups to SQLite (.db) during the scan.\nUse a .parquet path to write a Parquet directory instead (requires pyarrow).")
+
+        # Walk-time filters; a selected rule set fills the fields, which can then be edited and saved
+        self.filter_set_var = tk.StringVar(value=NO_FILTER_SET)
+        self.filter_dirs_var = tk.StringVar(value="")
+        self.filter_files_var = tk.StringVar(value="")
+        self.filter_min_kb_var = tk.StringVar(value="")
+        filter_frame = ttk.Frame(options_frame)
+        filter_frame.grid(column=0, row=9, columnspan=2, sticky="w", pady=(6,0))
+        ttk.Label(filter_frame, text="Filter set:").grid(column=0, row=0, sticky="w")
+        self.filter_set_combo = ttk.Combobox(
+            filter_frame, textvariable=self.filter_set_var, values=(NO_FILTER_SET, *sorted(load_filter_sets())), state="readonly", width=14
+        )
+        self.filter_set_combo.grid(column=1, row=0, sticky="w", padx=(6,8))
+        self.filter_set_combo.bind("<<ComboboxSelected>>", lambda _event: self._on_filter_set_selected())
+        ttk.Label(filter_frame, text="Skip folders:").grid(column=2, row=0, sticky="w")
+        filter_dirs_entry = ttk.Entry(filter_frame, textvariable=self.filter_dirs_var, width=28)
+        filter_dirs_entry.grid(column=3, row=0, sticky="w", padx=(6,8))
+        ttk.Label(filter_frame, text="Skip files:").grid(column=4, row=0, sticky="w")
+        filter_files_entry = ttk.Entry(filter_frame, textvariable=self.filter_files_var, width=20)
+        filter_files_entry.grid(column=5, row=0, sticky="w", padx=(6,8))
+        ttk.Label(filter_frame, text="Min KB:").grid(column=6, row=0, sticky="w")
+        ttk.Entry(filter_frame, textvariable=self.filter_min_kb_var, width=6).grid(column=7, row=0, sticky="w", padx=(6,8))
+        ttk.Button(filter_frame, text="Save set", command=self._save_filter_set).grid(column=8, row=0, sticky="w")
+        Tooltip(filter_dirs_entry, "Comma-separated folder globs (e.g. .git, node_modules, build/cache).\nMatching folders are never entered, so nothing below them is read.")
+        Tooltip(filter_files_entry, "Comma-separated file globs to skip (e.g. *.tmp, Thumbs.db).\nExtension, include and regex rules come from the selected set.")
 
         # Tooltips with recommendations
         Tooltip(self.fast_chunk_entry, "Fast chunk (MB): 4–16 MB recommended for local NVMe; 1–4 MB for SMB/NAS.")
@@ -609,6 +4710,40 @@ class FileOrganizerApp:
         )
         notebook.add(self.duplicates_tree, text="Duplicates")
 
+        self.folders_tree = self._create_tree(
+            notebook,
+            columns=("count", "files", "size"),
+            headings={"#0": "Folder", "count": "Copies", "files": "Files", "size": "Size (MB)"},
+            widths={"#0": 460, "count": 80, "files": 80, "size": 100},
+        )
+        notebook.add(self.folders_tree, text="Duplicate Folders")
+
+        self.space_tree = self._create_tree(
+            notebook,
+            columns=("files", "size", "wasted"),
+            headings={"#0": "Folder", "files": "Files", "size": "Size (MB)", "wasted": "Duplicate (MB)"},
+            widths={"#0": 460, "files": 80, "size": 100, "wasted": 120},
+        )
+        # folders are listed one level at a time, when their parent is expanded
+        self.space_tree.bind("<<TreeviewOpen>>", lambda _event: self._expand_space_node())
+        notebook.add(self.space_tree, text="Wasted Space")
+
+        self.similar_tree = self._create_tree(
+            notebook,
+            columns=("count", "sample"),
+            headings={"#0": "Perceptual hash", "count": "Images", "sample": "Sample file"},
+            widths={"#0": 200, "count": 100, "sample": 540},
+        )
+        notebook.add(self.similar_tree, text="Similar Images")
+
+        self.links_tree = self._create_tree(
+            notebook,
+            columns=("count", "size", "sample"),
+            headings={"#0": "Inode", "count": "Links", "size": "Size (MB)", "sample": "Sample file"},
+            widths={"#0": 200, "count": 80, "size": 100, "sample": 460},
+        )
+        notebook.add(self.links_tree, text="Already Linked")
+
         self.categories_tree = self._create_tree(
             notebook,
             columns=("count", "size"),
@@ -622,8 +4757,17 @@ class FileOrganizerApp:
         summary_frame.columnconfigure(0, weight=1)
 
         ttk.Button(summary_frame, text="Export summary", command=self._export_summary).grid(column=0, row=0, sticky="w")
-        ttk.Button(summary_frame, text="Show HF cache", command=self._show_hf_cache).grid(column=1, row=0, sticky="w", padx=(8,0))
-        ttk.Button(summary_frame, text="Apply Actions", command=self._on_apply_actions).grid(column=2, row=0, sticky="w", padx=(8,0))
+        ttk.Button(summary_frame, text="Export records (NDJSON)", command=self._export_ndjson).grid(column=1, row=0, sticky="w", padx=(8,0))
+        ttk.Button(summary_frame, text="Compare scan DBs", command=self._compare_scan_dbs).grid(column=2, row=0, sticky="w", padx=(8,0))
+        ttk.Button(summary_frame, text="Show HF cache", command=self._show_hf_cache).grid(column=3, row=0, sticky="w", padx=(8,0))
+        ttk.Button(summary_frame, text="Apply Actions", command=self._on_apply_actions).grid(column=4, row=0, sticky="w", padx=(8,0))
+        chunk_button = ttk.Button(summary_frame, text="Chunk analysis", command=self._on_chunk_analysis)
+        chunk_button.grid(column=5, row=0, sticky="w", padx=(8,0))
+        Tooltip(chunk_button, "Estimate block-level dedup for archives, backups and disk images (>= 1 MB)\nthat are similar but not byte-identical.")
+
+        # Live throughput metrics (files/s, MB/s, worker utilization, queue depth)
+        self.metrics_var = tk.StringVar(value="")
+        ttk.Label(summary_frame, textvariable=self.metrics_var, foreground="#555555").grid(column=0, row=1, columnspan=6, sticky="w", pady=(6,0))
 
     def _create_tree(self, parent, columns, headings, widths):
         tree = ttk.Treeview(parent, columns=columns, show="tree headings", selectmode="browse")
@@ -647,20 +4791,118 @@ class FileOrganizerApp:
         if directory:
             self.path_var.set(directory)
 
+    def _add_directory(self) -> None:
+        """Append another root for a multi-root scan."""
+        directory = filedialog.askdirectory()
+        if not directory:
+            return
+        current = self.path_var.get().strip()
+        self.path_var.set(f"{current}{ROOT_SEPARATOR}{directory}" if current else directory)
+
+    def _selected_roots(self) -> list[Path]:
+        return [Path(part.strip()) for part in self.path_var.get().split(ROOT_SEPARATOR) if part.strip()]
+
+    def _on_filter_set_selected(self) -> None:
+        rules = load_filter_sets().get(self.filter_set_var.get(), {})
+        self.filter_dirs_var.set(", ".join(rules.get("exclude_dirs", [])))
+        self.filter_files_var.set(", ".join(rules.get("exclude", [])))
+        min_size = rules.get("min_size", 0)
+        self.filter_min_kb_var.set(f"{min_size / 1024:g}" if min_size else "")
+
+    def _filter_rules(self) -> dict:
+        """Selected rule set with the editable fields applied on top; ValueError for a bad size."""
+        rules = dict(load_filter_sets().get(self.filter_set_var.get(), {}))
+        rules["exclude_dirs"] = [part.strip() for part in self.filter_dirs_var.get().split(",") if part.strip()]
+        rules["exclude"] = [part.strip() for part in self.filter_files_var.get().split(",") if part.strip()]
+        min_kb = self.filter_min_kb_var.get().strip()
+        rules["min_size"] = int(float(min_kb) * 1024) if min_kb else 0
+        return rules
+
+    def _save_filter_set(self) -> None:
+        current = self.filter_set_var.get()
+        name = simpledialog.askstring(
+            "Save filter set", "Name for these rules:", initialvalue="" if current == NO_FILTER_SET else current, parent=self.root
+        )
+        if not name or name == NO_FILTER_SET:
+            return
+        try:
+            save_filter_set(name, ScanFilter.from_dict(self._filter_rules()))
+        except (OSError, ValueError, re.error) as exc:
+            messagebox.showerror("Save filter set", str(exc))
+            return
+        self.filter_set_combo.configure(values=(NO_FILTER_SET, *sorted(load_filter_sets())))
+        self.filter_set_var.set(name)
+
+    def _browse_scan_db(self) -> None:
+        db_path = filedialog.asksaveasfilename(
+            defaultextension=".db",
+            filetypes=(("SQLite database", "*.db"), ("Parquet directory", "*.parquet"), ("All Files", "*.*")),
+            initialfile="duperanger_scan.db",
+        )
+        if db_path:
+            self.scan_db_var.set(db_path)
+
+    def _compare_scan_dbs(self) -> None:
+        """Diff two SQLite scan databases and summarize what changed."""
+        filetypes = (("SQLite database", "*.db"), ("All Files", "*.*"))
+        old_db = filedialog.askopenfilename(title="Older scan database", filetypes=filetypes)
+        if not old_db:
+            return
+        new_db = filedialog.askopenfilename(title="Newer scan database", filetypes=filetypes)
+        if not new_db:
+            return
+        try:
+            diff = diff_scan_databases(Path(old_db), Path(new_db), limit=10)
+        except sqlite3.Error as exc:
+            messagebox.showerror("Compare failed", str(exc))
+            return
+        lines = [f"Net size change: {diff['size_delta'] / (1024 * 1024):+.2f} MB", ""]
+        for name in ("added", "removed", "changed"):
+            lines.append(f"{name.capitalize()}: {diff[name]['count']}")
+            lines.extend(f"  {path}" for path in diff[name]["paths"])
+        messagebox.showinfo("Scan database diff", "\n".join(lines))
+
     def _on_scan_clicked(self) -> None:
-        path_value = self.path_var.get().strip()
-        if not path_value:
+        roots = self._selected_roots()
+        if not roots:
             messagebox.showwarning("Missing path", "Please select a directory to scan.")
             return
 
-        root_path = Path(path_value)
-        if not root_path.exists() or not root_path.is_dir():
-            messagebox.showerror("Invalid path", "The selected path does not exist or is not a directory.")
-            return
+        for root_path in roots:
+            if not root_path.exists() or not root_path.is_dir():
+                messagebox.showerror("Invalid path", f"The selected path does not exist or is not a directory:\n{root_path}")
+                return
 
         if self.scanner and self.scanner.is_alive():
             messagebox.showinfo("Scan in progress", "A scan is already running.")
             return
+        self._stop_watcher()
+
+        if self.similar_var.get() and Image is None:
+            messagebox.showwarning("Pillow missing", "Similar image detection needs Pillow:\n pip install pillow")
+            return
+
+        checkpoint = default_checkpoint_path()
+        resume = ScanCheckpoint.load(checkpoint) if checkpoint.exists() else None
+        if resume is not None and not resume.matches(FileScanner._normalize_roots(roots)):
+            resume = None
+        if resume is not None and not messagebox.askyesno(
+            "Resume scan", f"A paused scan of these folders has {len(resume)} finished files.\nResume it? (No starts over)"
+        ):
+            checkpoint.unlink(missing_ok=True)
+            resume = None
+
+        try:
+            scan_filter = ScanFilter.from_dict(self._filter_rules())
+        except (ValueError, re.error) as exc:
+            messagebox.showerror("Invalid filter", str(exc))
+            return
+
+        scan_db = Path(self.scan_db_var.get().strip()) if self.scan_db_var.get().strip() else None
+        if scan_db is not None and scan_db_needs_overwrite(scan_db) and not messagebox.askyesno(
+            "Replace scan database", f"{scan_db} already exists (a finished scan or another file).\nReplace it? (No cancels the scan)"
+        ):
+            return
 
         classifier = None
         if self.classifier_var.get():
@@ -674,12 +4916,13 @@ class FileOrganizerApp:
         self._cat_items.clear()
 
         self._set_ui_state(scanning=True)
-        self.progress_var.set(f"Scanning {root_path} ...")
+        self.progress_var.set(f"Scanning {', '.join(str(root) for root in roots)} ...")
         self.stop_event.clear()
+        self.pause_event.clear()
         self._clear_results()
 
         self.scanner = FileScanner(
-            root_path=root_path,
+            root_path=roots,
             compute_hashes=self.hash_var.get(),
             queue=self.queue,
             stop_event=self.stop_event,
@@ -687,6 +4930,18 @@ class FileOrganizerApp:
             fast_chunk=int(self.fast_chunk_var.get() * 1024 * 1024),
             sha_chunk=int(float(self.sha_chunk_var.get()) * 1024 * 1024),
             classifier=classifier,
+            scan_db=scan_db,
+            # the user confirmed above (or there was nothing to keep)
+            overwrite_db=True,
+            auto_tune=self.auto_tune_var.get(),
+            io_scheduler=self.io_scheduler_var.get(),
+            perceptual=self.similar_var.get(),
+            checkpoint=checkpoint,
+            pause_event=self.pause_event,
+            resume=resume,
+            digest=self.digest_var.get(),
+            engine="async" if self.async_io_var.get() else "threads",
+            scan_filter=scan_filter,
         )
         self.scanner.start()
 
@@ -694,6 +4949,59 @@ class FileOrganizerApp:
         if self.scanner and self.scanner.is_alive():
             self.stop_event.set()
             self.progress_var.set("Stopping scan ...")
+        elif self.watcher and self.watcher.is_alive():
+            self._stop_watcher()
+            self._set_ui_state(scanning=False)
+            self.progress_var.set("Stopped watching")
+
+    def _on_pause_clicked(self) -> None:
+        if self.scanner and self.scanner.is_alive():
+            self.pause_event.set()
+            self.stop_event.set()
+            self.progress_var.set("Pausing scan ...")
+
+    def _start_watcher(self, results: ScanResults) -> None:
+        self.watch_stop_event.clear()
+        self.watcher = DuplicateWatcher(
+            results,
+            self.queue,
+            self.watch_stop_event,
+            max_workers=self._determine_worker_count(),
+            fast_chunk=int(self.fast_chunk_var.get() * 1024 * 1024),
+            sha_chunk=int(float(self.sha_chunk_var.get()) * 1024 * 1024),
+            classifier=self.scanner.classifier if self.scanner else None,
+            compute_hashes=self.hash_var.get(),
+        )
+        self.watcher.start()
+        # Stop stays enabled so the watch can be ended
+        self.stop_button.configure(state="normal")
+        self.progress_var.set(f"Watching {len(results.files)} files for changes ({self.watcher.backend})")
+
+    def _stop_watcher(self) -> None:
+        if self.watcher and self.watcher.is_alive():
+            self.watch_stop_event.set()
+            self.watcher.join(timeout=2)
+        self.watcher = None
+
+    def _results_lock(self):
+        """The watcher's lock while watch mode runs; hold it to read groups the watcher rewrites."""
+        return self.watcher.lock if self.watcher is not None else nullcontext()
+
+    def _handle_watch_update(self, message: dict) -> None:
+        if self.watcher is None:
+            return
+        with self.watcher.lock:
+            self._handle_results(message["results"])
+            file_count = len(message["results"].files)
+            stale = sorted(message["results"].stale)
+        status = (
+            f"Watching: +{message.get('added', 0)} ~{message.get('modified', 0)} -{message.get('removed', 0)} "
+            f"({file_count} files, {len(self.current_results.duplicates)} duplicate groups)"
+        )
+        if stale:
+            labels = {"near_duplicates": "similar images", "hardlinks": "hardlinks"}
+            status += f"; rescan required for {' and '.join(labels[name] for name in stale)}"
+        self.progress_var.set(status)
 
     def _poll_queue(self) -> None:
         try:
@@ -709,12 +5017,32 @@ class FileOrganizerApp:
                         self._handle_record(record)
                         # update progress with the path as well
                         self.progress_var.set(f"Scanning: {getattr(record, 'path', '')}")
+                elif message_type == "metrics":
+                    self.metrics_var.set(message.get("status", ""))
                 elif message_type == "done":
                     self._handle_results(message["results"])
+                    self._sync_tuned_settings()
+                    self._set_ui_state(scanning=False)
+                    if self.watch_var.get() and not self.stop_event.is_set():
+                        self._start_watcher(message["results"])
+                elif message_type == "paused":
                     self._set_ui_state(scanning=False)
+                    self.progress_var.set(
+                        f"Paused after {message.get('files', 0)} files; scan the same folders again to resume"
+                    )
+                elif message_type == "watch_update":
+                    self._handle_watch_update(message)
                 elif message_type == "error":
                     messagebox.showerror("Scan error", message.get("message", "Unknown error"))
                     self._set_ui_state(scanning=False)
+                elif message_type == "export_done":
+                    self.progress_var.set(f"Exported {message.get('lines', 0)} lines to {message.get('path', '')}")
+                elif message_type == "export_error":
+                    messagebox.showerror("Export failed", message.get("message", "Unknown error"))
+                elif message_type == "chunk_done":
+                    self._show_chunk_report(message["report"])
+                elif message_type == "chunk_error":
+                    messagebox.showerror("Chunk analysis failed", message.get("message", "Unknown error"))
         except Empty:
             pass
         finally:
@@ -722,11 +5050,31 @@ class FileOrganizerApp:
 
     def _handle_results(self, results: ScanResults) -> None:
         self.current_results = results
-        self.progress_var.set(f"Scan complete: {len(results.files)} files")
+        root_choices = (NO_PREFERRED_ROOT, *(str(root) for root in results.roots))
+        self.prefer_root_combo.configure(values=root_choices)
+        if self.prefer_root_var.get() not in root_choices:
+            self.prefer_root_var.set(NO_PREFERRED_ROOT)
+        status = f"Scan complete: {len(results.files)} files"
+        if results.scan_filter is not None:
+            status += f" (filter skipped {results.scan_filter.skipped_files} files, {results.scan_filter.skipped_dirs} folders)"
+        self.progress_var.set(status)
         self._populate_extensions(results)
         self._populate_duplicates(results)
+        self._populate_folders(results)
+        self._populate_space(results)
+        self._populate_similar(results)
+        self._populate_links(results)
         self._populate_categories(results)
 
+    def _sync_tuned_settings(self) -> None:
+        """Reflect the auto-tuned workers/chunk sizes in the tuning widgets."""
+        tuner = self.scanner.tuner if self.scanner else None
+        if tuner is None:
+            return
+        self.worker_count_var.set(tuner.workers)
+        self.fast_chunk_var.set(max(1, tuner.fast_chunk // (1024 * 1024)))
+        self.sha_chunk_var.set(round(tuner.sha_chunk / (1024 * 1024), 2))
+
     def _populate_extensions(self, results: ScanResults) -> None:
         for item in self.extensions_tree.get_children():
             self.extensions_tree.delete(item)
@@ -819,6 +5167,66 @@ class FileOrganizerApp:
         if not duplicate_items and self.hash_var.get():
             self.progress_var.set("Scan complete: no duplicate hashes detected")
 
+    def _populate_similar(self, results: ScanResults) -> None:
+        for item in self.similar_tree.get_children():
+            self.similar_tree.delete(item)
+        for phash_value, records in sorted(results.near_duplicates.items(), key=lambda item: len(item[1]), reverse=True):
+            group_id = self.similar_tree.insert("", tk.END, text=phash_value, values=(len(records), str(records[0].path)))
+            for record in records:
+                self.similar_tree.insert(group_id, tk.END, text="", values=("", str(record.path)))
+
+    def _populate_folders(self, results: ScanResults) -> None:
+        """One row per set of identical folders; each stands in for the file groups listed under Duplicates."""
+        for item in self.folders_tree.get_children():
+            self.folders_tree.delete(item)
+        for found in sorted(results.duplicate_dirs.values(), key=lambda found: found.size, reverse=True):
+            size_mb = found.size / (1024 * 1024)
+            group_id = self.folders_tree.insert(
+                "", tk.END, text=str(found.directories[0]), values=(len(found.directories), found.file_count, f"{size_mb:.2f}")
+            )
+            for directory in found.directories:
+                self.folders_tree.insert(group_id, tk.END, text=str(directory), values=("", "", ""))
+
+    def _populate_space(self, results: ScanResults) -> None:
+        """Scan roots with rolled-up totals; subfolders are filled in by _expand_space_node."""
+        for item in self.space_tree.get_children():
+            self.space_tree.delete(item)
+        if results.directories is None:
+            return
+        for directory in results.directories.roots():
+            self._insert_space_node("", directory, results.directories.totals(directory))
+
+    def _insert_space_node(self, parent: str, directory: str, totals: dict[str, int]) -> None:
+        text = directory if not parent else os.path.basename(directory)
+        values = (totals["files"], f"{totals['bytes'] / (1024 * 1024):.2f}", f"{totals['duplicate_bytes'] / (1024 * 1024):.2f}")
+        self.space_tree.insert(parent, tk.END, iid=directory, text=text, values=values)
+        if self.current_results.directories.has_children(directory):
+            # placeholder so the expand arrow shows
+            self.space_tree.insert(directory, tk.END, text="")
+
+    def _expand_space_node(self) -> None:
+        directory = self.space_tree.focus()
+        if not directory or self.current_results is None or self.current_results.directories is None:
+            return
+        placeholders = [item for item in self.space_tree.get_children(directory) if not self.space_tree.item(item, "text")]
+        if not placeholders:
+            return
+        self.space_tree.delete(*placeholders)
+        for child, totals in self.current_results.directories.children(directory):
+            self._insert_space_node(directory, child, totals)
+
+    def _populate_links(self, results: ScanResults) -> None:
+        """Hardlinked files share one copy on disk: listed separately, never counted as reclaimable."""
+        for item in self.links_tree.get_children():
+            self.links_tree.delete(item)
+        for inode_key, records in sorted(results.hardlinks.items(), key=lambda item: item[1][0].size, reverse=True):
+            size_mb = records[0].size / (1024 * 1024)
+            group_id = self.links_tree.insert(
+                "", tk.END, text=inode_key, values=(len(records), f"{size_mb:.2f}", str(records[0].path))
+            )
+            for record in records:
+                self.links_tree.insert(group_id, tk.END, text="", values=("", "", str(record.path)))
+
     def _populate_categories(self, results: ScanResults) -> None:
         for item in self.categories_tree.get_children():
             self.categories_tree.delete(item)
@@ -889,14 +5297,7 @@ with Hugging Face transformers for intelligent organization."""
         if isinstance(obj, Path):
             return str(obj)
         if isinstance(obj, FileRecord):
-            return {
-                "path": str(obj.path),
-                "size": obj.size,
-                "extension": obj.extension,
-                "mime": obj.mime,
-                "hash": obj.hash_value,
-                "category": obj.category,
-            }
+            return record_to_dict(obj)
         raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
     def _export_summary(self) -> None:
@@ -913,31 +5314,122 @@ with Hugging Face transformers for intelligent organization."""
             return
 
         try:
-            data = {
-                "root": str(self.current_results.root),
-                "extension_summary": self.current_results.by_extension,
-                "category_summary": self.current_results.by_category,
-                "duplicates": {
-                    hash_value: [str(record.path) for record in records]
-                    for hash_value, records in self.current_results.duplicates.items()
-                },
-            }
+            with self._results_lock():
+                data = self._summary_data()
             with open(export_path, "w", encoding="utf-8") as stream:
                 json.dump(data, stream, indent=2)
             messagebox.showinfo("Export complete", f"Summary saved to {export_path}")
         except OSError as exc:
             messagebox.showerror("Export failed", str(exc))
 
+    def _summary_data(self) -> dict:
+        data = {
+            "root": str(self.current_results.root),
+            "digest": self.current_results.digest,
+            "extension_summary": self.current_results.by_extension,
+            "category_summary": self.current_results.by_category,
+            "duplicates": {
+                hash_value: [str(record.path) for record in records]
+                for hash_value, records in self.current_results.duplicates.items()
+            },
+            "near_duplicates": {
+                phash_value: [str(record.path) for record in records]
+                for phash_value, records in self.current_results.near_duplicates.items()
+            },
+            "hardlinks": {
+                inode_key: [str(record.path) for record in records]
+                for inode_key, records in self.current_results.hardlinks.items()
+            },
+            "top_directories": [
+                {"path": directory, **totals}
+                for directory, totals in (
+                    self.current_results.directories.top(50) if self.current_results.directories is not None else ()
+                )
+            ],
+            "duplicate_dirs": {
+                digest: {
+                    "paths": [str(directory) for directory in found.directories],
+                    "size": found.size,
+                    "file_count": found.file_count,
+                    "groups": found.groups,
+                }
+                for digest, found in self.current_results.duplicate_dirs.items()
+            },
+        }
+        if self.current_results.metrics is not None:
+            data["metrics"] = self.current_results.metrics.snapshot()
+        return data
+
+    def _export_ndjson(self) -> None:
+        """Stream every file record and duplicate group to NDJSON on a background thread."""
+        if not self.current_results:
+            messagebox.showinfo("No data", "Run a scan before exporting.")
+            return
+
+        filetypes = [("NDJSON Files", "*.ndjson"), ("Gzipped NDJSON", "*.ndjson.gz")]
+        if zstandard is not None:
+            filetypes.append(("Zstd NDJSON", "*.ndjson.zst"))
+        filetypes.append(("All Files", "*.*"))
+        export_path = filedialog.asksaveasfilename(
+            defaultextension=".ndjson",
+            filetypes=filetypes,
+            initialfile="zfs_scan_records.ndjson",
+        )
+        if not export_path:
+            return
+
+        if self.exporter and self.exporter.is_alive():
+            messagebox.showinfo("Export in progress", "An export is already running.")
+            return
+        self.exporter = NdjsonExporter(self.current_results, Path(export_path), self.queue)
+        self.exporter.start()
+        self.progress_var.set(f"Exporting records to {export_path} ...")
+
+    def _on_chunk_analysis(self) -> None:
+        if not self.current_results:
+            messagebox.showinfo("No data", "Run a scan before the chunk analysis.")
+            return
+        if self.chunk_analyzer and self.chunk_analyzer.is_alive():
+            messagebox.showinfo("Analysis in progress", "A chunk analysis is already running.")
+            return
+        paths = [record.path for record in self.current_results.files if is_chunk_analysis_candidate(record)]
+        if len(paths) < 2:
+            messagebox.showinfo("Chunk analysis", "Fewer than two archive/backup/image files of 1 MB or more were found.")
+            return
+        self.chunk_analyzer = ChunkAnalyzer(paths, self.queue, max(1, os.cpu_count() or 1), self.stop_event)
+        self.chunk_analyzer.start()
+        self.progress_var.set(f"Chunking {len(paths)} files for block-level dedup analysis ...")
+
+    def _show_chunk_report(self, report: ChunkReport) -> None:
+        mb = 1024 * 1024
+        lines = [
+            f"Files analysed: {report.files} ({report.total_bytes / mb:.1f} MB)",
+            f"Unique chunks: {report.unique_chunks} of {report.chunks}",
+            f"Reclaimable with block-level dedup: {report.reclaimable_bytes / mb:.1f} MB",
+        ]
+        if report.pairs:
+            lines.append("")
+            lines.append("Most similar files:")
+            for pair in report.pairs[:5]:
+                lines.append(f"  {pair['ratio']:.0%}  {Path(pair['a']).name} <-> {Path(pair['b']).name}")
+        self.progress_var.set(f"Chunk analysis: {report.reclaimable_bytes / mb:.1f} MB reclaimable at block level")
+        messagebox.showinfo("Chunk analysis", "\n".join(lines))
+
     def _set_ui_state(self, scanning: bool) -> None:
         if scanning:
             self.scan_button.configure(state="disabled")
             self.stop_button.configure(state="normal")
+            self.pause_button.configure(state="normal")
         else:
             self.scan_button.configure(state="normal")
             self.stop_button.configure(state="disabled")
+            self.pause_button.configure(state="disabled")
 
     def _clear_results(self) -> None:
-        for tree in (self.extensions_tree, self.duplicates_tree, self.categories_tree):
+        for tree in (
+            self.extensions_tree, self.duplicates_tree, self.folders_tree, self.space_tree, self.similar_tree,
+            self.links_tree, self.categories_tree,
+        ):
             for item in tree.get_children():
                 tree.delete(item)
         self.current_results = None
@@ -1053,33 +5545,68 @@ with Hugging Face transformers for intelligent organization."""
         self.root.update_idletasks()
 
         try:
-            self._apply_actions(dry_run)
+            reclaimed = self._apply_actions(dry_run)
             self.progress_var.set(f"Actions complete ({mode.lower()}).")
             if dry_run:
                 messagebox.showinfo("Dry Run Complete", "Preview shown. Uncheck 'Dry-run' to apply changes.")
             else:
-                messagebox.showinfo("Actions Applied", "Changes have been applied. Consider creating a ZFS snapshot for recovery.")
+                reclaimed_mb = reclaimed / (1024 * 1024)
+                messagebox.showinfo(
+                    "Actions Applied",
+                    f"Changes have been applied. Reclaimed {reclaimed_mb:.2f} MB.\n"
+                    "Consider creating a ZFS snapshot for recovery.",
+                )
         except Exception as exc:
             messagebox.showerror("Action Failed", f"Error during actions: {exc}")
             self.progress_var.set("Actions failed.")
 
+    def _split_duplicate_group(self, records: list[FileRecord]) -> tuple[FileRecord | None, list[FileRecord]]:
+        """
+        Return (primary, extras) for a duplicate group according to the retain
+        choice and preferred root. Copies that no longer exist are left out;
+        primary is None when fewer than two remain.
+        """
+        retain_oldest = self.retain_choice_var.get() == "oldest"
+        mtimes = {}
+        for record in records:
+            try:
+                mtimes[str(record.path)] = record.path.stat().st_mtime
+            except OSError:
+                continue
+        present = [record for record in records if str(record.path) in mtimes]
+        if len(present) < 2:
+            return None, []
+        # Sort by mtime
+        sorted_records = sorted(present, key=lambda r: mtimes[str(r.path)], reverse=not retain_oldest)
+        preferred = self.prefer_root_var.get()
+        if preferred and preferred != NO_PREFERRED_ROOT:
+            # stable sort: mtime order is kept within the preferred root and within the rest
+            sorted_records.sort(key=lambda r: str(r.root) != preferred)
+        return sorted_records[0], sorted_records[1:]
+
     def _build_action_summary(self) -> list[str]:
         """Build a list of planned changes for preview."""
+        with self._results_lock():
+            return self._action_summary_lines()
+
+    def _action_summary_lines(self) -> list[str]:
         summary = []
 
         if self.dup_handle_var.get() and self.current_results.duplicates:
-            retain_oldest = self.retain_choice_var.get() == "oldest"
+            dup_action = self.dup_action_var.get()
             for hash_value, records in self.current_results.duplicates.items():
                 if len(records) < 2:
                     continue
-                # Sort by mtime
-                sorted_records = sorted(records, key=lambda r: r.path.stat().st_mtime, reverse=not retain_oldest)
-                primary = sorted_records[0]
-                duplicates = sorted_records[1:]
+                primary, duplicates = self._split_duplicate_group(records)
+                if primary is None:
+                    continue
                 summary.append(f"Retain: {primary.path.name}")
                 for dup in duplicates:
-                    new_name = f"._dr_{dup.path.name}"
-                    summary.append(f"Rename: {dup.path.name} -> {new_name}")
+                    if dup_action == "rename":
+                        new_name = f"._dr_{dup.path.name}"
+                        summary.append(f"Rename: {dup.path.name} -> {new_name}")
+                    else:
+                        summary.append(f"{dup_action.capitalize()}: {dup.path.name} -> {primary.path.name}")
 
         if self.auto_organize_var.get() and self.current_results.by_category:
             for category, stats in self.current_results.by_category.items():
@@ -1090,34 +5617,45 @@ with Hugging Face transformers for intelligent organization."""
 
         return summary
 
-    def _apply_actions(self, dry_run: bool) -> None:
-        """Apply the selected actions."""
+    def _apply_actions(self, dry_run: bool) -> int:
+        """Apply the selected actions. Returns the number of bytes reclaimed by linking."""
+        # watch mode waits until the actions are done, then picks up their changes as events
+        with self._results_lock():
+            return self._run_actions(dry_run)
+
+    def _run_actions(self, dry_run: bool) -> int:
         root_path = self.current_results.root
+        reclaimed = 0
 
         # Handle duplicates
         if self.dup_handle_var.get() and self.current_results.duplicates:
-            retain_oldest = self.retain_choice_var.get() == "oldest"
+            dup_action = self.dup_action_var.get()
             for hash_value, records in self.current_results.duplicates.items():
                 if len(records) < 2:
                     continue
-                # Sort by mtime
-                sorted_records = sorted(records, key=lambda r: r.path.stat().st_mtime, reverse=not retain_oldest)
-                primary = sorted_records[0]
-                duplicates = sorted_records[1:]
+                primary, duplicates = self._split_duplicate_group(records)
                 for dup in duplicates:
-                    new_path = dup.path.parent / f"._dr_{dup.path.name}"
-                    if not dry_run:
-                        self._safe_rename(dup.path, new_path)
-                    # Update progress
-                    self.progress_var.set(f"Renaming: {dup.path.name}")
+                    # the scan may be old; a copy removed since then is skipped
+                    if not dup.path.exists() or not primary.path.exists():
+                        continue
+                    if dup_action == "rename":
+                        new_path = dup.path.parent / f"._dr_{dup.path.name}"
+                        if not dry_run:
+                            self._safe_rename(dup.path, new_path)
+                        # Update progress
+                        self.progress_var.set(f"Renaming: {dup.path.name}")
+                    else:
+                        if not dry_run:
+                            reclaimed += self._safe_link(primary.path, dup.path, dup_action)
+                        self.progress_var.set(f"Linking: {dup.path.name} -> {primary.path.name}")
                     self.root.update_idletasks()
 
         # Auto-organize by categories
         if self.auto_organize_var.get() and self.current_results.by_category:
             for record in self.current_results.files:
-                if not record.category:
+                if not record.category or not record.path.exists():
                     continue
-                category_dir = root_path / record.category
+                category_dir = (record.root or root_path) / record.category
                 if not dry_run:
                     category_dir.mkdir(parents=True, exist_ok=True)
                 new_path = category_dir / record.path.name
@@ -1127,6 +5665,20 @@ with Hugging Face transformers for intelligent organization."""
                 self.progress_var.set(f"Moving: {record.path.name} to {record.category}/")
                 self.root.update_idletasks()
 
+        return reclaimed
+
+    def _safe_link(self, primary: Path, dup: Path, mode: str) -> int:
+        """Replace dup with a link to primary, falling back to the ._dr_ rename per file."""
+        try:
+            method, reclaimed = link_duplicate(primary, dup, mode)
+        except OSError:
+            self._safe_rename(dup, dup.parent / f"._dr_{dup.name}")
+            return 0
+        if method == "mismatch":
+            # Content changed since the scan; leave the file untouched
+            return 0
+        return reclaimed
+
     def _safe_rename(self, src: Path, dst: Path) -> bool:
         """Safely rename a file, handling conflicts."""
         if dst.exists():
@@ -1167,10 +5719,381 @@ with Hugging Face transformers for intelligent organization."""
                 return
             self.stop_event.set()
             self.scanner.join(timeout=2)
+        self._stop_watcher()
         self.root.destroy()
 
 
+def platform_node_name() -> str:
+    return platform.node() or "node"
+
+
+def _default_worker_count() -> int:
+    return max(4, min(32, (os.cpu_count() or 4) * 2))
+
+
+def build_cli_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="DupeRangerAi",
+        description="Run without arguments to start the GUI, or use a subcommand for headless operation.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan = subparsers.add_parser("scan", help="scan a directory without the GUI")
+    scan.add_argument("root", type=Path, nargs="+", help="one or more directories; duplicates are found across all of them")
+    scan.add_argument("--hash", action="store_true", help="verify duplicate candidates with a full-content digest")
+    scan.add_argument(
+        "--digest",
+        choices=("auto", *DIGEST_ALGORITHMS),
+        default=DEFAULT_DIGEST,
+        help="verification digest; auto picks the faster of sha256/blake3 (keep one digest per scan DB you diff)",
+    )
+    scan.add_argument("--workers", type=int, default=_default_worker_count())
+    scan.add_argument("--fast-chunk-mb", type=float, default=8.0)
+    scan.add_argument("--sha-chunk-mb", type=float, default=1.0)
+    scan.add_argument(
+        "--engine",
+        choices=SCAN_ENGINES,
+        default="threads",
+        help="async keeps --io-depth stats/reads in flight; for high-latency network mounts",
+    )
+    scan.add_argument("--io-depth", type=int, default=ASYNC_READ_DEPTH, help="operations in flight with --engine async")
+    scan.add_argument(
+        "--tree-hash-mb",
+        type=float,
+        default=TREE_HASH_THRESHOLD / (1024 * 1024),
+        help=f"hash files this big as parallel {TREE_SEGMENT_SIZE // (1024 * 1024)} MB segments (tree-<digest>); 0 disables",
+    )
+    scan.add_argument(
+        "--small-file-kb",
+        type=float,
+        default=SMALL_FILE_THRESHOLD / 1024,
+        help="read files below this size whole in one call, batched per worker; 0 disables",
+    )
+    scan.add_argument("--top-dirs", type=int, default=0, metavar="N", help="list the N directories holding the most duplicate bytes")
+    scan.add_argument("--auto-tune", action="store_true", help="probe storage and adapt workers/chunk sizes while scanning")
+    scan.add_argument("--per-device-io", action="store_true", help="schedule reads per device (HDD/NAS friendly)")
+    scan.add_argument("--scan-db", type=Path, help="SQLite (.db) or Parquet (.parquet) scan database")
+    scan.add_argument("--overwrite", action="store_true", help="replace a finished scan already at --scan-db")
+    scan.add_argument("--export", type=Path, help="NDJSON records export (.gz / .zst to compress)")
+    scan.add_argument("--metrics-out", type=Path, help="scan metrics: .prom for Prometheus text, otherwise JSON")
+    scan.add_argument("--quiet", action="store_true", help="no live progress line on stderr")
+    scan.add_argument("--external-sort", action="store_true", help=f"group duplicate candidates via sorted temp files (automatic above {EXTERNAL_SORT_THRESHOLD:,} files)")
+    scan.add_argument("--checkpoint", type=Path, help="on Ctrl+C save progress here; an existing checkpoint for the same roots is resumed")
+    scan.add_argument("--similar-images", action="store_true", help="group resized/re-encoded images by perceptual hash (needs Pillow)")
+    scan.add_argument("--similar-threshold", type=int, default=PERCEPTUAL_THRESHOLD, help="max differing bits of 64 for similar images")
+    scan.add_argument("--watch", action="store_true", help="after the scan, keep duplicate groups live until Ctrl+C")
+    scan.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE_SECONDS, help="seconds a path must be quiet before re-hashing")
+    scan.add_argument("--poll", type=float, metavar="SECONDS", help="watch by polling at this interval instead of inotify/watchdog")
+    rules = scan.add_argument_group("walk filters", "applied while walking; excluded directories are never entered")
+    rules.add_argument("--filter-set", metavar="NAME", help="start from a saved or built-in rule set (see the filters command)")
+    rules.add_argument("--exclude-dir", action="append", default=[], metavar="GLOB", help="prune matching directories")
+    rules.add_argument("--include", action="append", default=[], metavar="GLOB", help="only files matching one of these")
+    rules.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="skip matching files")
+    rules.add_argument("--include-regex", action="append", default=[], metavar="REGEX", help="only files whose path matches")
+    rules.add_argument("--exclude-regex", action="append", default=[], metavar="REGEX", help="skip files whose path matches")
+    rules.add_argument("--ext", action="append", default=[], metavar="EXT", help="only these extensions")
+    rules.add_argument("--exclude-ext", action="append", default=[], metavar="EXT", help="skip these extensions")
+    rules.add_argument("--min-size", type=int, metavar="BYTES", help="skip smaller files")
+    rules.add_argument("--max-size", type=int, metavar="BYTES", help="skip larger files")
+    rules.add_argument("--save-filter-set", metavar="NAME", help="save the combined rules under NAME before scanning")
+
+    subparsers.add_parser("filters", help="list saved and built-in walk filter rule sets")
+
+    node = subparsers.add_parser("node", help="distributed mode: index local roots and answer confirm requests")
+    node.add_argument("root", type=Path, nargs="+")
+    node.add_argument("--exchange", type=Path, required=True, help="directory shared with the merge coordinator")
+    node.add_argument("--node-id", default=platform_node_name(), help="unique name for this node")
+    node.add_argument("--workers", type=int, default=_default_worker_count())
+    node.add_argument("--timeout", type=float, default=None, help="seconds to wait for the coordinator")
+
+    chunks = subparsers.add_parser("chunks", help="estimate block-level (content-defined chunk) dedup for large files")
+    chunks.add_argument("root", type=Path, nargs="+")
+    chunks.add_argument("--min-size-mb", type=float, default=CHUNK_ANALYSIS_MIN_SIZE / (1024 * 1024), help="skip smaller files")
+    chunks.add_argument("--avg-chunk-kb", type=int, default=CDC_AVG_SIZE // 1024)
+    chunks.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    chunks.add_argument("--top", type=int, default=20, help="number of most similar file pairs to report")
+    chunks.add_argument("--report", type=Path, help="write the full report as JSON")
+
+    merge = subparsers.add_parser("merge", help="distributed mode: merge node indexes into global duplicate groups")
+    merge.add_argument("--exchange", type=Path, required=True)
+    merge.add_argument("--nodes", nargs="+", help="node ids to wait for")
+    merge.add_argument("--expect", type=int, help="number of node indexes to wait for (when --nodes is not given)")
+    merge.add_argument("--report", type=Path, help="write duplicate groups as JSON")
+    merge.add_argument("--timeout", type=float, default=None)
+    return parser
+
+
+def run_cli(argv: list[str]) -> int:
+    """Headless entry point; returns a process exit code."""
+    args = build_cli_parser().parse_args(argv)
+    mimetypes.init()
+    if args.command == "scan":
+        return _cli_scan(args)
+    if args.command == "node":
+        count = run_scan_node(args.node_id, args.root, FileExchange(args.exchange), args.workers, timeout=args.timeout)
+        print(f"node {args.node_id}: indexed {count} files")
+        return 0
+    if args.command == "merge":
+        return _cli_merge(args)
+    if args.command == "chunks":
+        return _cli_chunks(args)
+    if args.command == "filters":
+        for name, rules in sorted(load_filter_sets().items()):
+            print(f"{name}: {json.dumps(rules, sort_keys=True)}")
+        return 0
+    return 2
+
+
+def _cli_scan_filter(args: argparse.Namespace) -> ScanFilter:
+    """Named rule set (if any) extended by the individual flags; ValueError for an unknown set or bad regex."""
+    rules: dict = {}
+    if args.filter_set:
+        sets = load_filter_sets()
+        if args.filter_set not in sets:
+            raise ValueError(f"Unknown filter set: {args.filter_set} (known: {', '.join(sorted(sets))})")
+        rules = dict(sets[args.filter_set])
+    for key, extra in (
+        ("exclude_dirs", args.exclude_dir),
+        ("include", args.include),
+        ("exclude", args.exclude),
+        ("include_regex", args.include_regex),
+        ("exclude_regex", args.exclude_regex),
+        ("extensions", args.ext),
+        ("exclude_extensions", args.exclude_ext),
+    ):
+        rules[key] = list(rules.get(key, [])) + extra
+    if args.min_size is not None:
+        rules["min_size"] = args.min_size
+    if args.max_size is not None:
+        rules["max_size"] = args.max_size
+    try:
+        scan_filter = ScanFilter.from_dict(rules)
+    except re.error as exc:
+        raise ValueError(f"Bad filter regex: {exc}") from exc
+    if args.save_filter_set:
+        save_filter_set(args.save_filter_set, scan_filter)
+    return scan_filter
+
+
+def _cli_chunks(args: argparse.Namespace) -> int:
+    min_size = int(args.min_size_mb * 1024 * 1024)
+    if np is None:
+        print("NumPy is not installed; chunking falls back to the much slower pure-Python cut search", file=sys.stderr)
+
+    def candidates():
+        for root in FileScanner._normalize_roots(args.root):
+            for file_path, _dev, _ino in iter_file_entries(root):
+                try:
+                    if file_path.stat().st_size >= min_size:
+                        yield file_path
+                except OSError:
+                    continue
+
+    report = analyze_chunk_dedup(candidates(), args.workers, avg_size=args.avg_chunk_kb * 1024, top_pairs=args.top)
+    if args.report:
+        args.report.write_text(json.dumps(report.to_dict(), indent=2), encoding="utf-8")
+    mb = 1024 * 1024
+    print(
+        f"{report.files} files, {report.total_bytes / mb:.2f} MB, {report.unique_chunks}/{report.chunks} unique chunks, "
+        f"{report.reclaimable_bytes / mb:.2f} MB reclaimable at block level"
+    )
+    for pair in report.pairs:
+        print(f"{pair['ratio']:7.1%}  {pair['shared_bytes'] / mb:9.2f} MB  {pair['a']}  <->  {pair['b']}")
+    return 0
+
+
+def _cli_merge(args: argparse.Namespace) -> int:
+    if not args.nodes and not args.expect:
+        print("merge needs --nodes or --expect", file=sys.stderr)
+        return 2
+    groups = run_merge_coordinator(FileExchange(args.exchange), args.nodes, args.expect, timeout=args.timeout)
+    report = [
+        {
+            "hash": sha,
+            "count": len(members),
+            "size": members[0][2],
+            "reclaimable_bytes": members[0][2] * (len(members) - 1),
+            "members": [{"node": node, "path": path} for node, path, _size in members],
+        }
+        for sha, members in groups.items()
+    ]
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    reclaimable = sum(group["reclaimable_bytes"] for group in report)
+    spanning = sum(1 for group in report if len({m["node"] for m in group["members"]}) > 1)
+    print(f"{len(report)} duplicate groups ({spanning} across nodes), {reclaimable / (1024 * 1024):.2f} MB reclaimable")
+    return 0
+
+
+def _cli_scan(args: argparse.Namespace) -> int:
+    for root in args.root:
+        if not root.is_dir():
+            print(f"Not a directory: {root}", file=sys.stderr)
+            return 2
+    if args.similar_images and Image is None:
+        print("--similar-images needs Pillow (pip install pillow)", file=sys.stderr)
+        return 2
+    resume = None
+    if args.checkpoint is not None and args.checkpoint.exists():
+        resume = ScanCheckpoint.load(args.checkpoint)
+        if resume is not None and resume.matches(FileScanner._normalize_roots(args.root)):
+            print(f"Resuming from {args.checkpoint} ({len(resume)} finished files)", file=sys.stderr)
+        else:
+            resume = None
+    try:
+        digest = resolve_digest(args.digest, args.hash)
+        scan_filter = _cli_scan_filter(args)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    if args.scan_db is not None and not args.overwrite and scan_db_needs_overwrite(args.scan_db):
+        print(f"{args.scan_db} already exists (a finished scan or another file); pass --overwrite to replace it", file=sys.stderr)
+        return 2
+    queue: Queue = Queue()
+    stop_event = threading.Event()
+    pause_event = threading.Event()
+    scanner = FileScanner(
+        root_path=args.root,
+        compute_hashes=args.hash,
+        queue=queue,
+        stop_event=stop_event,
+        max_workers=args.workers,
+        fast_chunk=int(args.fast_chunk_mb * 1024 * 1024),
+        sha_chunk=int(args.sha_chunk_mb * 1024 * 1024),
+        classifier=None,
+        scan_db=args.scan_db,
+        overwrite_db=args.overwrite,
+        auto_tune=args.auto_tune,
+        io_scheduler=args.per_device_io,
+        perceptual=args.similar_images,
+        perceptual_threshold=args.similar_threshold,
+        checkpoint=args.checkpoint,
+        pause_event=pause_event,
+        resume=resume,
+        external_sort=args.external_sort,
+        digest=digest,
+        tree_threshold=int(args.tree_hash_mb * 1024 * 1024) or None,
+        engine=args.engine,
+        io_depth=args.io_depth,
+        scan_filter=scan_filter,
+        small_file_threshold=int(args.small_file_kb * 1024),
+    )
+    if args.hash and not args.quiet:
+        print(f"Verification digest: {scanner.digest}", file=sys.stderr)
+    scanner.start()
+    results = None
+    errors = 0
+    while results is None:
+        try:
+            message = queue.get(timeout=0.5)
+        except Empty:
+            if not scanner.is_alive() and queue.empty():
+                break
+            continue
+        except KeyboardInterrupt:
+            # with --checkpoint this pauses; otherwise the partial results are reported
+            if args.checkpoint is not None:
+                pause_event.set()
+            stop_event.set()
+            print("\nstopping ...", file=sys.stderr)
+            continue
+        message_type = message.get("type")
+        if message_type == "metrics" and not args.quiet:
+            print(f"\r{message.get('status', ''):<100}", end="", file=sys.stderr, flush=True)
+        elif message_type == "error":
+            errors += 1
+            print(f"\nerror: {message.get('message', 'Unknown error')}", file=sys.stderr)
+        elif message_type == "done":
+            results = message["results"]
+        elif message_type == "paused":
+            print(f"\npaused after {message['files']} files; run the same command to resume", file=sys.stderr)
+            return 130
+    if not args.quiet:
+        print(file=sys.stderr)
+    if results is None:
+        return 1
+
+    if args.export:
+        with open_export_stream(args.export) as stream:
+            for line in iter_ndjson_lines(results):
+                stream.write(line)
+                stream.write("\n")
+    if args.metrics_out and results.metrics is not None:
+        results.metrics.write(args.metrics_out)
+    reclaimable = sum(records[0].size * (len(records) - 1) for records in results.duplicates.values())
+    print(
+        f"{len(results.files)} files, {len(results.duplicates)} duplicate groups, "
+        f"{reclaimable / (1024 * 1024):.2f} MB reclaimable"
+    )
+    if results.duplicate_dirs:
+        covered = len({key for found in results.duplicate_dirs.values() for key in found.groups})
+        print(f"{len(results.duplicate_dirs)} sets of identical directories (covering {covered} duplicate groups)")
+    if args.top_dirs and results.directories is not None:
+        print("Directories holding the most duplicate bytes (own files / whole subtree):")
+        for directory, totals in results.directories.top(args.top_dirs):
+            subtree = results.directories.totals(directory)
+            print(
+                f"  {totals['duplicate_bytes'] / (1024 * 1024):10.2f} MB / {subtree['duplicate_bytes'] / (1024 * 1024):10.2f} MB"
+                f"  {directory}"
+            )
+    if args.similar_images:
+        print(f"{len(results.near_duplicates)} groups of similar images")
+    if results.hardlinks:
+        linked = sum(len(records) for records in results.hardlinks.values())
+        print(f"{linked} files are hardlinks to {len(results.hardlinks)} inodes (already deduplicated, not counted)")
+    if results.scan_filter is not None:
+        print(f"Filter skipped {results.scan_filter.skipped_files} files and {results.scan_filter.skipped_dirs} directories")
+    if args.watch:
+        _cli_watch(args, results)
+    return 0 if errors == 0 else 1
+
+
+def _cli_watch(args: argparse.Namespace, results: ScanResults) -> None:
+    queue: Queue = Queue()
+    stop_event = threading.Event()
+    watcher = DuplicateWatcher(
+        results,
+        queue,
+        stop_event,
+        max_workers=args.workers,
+        fast_chunk=int(args.fast_chunk_mb * 1024 * 1024),
+        sha_chunk=int(args.sha_chunk_mb * 1024 * 1024),
+        compute_hashes=args.hash,
+        debounce=args.debounce,
+        poll_interval=args.poll or 5.0,
+        use_polling=args.poll is not None,
+    )
+    watcher.start()
+    print(f"Watching for changes ({watcher.backend}); press Ctrl+C to stop", file=sys.stderr)
+    try:
+        while watcher.is_alive():
+            try:
+                message = queue.get(timeout=0.5)
+            except Empty:
+                continue
+            if message.get("type") == "watch_update":
+                with watcher.lock:
+                    file_count = len(results.files)
+                    group_count = len(results.duplicates)
+                print(
+                    f"+{message['added']} ~{message['modified']} -{message['removed']}: "
+                    f"{file_count} files, {group_count} duplicate groups",
+                    flush=True,
+                )
+            elif message.get("type") == "error":
+                print(f"error: {message.get('message', 'Unknown error')}", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        watcher.join(timeout=2)
+
+
 def main() -> None:
+    # chunk analysis uses worker processes; needed for frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        raise SystemExit(run_cli(sys.argv[1:]))
     mimetypes.init()
     root = tk.Tk()
     app = FileOrganizerApp(root)
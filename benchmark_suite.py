@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for FileScanner with a reproducible synthetic tree generator.
+
+Generates a tree with a configurable shape (file count, size distribution,
+duplicate ratio, directory depth, same-size-different-content rate), runs
+FileScanner over a matrix of worker counts and chunk sizes, and records the
+per-phase timings and bytes read from ScanMetrics. Results are written as
+JSON; pass --baseline to compare against a stored run and flag regressions.
+
+--latency-ms adds a fixed delay to every stat/scandir/open (LatencyShim) to
+stand in for an SMB/NFS mount, and --engines compares the threaded scanner
+with the asyncio engine under that latency.
+
+Examples:
+    python benchmark_suite.py --files 5000 --workers 4 8 16 --output bench.json
+    python benchmark_suite.py --files 5000 --baseline bench.json --threshold 0.15
+    python benchmark_suite.py --files 5000 --latency-ms 3 --engines threads async
+"""
+import argparse
+import builtins
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from queue import Queue
+
+from DupeRangerAi import SCAN_ENGINES, FileScanner
+
+
+@dataclass
+class TreeShape:
+    file_count: int = 2000
+    # "fixed" (always mean_size), "uniform" (0..2*mean_size) or "lognormal" (long tail up to max_size)
+    size_distribution: str = "lognormal"
+    mean_size: int = 64 * 1024
+    max_size: int = 64 * 1024 * 1024
+    duplicate_ratio: float = 0.2
+    same_size_ratio: float = 0.1
+    depth: int = 4
+    fanout: int = 6
+    seed: int = 1234
+
+
+def _draw_size(rng: random.Random, shape: TreeShape) -> int:
+    if shape.size_distribution == "fixed":
+        return shape.mean_size
+    if shape.size_distribution == "uniform":
+        return rng.randint(0, 2 * shape.mean_size)
+    if shape.size_distribution == "lognormal":
+        # median == mean_size, sigma chosen to give a realistic long tail
+        return min(shape.max_size, int(rng.lognormvariate(0, 1.5) * shape.mean_size))
+    raise ValueError(f"Unknown size distribution: {shape.size_distribution}")
+
+
+def generate_tree(root: Path, shape: TreeShape) -> dict:
+    """
+    Create the synthetic tree under root. The same shape (including seed)
+    always produces byte-identical trees. Returns a manifest of what was made.
+    """
+    rng = random.Random(shape.seed)
+    directories = [root]
+    frontier = [root]
+    for _level in range(shape.depth):
+        next_frontier = []
+        for parent in frontier:
+            for i in range(shape.fanout):
+                child = parent / f"d{i}"
+                next_frontier.append(child)
+        directories.extend(next_frontier)
+        frontier = next_frontier
+        if len(directories) * 4 >= shape.file_count:
+            break
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    uniques: list[Path] = []
+    manifest = {"files": 0, "bytes": 0, "duplicates": 0, "same_size": 0, "directories": len(directories)}
+    for i in range(shape.file_count):
+        target = rng.choice(directories) / f"f{i:07d}.bin"
+        roll = rng.random()
+        if uniques and roll < shape.duplicate_ratio:
+            source = rng.choice(uniques)
+            shutil.copyfile(source, target)
+            manifest["duplicates"] += 1
+            size = source.stat().st_size
+        else:
+            if uniques and roll < shape.duplicate_ratio + shape.same_size_ratio:
+                # same size as an existing file but different content: defeats size-only grouping
+                size = rng.choice(uniques).stat().st_size
+                manifest["same_size"] += 1
+            else:
+                size = _draw_size(rng, shape)
+            target.write_bytes(rng.randbytes(size))
+            uniques.append(target)
+        manifest["files"] += 1
+        manifest["bytes"] += size
+    return manifest
+
+
+class LatencyShim:
+    """
+    Process-wide fixed delay on every metadata call (stat, lstat, scandir)
+    and every open, so a local tree behaves like a high-latency network
+    mount. The delay is a sleep: it costs wall time but no CPU, like a round
+    trip to a file server. Use as a context manager around the scan only.
+    """
+
+    def __init__(self, latency_ms: float):
+        self.delay = latency_ms / 1000.0
+        self._saved: list[tuple[object, str, object]] = []
+
+    def _wrap(self, owner, name: str) -> None:
+        original = getattr(owner, name)
+        delay = self.delay
+
+        def delayed(*args, **kwargs):
+            time.sleep(delay)
+            return original(*args, **kwargs)
+
+        self._saved.append((owner, name, original))
+        setattr(owner, name, delayed)
+
+    def __enter__(self):
+        if self.delay > 0:
+            for name in ("stat", "lstat", "scandir", "open"):
+                self._wrap(os, name)
+            # Path.open goes through io.open; plain open() through builtins
+            self._wrap(io, "open")
+            self._wrap(builtins, "open")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        while self._saved:
+            owner, name, original = self._saved.pop()
+            setattr(owner, name, original)
+
+
+def run_scan(root: Path, workers: int, fast_chunk: int, sha_chunk: int, engine: str = "threads", latency_ms: float = 0.0) -> dict:
+    queue: Queue = Queue()
+    scanner = FileScanner(
+        root_path=root,
+        compute_hashes=True,
+        queue=queue,
+        stop_event=threading.Event(),
+        max_workers=workers,
+        fast_chunk=fast_chunk,
+        sha_chunk=sha_chunk,
+        classifier=None,
+        engine=engine,
+    )
+    with LatencyShim(latency_ms):
+        start = time.perf_counter()
+        scanner.start()
+        while True:
+            msg = queue.get()
+            if msg.get("type") == "done":
+                results = msg["results"]
+                break
+            if msg.get("type") == "error":
+                raise RuntimeError(msg.get("message"))
+        wall = time.perf_counter() - start
+        scanner.join()
+    return {
+        "wall_seconds": wall,
+        "files": len(results.files),
+        "duplicate_groups": len(results.duplicates),
+        "metrics": results.metrics.snapshot(),
+    }
+
+
+def config_key(workers: int, fast_chunk: int, sha_chunk: int, engine: str = "threads") -> str:
+    # threaded keys keep their original form so older baselines still compare
+    suffix = "" if engine == "threads" else f"-{engine}"
+    return f"w{workers}-fast{fast_chunk}-sha{sha_chunk}{suffix}"
+
+
+def run_suite(root: Path, workers_list, fast_chunks, sha_chunks, repeat: int, engines=("threads",), latency_ms: float = 0.0) -> dict:
+    runs = {}
+    for engine, workers, fast_chunk, sha_chunk in itertools.product(engines, workers_list, fast_chunks, sha_chunks):
+        samples = [run_scan(root, workers, fast_chunk, sha_chunk, engine, latency_ms) for _ in range(repeat)]
+        walls = [sample["wall_seconds"] for sample in samples]
+        key = config_key(workers, fast_chunk, sha_chunk, engine)
+        # keep the fastest sample's metrics; the median wall time is the comparison value
+        best = min(samples, key=lambda sample: sample["wall_seconds"])
+        runs[key] = {
+            "engine": engine,
+            "workers": workers,
+            "fast_chunk": fast_chunk,
+            "sha_chunk": sha_chunk,
+            "median_wall_seconds": statistics.median(walls),
+            "min_wall_seconds": min(walls),
+            "files": best["files"],
+            "duplicate_groups": best["duplicate_groups"],
+            "metrics": best["metrics"],
+        }
+        print(f"{key:>32}: median {runs[key]['median_wall_seconds']:.3f}s over {repeat} run(s)")
+    return runs
+
+
+def compare_to_baseline(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return a line per configuration whose median wall time regressed beyond threshold."""
+    regressions = []
+    for key, run in current["runs"].items():
+        base = baseline.get("runs", {}).get(key)
+        if not base:
+            continue
+        before = base["median_wall_seconds"]
+        after = run["median_wall_seconds"]
+        if before > 0 and (after - before) / before > threshold:
+            regressions.append(f"{key}: {before:.3f}s -> {after:.3f}s (+{(after - before) / before:.0%})")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    shape = TreeShape()
+    parser.add_argument("--files", type=int, default=shape.file_count)
+    parser.add_argument("--size-distribution", choices=("fixed", "uniform", "lognormal"), default=shape.size_distribution)
+    parser.add_argument("--mean-size", type=int, default=shape.mean_size, help="bytes")
+    parser.add_argument("--max-size", type=int, default=shape.max_size, help="bytes")
+    parser.add_argument("--duplicate-ratio", type=float, default=shape.duplicate_ratio)
+    parser.add_argument("--same-size-ratio", type=float, default=shape.same_size_ratio)
+    parser.add_argument("--depth", type=int, default=shape.depth)
+    parser.add_argument("--fanout", type=int, default=shape.fanout)
+    parser.add_argument("--seed", type=int, default=shape.seed)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--fast-chunk-mb", type=float, nargs="+", default=[8.0])
+    parser.add_argument("--sha-chunk-mb", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--engines", nargs="+", choices=SCAN_ENGINES, default=["threads"])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every stat/scandir/open (simulated network mount)")
+    parser.add_argument("--tree", type=Path, help="reuse/generate the tree here instead of a temp dir")
+    parser.add_argument("--output", type=Path, help="write machine-readable results (JSON)")
+    parser.add_argument("--baseline", type=Path, help="compare against a previous --output file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging (0.10 = 10%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    shape = TreeShape(
+        file_count=args.files,
+        size_distribution=args.size_distribution,
+        mean_size=args.mean_size,
+        max_size=args.max_size,
+        duplicate_ratio=args.duplicate_ratio,
+        same_size_ratio=args.same_size_ratio,
+        depth=args.depth,
+        fanout=args.fanout,
+        seed=args.seed,
+    )
+    tree = args.tree or Path(tempfile.mkdtemp(prefix="duperanger-bench-"))
+    try:
+        if args.tree and tree.exists() and any(tree.iterdir()):
+            print(f"Reusing existing tree at {tree}")
+            manifest = None
+        else:
+            print(f"Generating {shape.file_count} files in {tree}")
+            manifest = generate_tree(tree, shape)
+        runs = run_suite(
+            tree,
+            args.workers,
+            [int(mb * 1024 * 1024) for mb in args.fast_chunk_mb],
+            [int(mb * 1024 * 1024) for mb in args.sha_chunk_mb],
+            args.repeat,
+            args.engines,
+            args.latency_ms,
+        )
+    finally:
+        if not args.tree:
+            shutil.rmtree(tree, ignore_errors=True)
+
+    report = {
+        "created_at": time.time(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "shape": asdict(shape),
+        "latency_ms": args.latency_ms,
+        "manifest": manifest,
+        "runs": runs,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("shape") != report["shape"]:
+            print("Warning: baseline was recorded with a different tree shape")
+        if baseline.get("latency_ms", 0.0) != report["latency_ms"]:
+            print("Warning: baseline was recorded with a different injected latency")
+        regressions = compare_to_baseline(report, baseline, args.threshold)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+"""Compare the memory cost of ScanResults.files representations.
+
+Builds the same synthetic scan (deep-ish directory tree, a handful of
+extensions/MIME types, xxhash fingerprints, sparse SHA-256 hashes) three ways
+and reports the traced allocation per file:
+
+- legacy: list of plain FileRecord dataclasses (the pre-RecordStore layout)
+- slots:  list of the current __slots__ FileRecord
+- store:  RecordStore columns (the default ScanResults.files backing)
+
+It then compares phase-2 candidate grouping: the in-memory dict against the
+external sort (sorted runs spilled to temp files), by peak traced memory and
+wall time.
+
+Usage: python memory_benchmark.py [file_count]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+from DupeRangerAi import FileRecord, RecordStore, iter_candidate_groups, iter_candidate_groups_external
+
+
+@dataclass
+class _LegacyFileRecord:
+    path: Path
+    size: int
+    extension: str
+    mime: str | None
+    hash_value: str | None = None
+    fast_hash: int | None = None
+    category: str | None = None
+
+
+EXTENSIONS = [
+    (".jpg", "image/jpeg"),
+    (".png", "image/png"),
+    (".mp4", "video/mp4"),
+    (".txt", "text/plain"),
+    (".py", "text/x-python"),
+    (".zip", "application/zip"),
+    ("", None),
+]
+
+
+def synthetic_rows(count: int, seed: int = 1234):
+    rng = random.Random(seed)
+    # ~25 files per directory, 2-6 levels deep, like a typical photo/source tree
+    directories = [
+        Path("/mnt/archive", *(f"dir{rng.randint(0, 40)}" for _ in range(rng.randint(2, 6))), f"leaf{d}")
+        for d in range(max(1, count // 25))
+    ]
+    for i in range(count):
+        ext, mime = rng.choice(EXTENSIONS)
+        path = rng.choice(directories) / f"file_{i:08d}{ext}"
+        sha = f"{rng.getrandbits(256):064x}" if rng.random() < 0.05 else None
+        yield path, rng.randint(0, 1 << 30), ext, mime, sha, rng.getrandbits(64)
+
+
+def measure(builder, count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    container = builder(count)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    return current
+
+
+def build_legacy(count: int):
+    return [_LegacyFileRecord(p, s, e, m, h, f) for p, s, e, m, h, f in synthetic_rows(count)]
+
+
+def build_slots(count: int):
+    return [FileRecord(p, s, e, m, h, f) for p, s, e, m, h, f in synthetic_rows(count)]
+
+
+def build_store(count: int):
+    store = RecordStore()
+    for p, s, e, m, h, f in synthetic_rows(count):
+        store.append(FileRecord(p, s, e, m, h, f))
+    return store
+
+
+def run_memory_benchmark(count: int = 200_000) -> None:
+    print(f"Synthetic records: {count}")
+    for label, builder in (("legacy", build_legacy), ("slots", build_slots), ("store", build_store)):
+        used = measure(builder, count)
+        print(f"{label:>7}: {used / (1024 * 1024):8.2f} MB  ({used / count:7.1f} bytes/file)")
+
+
+def synthetic_group_keys(count: int, seed: int = 1234):
+    """(index, size, fast_hash) like RecordStore.iter_group_keys; about 10% of files copy an earlier one."""
+    rng = random.Random(seed)
+    for i in range(count):
+        content = rng.randrange(i) if i and rng.random() < 0.1 else i
+        # size and fingerprint are a pure function of the content id
+        key = random.Random(content).getrandbits(94)
+        yield i, key >> 64, key & ((1 << 64) - 1)
+
+
+def measure_grouping(grouper, count: int) -> tuple[int, int, float]:
+    """Return (groups found, peak traced bytes, untraced wall seconds)."""
+    start = time.perf_counter()
+    groups = sum(1 for _ in grouper(synthetic_group_keys(count)))
+    wall = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    sum(1 for _ in grouper(synthetic_group_keys(count)))
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return groups, peak, wall
+
+
+def run_grouping_benchmark(count: int = 200_000) -> None:
+    print(f"Candidate grouping over {count} keys")
+    external = lambda keys: iter_candidate_groups_external(keys, run_entries=max(1000, count // 20))
+    for label, grouper in (("dict", iter_candidate_groups), ("external", external)):
+        groups, peak, wall = measure_grouping(grouper, count)
+        print(f"{label:>9}: {groups} groups, peak {peak / (1024 * 1024):8.2f} MB, {wall:6.2f} s")
+
+
+if __name__ == '__main__':
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    run_memory_benchmark(file_count)
+    run_grouping_benchmark(file_count)